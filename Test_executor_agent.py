@@ -2,35 +2,136 @@
 AI Test Executor Agent (Direct Execution, No Input)
 ==================================================
 Automatically executes generated tests using unittest.
+Tests run inside the resource-limited sandbox; every run and its
+per-test outcomes are appended to the run history. Third-party imports
+of the project can be replaced by import_stubs when enabled with
+TEST_STUB_IMPORTS=missing|all.
+
+Tests run in discovery order by default. TEST_ORDER=history runs the
+most-likely-to-fail first, using the run history and which test modules
+changed since the last run; TEST_FAIL_FAST=1 stops at the first failure.
 """
 
+import json
 import os
+import sys
 import time
 import subprocess
 import shlex
+from context_enricher import extract_imports_from_file
+from import_stubs import DEFAULT_STUB_MODE, classify_imports
+from project_manifest import get_manifest, import_roots
+from run_history import code_fingerprint, get_run_history, project_key
+from sandbox import SandboxLimits, run_sandboxed
+from unittest_runner import read_results
 PROJECT_PATH = os.path.dirname(__file__)
+RUNNER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "unittest_runner.py")
 TIMEOUT_S = 90 
 
 
 class TestExecutorAgent:
-    def __init__(self, project_path: str, timeout_s: int = 90):
+    def __init__(self, project_path: str, timeout_s: int = 90, history=None, limits=None, stub_mode=None,
+                 fail_fast=None, order=None):
         self.project_path = os.path.abspath(project_path)
         self.timeout_s = timeout_s
+        self.history = history or get_run_history()
+        self.limits = limits or SandboxLimits.from_env()
+        self.stub_mode = stub_mode or os.getenv("TEST_STUB_IMPORTS", DEFAULT_STUB_MODE)
+        self.fail_fast = fail_fast if fail_fast is not None else os.getenv("TEST_FAIL_FAST", "0") == "1"
+        self.order = order or os.getenv("TEST_ORDER", "discovery")
+
+    def classify_project_imports(self):
+        """Imports of every project file grouped into local, stdlib and third-party."""
+        local_modules = set()
+        imports = []
+        for entry in get_manifest(self.project_path).python_files():
+            parts = entry["rel_path"].replace(os.sep, "/").split("/")
+            local_modules.add(os.path.splitext(parts[0])[0])
+            local_modules.add(os.path.splitext(entry["name"])[0])
+            imports.extend(extract_imports_from_file(os.path.join(self.project_path, entry["rel_path"])))
+        return classify_imports(imports, local_modules)
+
+    def _changed_test_modules(self, since):
+        """Test modules edited since `since`, or importing a source file edited since then."""
+        manifest = get_manifest(self.project_path, refresh=True)
+        # Top-level import names that reach a changed source file: its module
+        # name, and its top-level package under each import root
+        touched = set()
+        roots = import_roots(self.project_path)
+        for entry in manifest.files(kinds="python"):
+            if entry["mtime"] <= since:
+                continue
+            touched.add(os.path.splitext(entry["name"])[0])
+            for prefix in roots:
+                if prefix and not entry["rel_path"].startswith(prefix + os.sep):
+                    continue
+                parts = entry["rel_path"][len(prefix) + 1 if prefix else 0:].split(os.sep)
+                if len(parts) > 1:
+                    touched.add(parts[0])
+
+        changed = []
+        for entry in manifest.files(kinds="test"):
+            if entry["mtime"] > since or (
+                touched and touched & set(extract_imports_from_file(os.path.join(self.project_path, entry["rel_path"])))
+            ):
+                changed.append(os.path.splitext(entry["rel_path"])[0].replace(os.sep, "."))
+        return changed
+
+    def test_priorities(self):
+        """Failure scores from the run history plus test modules affected by edits since the last run."""
+        project = project_key(self.project_path)
+        last_runs = self.history.runs(project, limit=1)
+        changed = self._changed_test_modules(last_runs[0]["started_at"]) if last_runs else []
+        return {"tests": self.history.failure_scores(project), "changed_modules": changed}
+
+    def _order_args(self, report_dir):
+        args = ["--failfast"] if self.fail_fast else []
+        if self.order != "history":
+            return args
+        try:
+            priorities = self.test_priorities()
+        except Exception as e:
+            print(f" Could not compute test order from history: {e}")
+            return args
+        priorities_path = os.path.join(report_dir, "test_priorities.json")
+        with open(priorities_path, "w", encoding="utf-8") as f:
+            json.dump(priorities, f)
+        return args + ["--priorities", priorities_path]
+
+    def _stub_args(self):
+        if self.stub_mode == "off":
+            return []
+        third_party = self.classify_project_imports()["third_party"]
+        if third_party:
+            print(f" Third-party imports ({self.stub_mode} stubbed): {', '.join(third_party)}")
+        args = ["--stub-mode", self.stub_mode]
+        for name in third_party:
+            args += ["--stub", name]
+        return args
+
+    def _record_history(self, status, started_at, elapsed, results_path, exit_code=None):
+        """Append the run to the history; returns the run id (None if recording failed)."""
+        try:
+            return self.history.record_run(
+                project=project_key(self.project_path),
+                code_hash=code_fingerprint(self.project_path),
+                status=status,
+                duration_s=round(elapsed, 4),
+                tests=read_results(results_path),
+                exit_code=exit_code,
+                # The next run compares edits against when this one started
+                started_at=started_at,
+            )
+        except Exception as e:
+            print(f" Could not record run history: {e}")
+            return None
 
     def _tests_exist(self) -> bool:
         """Check if generated test files exist in project."""
-        test_dirs = [
-            self.project_path,
-            os.path.join(self.project_path, "generated_tests"),
-            os.path.join(self.project_path, "tests"),
-        ]
-        for tdir in test_dirs:
-            if os.path.isdir(tdir):
-                for file in os.listdir(tdir):
-                    if file.startswith("test_") and file.endswith(".py"):
-                        return True
-            else:
-                print(f" Test directory not found: {tdir}")
+        manifest = get_manifest(self.project_path)
+        for tdir in ["", "generated_tests", "tests"]:
+            if manifest.in_dir(tdir, kinds="test"):
+                return True
         return False
 
     def execute_tests(self):
@@ -49,20 +150,16 @@ class TestExecutorAgent:
         report_dir = os.path.join(self.project_path, "report")
         os.makedirs(report_dir, exist_ok=True)
         log_path = os.path.join(report_dir, "unittest_output.log")
+        results_path = os.path.join(report_dir, "test_results.jsonl")
 
-        # Run unittest discover for all generated tests
-        cmd = "python -m unittest discover -s . -p 'test_*.py'"
-        print(f" Running command: {cmd}")
+        # Run unittest discover for all generated tests, recording per-test timings
+        cmd = [sys.executable, RUNNER_PATH, "--results", results_path, "-s", ".", "-p", "test_*.py"]
+        cmd += self._stub_args() + self._order_args(report_dir)
+        print(f" Running command: {shlex.join(cmd)}")
 
         start_time = time.time()
         try:
-            result = subprocess.run(
-                shlex.split(cmd),
-                cwd=self.project_path,
-                timeout=self.timeout_s,
-                capture_output=True,
-                text=True,
-            )
+            result = run_sandboxed(cmd, self.project_path, self.limits, timeout_s=self.timeout_s)
 
             # Save logs
             with open(log_path, "w", encoding="utf-8") as f:
@@ -84,7 +181,11 @@ class TestExecutorAgent:
                 "exit_code": exit_code,
                 "time_taken": round(elapsed, 2),
                 "log_report": log_path,
+                "results_file": results_path,
             }
+            result_data["run_id"] = self._record_history(
+                result_data["status"], start_time, elapsed, results_path, exit_code
+            )
 
             print(f"\n [AI Agent Summary]")
             print(f"   Status: {result_data['status']}")
@@ -96,7 +197,8 @@ class TestExecutorAgent:
 
         except subprocess.TimeoutExpired:
             print(f" Test execution timed out after {self.timeout_s}s.")
-            return {"status": "timeout", "message": "Execution timed out"}
+            run_id = self._record_history("timeout", start_time, time.time() - start_time, results_path)
+            return {"status": "timeout", "message": "Execution timed out", "run_id": run_id}
         except Exception as e:
             print(f" Error running tests: {e}")
             return {"status": "error", "message": str(e)}
@@ -105,4 +207,4 @@ class TestExecutorAgent:
 if __name__ == "__main__":
     agent = TestExecutorAgent(PROJECT_PATH, timeout_s=TIMEOUT_S)
     summary = agent.execute_tests()
-    print("\nFinal Summary:", summary)
\ No newline at end of file
+    print("\nFinal Summary:", summary)
\ No newline at end of file
@@ -1,18 +1,24 @@
 import streamlit as st
 import os
-import sys
 from pathlib import Path
 from fpdf import FPDF
 import shutil
 import time
+import uuid
 
 # Import your modules
-from project_analyzer import find_python_entry_files, extract_zip, generate_ast_tree
-from code_analyzer import CodeAnalyzer
-from context_enricher import gather_enriched_context, generate_tests_with_llm, save_generated_tests
-from Test_executor_agent import TestExecutorAgent
-from reporting_agent import ReportingAgent
-from context_enricher import gather_all_project_context
+from project_analyzer import generate_ast_outline, expand_ast_node, AST_PAGE_SIZE
+from context_enricher import gather_all_project_context, generate_tests_with_llm_stream
+from preflight_checker import format_diagnostics, generate_with_preflight
+from baseline_test_generator import llm_focus_note
+from pipeline_metrics import PipelineTracer, activate_tracer, span
+from llm_scheduler import get_llm_scheduler, request_context, set_request_context
+from llm_usage import activate_ledger, ledger_from_env
+from pipeline_stages import get_scheduler
+from prefetch import Prefetcher
+from run_history import get_run_history, project_key
+from workspace import DEFAULT_WORKSPACE_ROOT, create_workspace
+from workspace_gc import get_workspace_gc
 
 # ---------------------------
 # Page Configuration
@@ -258,13 +264,24 @@ st.markdown("""
 # ---------------------------
 # Constants
 # ---------------------------
-UPLOAD_DIR = "uploaded_projects"
+UPLOAD_DIR = os.getenv("WORKSPACE_ROOT", DEFAULT_WORKSPACE_ROOT)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+scheduler = get_scheduler()
+workspace_gc = get_workspace_gc()
+
+
+def run_pipeline(inputs, targets):
+    """scheduler.run holding a lease, so the workspace GC cannot evict the project mid-run."""
+    workspace = st.session_state.workspace
+    if workspace is None:
+        return scheduler.run(inputs, targets=targets)
+    with workspace.lease():
+        return scheduler.run(inputs, targets=targets)
 
 # ---------------------------
 # Session State Initialization
 # ---------------------------
-for key in ["folder", "context", "test_path", "target_file", "test_results", "report_path", "ast_generated", "tests_generated", "ast_content"]:
+for key in ["folder", "context", "test_path", "target_file", "test_results", "report_path", "ast_generated", "tests_generated", "ast_outline", "workspace", "upload_id", "prefetch"]:
     if key not in st.session_state:
         st.session_state[key] = None
 
@@ -273,6 +290,21 @@ if "ast_generated" not in st.session_state:
     st.session_state.ast_generated = False
 if "tests_generated" not in st.session_state:
     st.session_state.tests_generated = False
+if "ast_expanded" not in st.session_state:
+    st.session_state.ast_expanded = {}
+if "tracer" not in st.session_state:
+    st.session_state.tracer = PipelineTracer()
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:8]
+# LLM usage adds up per project run and per browser session, each with its own budget
+if "llm_session_ledger" not in st.session_state:
+    st.session_state.llm_session_ledger = ledger_from_env("session", scope="SESSION")
+if "llm_ledger" not in st.session_state:
+    st.session_state.llm_ledger = ledger_from_env("run", parent=st.session_state.llm_session_ledger)
+activate_tracer(st.session_state.tracer)
+activate_ledger(st.session_state.llm_ledger)
+# LLM calls from this session queue fairly against every other session
+set_request_context(st.session_state.session_id, "interactive")
 
 # ---------------------------
 # Progress Steps Indicator
@@ -396,47 +428,75 @@ with st.container():
     
     if uploaded_zip:
         project_name = uploaded_zip.name.replace(".zip", "")
-        project_path = os.path.join(UPLOAD_DIR, project_name)
-
-        if not os.path.exists(project_path):
+        upload_id = getattr(uploaded_zip, "file_id", None) or f"{uploaded_zip.name}:{uploaded_zip.size}"
+
+        # Every new upload gets its own workspace; reruns of the same upload reuse it
+        # (or when the garbage collector evicted it while the session was idle)
+        if (st.session_state.upload_id != upload_id or st.session_state.workspace is None
+                or not os.path.isdir(st.session_state.workspace.project_dir)):
+            # Work speculated for the previous upload is no longer wanted
+            if st.session_state.prefetch is not None:
+                st.session_state.prefetch.cancel()
+                st.session_state.prefetch = None
+            workspace = create_workspace(project_name, session_id=st.session_state.session_id, base_dir=UPLOAD_DIR)
             with st.spinner(" Extracting project files..."):
                 progress_bar = st.progress(0)
                 
-                zip_path = os.path.join(UPLOAD_DIR, uploaded_zip.name)
-                with open(zip_path, "wb") as f:
-                    f.write(uploaded_zip.getbuffer())
+                zip_path = workspace.save_upload(uploaded_zip.getbuffer())
                 progress_bar.progress(30)
                 
-                extract_zip(zip_path, extract_to=project_path)
+                with workspace.lease():
+                    scheduler.run({"zip_path": zip_path, "extract_dir": workspace.project_dir}, targets=["folder"])
                 progress_bar.progress(70)
                 
-                os.remove(zip_path)
+                workspace.remove_upload()
                 progress_bar.progress(100)
                 time.sleep(0.3)
                 progress_bar.empty()
-
+            st.session_state.workspace = workspace
+            st.session_state.upload_id = upload_id
+            # Results of an earlier run point into the old (possibly evicted) workspace
+            for key in ["context", "test_path", "test_results", "report_path", "ast_outline"]:
+                st.session_state[key] = None
+            st.session_state.ast_generated = False
+            st.session_state.tests_generated = False
+            st.session_state.llm_ledger = ledger_from_env("run", parent=st.session_state.llm_session_ledger)
+            activate_ledger(st.session_state.llm_ledger)
+
+        workspace = st.session_state.workspace
+        workspace.touch()
+        project_path = workspace.project_dir
         st.session_state.folder = project_path
+        st.session_state.tracer.jsonl_path = workspace.trace_path
         st.success(f" Project successfully extracted to: `{project_path}`")
 
-        # Ensure package structure
-        for sub in ["", "src", "generated_tests"]:
-            init_path = os.path.join(project_path, sub, "__init__.py")
-            os.makedirs(os.path.dirname(init_path), exist_ok=True)
-            if not os.path.exists(init_path):
-                open(init_path, "w").close()
-
         # Detect entry files
         with st.spinner("🔍 Scanning for Python files..."):
-            entry_files = find_python_entry_files(project_path)
+            values = run_pipeline({"folder": project_path}, targets=["entry_candidates"])
+            entry_candidates = values["entry_candidates"]
+            entry_files = [c["path"] for c in entry_candidates]
+
+        # Analyse the likely targets in the background while the user chooses one
+        prefetch = st.session_state.prefetch
+        if prefetch is None or prefetch.folder != project_path:
+            if prefetch is not None:
+                prefetch.cancel()
+            prefetch = st.session_state.prefetch = Prefetcher(scheduler, project_path, entry_candidates).start()
+        prefetch_progress = prefetch.progress()
+        st.caption(
+            f"Background analysis: {prefetch_progress['ready']} of {prefetch_progress['total']} "
+            f"files ready ({prefetch_progress['status']})"
+        )
         
         st.markdown("### Detected Python Files")
         
         cols = st.columns(3)
-        for idx, file in enumerate(entry_files):
+        for idx, candidate in enumerate(entry_candidates[:12]):
             with cols[idx % 3]:
                 st.markdown(f"""
                 <div style="background: rgba(30, 41, 59, 0.4); padding: 0.75rem; border-radius: 8px; margin: 0.25rem 0; border-left: 3px solid #6366f1;">
-                     {os.path.basename(file)}
+                     {os.path.basename(candidate["path"])}<br>
+                     <small style="color: #94a3b8;">Score {candidate["score"]}: {", ".join(candidate["reasons"])}</small>
                 </div>
                 """, unsafe_allow_html=True)
 
@@ -462,8 +522,16 @@ with st.container():
                             time.sleep(0.01)
                             progress_bar.progress(i + 1)
                         
-                        ast_content = generate_ast_tree(target_file)
-                        st.session_state.ast_content = ast_content
+                        # AST, analysis and context run concurrently and are cached
+                        values = run_pipeline(
+                            {"folder": project_path, "target_file": target_file},
+                            targets=["ast", "ranking", "context"],
+                        )
+                        ast_outline = values["ast_outline"]
+                        if ast_outline.get("error"):
+                            raise ValueError(ast_outline["error"])
+                        st.session_state.ast_outline = ast_outline
+                        st.session_state.ast_expanded = {}
                         st.session_state.ast_generated = True
                         progress_bar.empty()
                         
@@ -474,9 +542,27 @@ with st.container():
                         st.error(f" Error generating AST: {str(e)}")
 
             # Display AST if already generated (persistent state)
-            if st.session_state.ast_generated and st.session_state.ast_content:
+            if st.session_state.ast_generated and st.session_state.ast_outline:
                 with st.expander("📜 View Abstract Syntax Tree (AST)", expanded=False):
-                    st.code(st.session_state.ast_content, language="python")
+                    outline = st.session_state.ast_outline
+                    total_pages = max(1, -(-outline["total"] // AST_PAGE_SIZE))
+                    page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1)
+                    offset = (page - 1) * AST_PAGE_SIZE
+                    if offset != outline["offset"]:
+                        outline = generate_ast_outline(target_file, offset=offset)
+                        st.session_state.ast_outline = outline
+                    st.caption(f"{outline['total']} top-level nodes · page {page} of {total_pages}")
+
+                    for node in outline["nodes"]:
+                        title = f"{node['type']} {node['label']} (line {node['lineno']})"
+                        st.markdown(f"**{title}**")
+                        shown = st.session_state.ast_expanded.get(node["path"], node)
+                        st.json(shown, expanded=False)
+                        if node["child_count"] and st.button("Expand subtree", key=f"ast_{node['path']}"):
+                            st.session_state.ast_expanded[node["path"]] = expand_ast_node(
+                                target_file, node["path"], max_depth=3
+                            )
+                            st.rerun()
 
             # Code Analysis
             if st.session_state.ast_generated:
@@ -484,13 +570,11 @@ with st.container():
                 st.markdown('<h2 class="section-header">🔍 Step 2: Code Analysis</h2>', unsafe_allow_html=True)
                 
                 with st.spinner(" Analyzing code complexity..."):
-                    analyzer = CodeAnalyzer(target_file)
-                    functions = analyzer.extract_functions()
-
-                    for fn in functions:
-                        fn["priority"] = analyzer.calculate_priority(fn)
-
-                    ranked = sorted(functions, key=lambda x: x["priority"], reverse=True)
+                    values = run_pipeline(
+                        {"folder": project_path, "target_file": target_file},
+                        targets=["ranking", "context"],
+                    )
+                    ranked = values["ranked_functions"]
                 
                 # Display metrics
                 col1, col2, col3 = st.columns(3)
@@ -543,7 +627,7 @@ with st.container():
                     """, unsafe_allow_html=True)
 
                 # Context Enrichment
-                st.session_state.context = gather_enriched_context(target_file, project_path)
+                st.session_state.context = values["context"]
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -564,35 +648,60 @@ if st.session_state.context:
     """, unsafe_allow_html=True)
     
     if st.button(" Generate Tests with AI", use_container_width=True, type="primary"):
+        st.markdown("### Generated Test Code")
+        queue_note = st.empty()
+        code_view = st.empty()
+
         with st.spinner("AI is analyzing your code and generating tests..."):
-            progress_bar = st.progress(0)
-            
-            # Simulate progressive AI work
-            for i in range(0, 30):
-                time.sleep(0.02)
-                progress_bar.progress(i)
-            
-            test_code = generate_tests_with_llm(st.session_state.context)
-            
-            for i in range(30, 100):
-                time.sleep(0.01)
-                progress_bar.progress(i)
-            
-            progress_bar.empty()
-            
-            st.markdown("### Generated Test Code")
-            st.code(test_code, language="python", line_numbers=True)
+            # Show code as it streams in instead of waiting for the full answer
+            ranked = run_pipeline(
+                {"folder": st.session_state.folder, "target_file": st.session_state.target_file},
+                targets=["ranked_functions"],
+            )["ranked_functions"]
+
+            # Invalid output is checked in-process and regenerated with the diagnostics
+            def show_queue_position(position, waiting):
+                queue_note.info(f"Waiting for LLM capacity: position {position} of {waiting} in the queue")
+
+            with span("generate", streamed=True), request_context(
+                st.session_state.session_id, "interactive", on_position=show_queue_position
+            ):
+                test_code, preflight = generate_with_preflight(
+                    st.session_state.context + llm_focus_note(ranked),
+                    st.session_state.target_file,
+                    st.session_state.folder,
+                    generate=lambda ctx: generate_tests_with_llm_stream(
+                        ctx,
+                        on_update=lambda partial: code_view.code(partial, language="python", line_numbers=True),
+                    ),
+                )
+
+            queue_note.empty()
 
-            test_path = save_generated_tests(
-                save_dir=os.path.join(st.session_state.folder, "generated_tests"),
-                target_file=st.session_state.target_file,
-                test_code=test_code,
+            values = run_pipeline(
+                {
+                    "folder": st.session_state.folder,
+                    "target_file": st.session_state.target_file,
+                    "test_code": test_code,
+                    "preflight": preflight,
+                },
+                targets=["save"],
             )
-            st.session_state.test_path = test_path
-            st.session_state.tests_generated = True
-            
-            st.success(f" Tests successfully saved at: `{test_path}`")
-            st.balloons()
+
+            test_path = values["test_path"]
+            if not preflight["ok"]:
+                st.warning(f" AI tests not saved after {preflight['attempts']} attempt(s):")
+                st.code(format_diagnostics(preflight["diagnostics"]), language="text")
+            if test_path == values["baseline_path"]:
+                st.session_state.test_path = test_path
+                st.session_state.tests_generated = True
+                st.info(f" Baseline tests (generated without AI) saved at: `{test_path}`")
+            else:
+                st.session_state.test_path = test_path
+                st.session_state.tests_generated = True
+                
+                st.success(f" Tests successfully saved at: `{test_path}` (pre-flight passed on attempt {preflight['attempts']})")
+                st.balloons()
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -611,9 +720,8 @@ if st.session_state.test_path:
         progress_bar = st.progress(0)
         status_text = st.empty()
 
+        # Tests run in a sandboxed subprocess; sys.path is left alone so sessions stay isolated
         project_path = os.path.abspath(st.session_state.folder)
-        if project_path not in sys.path:
-            sys.path.insert(0, project_path)
 
         # Animated progress
         for i in range(0, 50):
@@ -621,8 +729,11 @@ if st.session_state.test_path:
             progress_bar.progress(i)
             status_text.text(f" Initializing test environment... {i*2}%")
         
-        executor = TestExecutorAgent(project_path=project_path)
-        results = executor.execute_tests()
+        values = run_pipeline(
+            {"folder": project_path, "test_path": st.session_state.test_path},
+            targets=["execute"],
+        )
+        results = values["test_results"]
         st.session_state.test_results = results
         
         for i in range(50, 100):
@@ -643,6 +754,20 @@ if st.session_state.test_path:
         st.markdown("</div>", unsafe_allow_html=True)
         
         st.success(" Test execution completed!")
+
+        # Per-test durations and outcomes from previous runs of this project
+        history = get_run_history()
+        project = project_key(project_path)
+        with st.expander("📈 Run History", expanded=False):
+            trend = history.duration_trend(project)
+            if trend:
+                st.line_chart([r["duration_s"] for r in trend])
+            st.markdown("**Slowest tests**")
+            st.table(history.slowest_tests(project))
+            flaky = history.flaky_tests(project)
+            if flaky:
+                st.warning(f"{len(flaky)} flaky test(s): outcome changed without a code change")
+                st.table(flaky)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -663,24 +788,26 @@ if st.session_state.test_results:
             with st.spinner("Generating comprehensive AI report..."):
                 progress_bar = st.progress(0)
                 
-                # Initialize ReportingAgent
                 for i in range(0, 25):
                     time.sleep(0.02)
                     progress_bar.progress(i)
                 
-                reporter = ReportingAgent(log_path)
-                reporter.parse_unittest_log()
+                # Parse log and generate Markdown/PDF reports
+                values = run_pipeline(
+                    {
+                        "folder": st.session_state.folder,
+                        "test_results": st.session_state.test_results,
+                        "ai_analysis_enabled": False,
+                    },
+                    targets=["report", "export"],
+                )
+                pdf_output_path = values["report_paths"]["pdf"]
+                export_paths = values["export_paths"] or {}
                 
                 for i in range(25, 75):
                     time.sleep(0.02)
                     progress_bar.progress(i)
 
-                # Generate PDF report
-                pdf_output_path = os.path.join(
-                    st.session_state.folder,
-                    "ai_test_report.pdf"
-                )
-                reporter.generate_pdf_report(pdf_output_path)
                 st.session_state.report_path = pdf_output_path
                 
                 for i in range(75, 100):
@@ -712,10 +839,67 @@ if st.session_state.test_results:
                             mime="application/pdf",
                             use_container_width=True
                         )
+                    for kind, file_name, mime in [
+                        ("junit", "junit.xml", "application/xml"),
+                        ("json", "test_results.json", "application/json"),
+                    ]:
+                        if export_paths.get(kind):
+                            with open(export_paths[kind], "rb") as f_export:
+                                st.download_button(
+                                    label=f"Download {file_name}",
+                                    data=f_export,
+                                    file_name=file_name,
+                                    mime=mime,
+                                    use_container_width=True,
+                                )
     
     st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+# ---------------------------
+# Sidebar - Pipeline Metrics
+# ---------------------------
+with st.sidebar:
+    if st.checkbox("Show pipeline metrics", value=False):
+        stage_metrics = st.session_state.tracer.summary()
+        if stage_metrics:
+            st.dataframe(
+                [
+                    {
+                        "stage": name,
+                        "runs": m["count"],
+                        "wall (s)": round(m["wall_s"], 3),
+                        "cpu (s)": round(m["cpu_s"], 3),
+                        "peak (KiB)": round(m["peak_mem_bytes"] / 1024),
+                        "read (B)": m["bytes_read"],
+                        "tokens": m["prompt_tokens"] + m["completion_tokens"],
+                        "cost ($)": round(m["cost_usd"], 4),
+                    }
+                    for name, m in stage_metrics.items()
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.caption("No stages recorded yet.")
+
+        for ledger in (st.session_state.llm_ledger, st.session_state.llm_session_ledger):
+            st.markdown(f"**LLM usage ({ledger.name})**")
+            st.caption("  \n".join(ledger.summary_lines()))
+
+        llm_queue = get_llm_scheduler().stats()
+        st.caption(
+            f"LLM queue: {llm_queue['waiting']} waiting · {llm_queue['in_flight']} in flight · "
+            f"mean wait {llm_queue['mean_wait_s']}s · limits {llm_queue['rpm']} req/min, {llm_queue['tpm']} tok/min"
+        )
+
+        gc_usage = workspace_gc.usage()
+        st.caption(
+            f"Workspaces: {gc_usage['workspaces']} · "
+            f"{gc_usage['usage_bytes'] / 1024 / 1024:.1f} of {gc_usage['budget_bytes'] / 1024 / 1024:.0f} MB · "
+            f"{gc_usage['evictions']} evicted ({gc_usage['evicted_bytes'] / 1024 / 1024:.1f} MB)"
+        )
+
 # ---------------------------
 # Footer
 # ---------------------------
@@ -726,4 +910,4 @@ st.markdown("""
         Made with ❤️ using Streamlit | Powered by AI | © 2024
     </p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+Call Graph — project-wide index of which functions call which.
+
+Calls are resolved to definitions through each module's imports
+(`import a.b as c`, `from a import f`, relative imports) and `self.`
+method calls. The graph is stored CSR-style: out-edges as
+(out_indptr, out_indices) and in-edges as (in_indptr, in_indices)
+NumPy arrays, so fan-in/fan-out are array differences and reachability
+is a breadth-first walk over contiguous slices.
+
+Each module also gets a "<module>" node for its top-level code, which
+is where entry-point reachability starts. Modules are named from the
+project root; imports written relative to another import root (src/, or
+a single top-level folder) are mapped back to those names.
+"""
+
+import ast
+import os
+from collections import deque
+
+import numpy as np
+
+from parse_cache import parse_file
+from project_manifest import get_manifest, import_roots
+
+MODULE_NODE = "<module>"
+
+
+def module_name_for(rel_path):
+    """Dotted module name of a project-relative .py path."""
+    parts = os.path.splitext(rel_path)[0].split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _resolve_relative(module, level, target, is_package):
+    package = module.split(".") if is_package else module.split(".")[:-1]
+    if level > 1:
+        package = package[: len(package) - (level - 1)]
+    return ".".join(p for p in package + ([target] if target else []) if p)
+
+
+class _ModuleIndexer(ast.NodeVisitor):
+    """Collects definitions, import aliases and raw call references of one module."""
+
+    def __init__(self, module, is_package):
+        self.module = module
+        self.is_package = is_package
+        self.aliases = {}
+        self.definitions = [f"{module}.{MODULE_NODE}"]
+        self.calls = []  # (caller, kind, payload)
+        self._scope = [f"{module}.{MODULE_NODE}"]
+        self._class = []
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name
+            else:
+                top = alias.name.split(".")[0]
+                self.aliases[top] = top
+
+    def visit_ImportFrom(self, node):
+        base = node.module or ""
+        if node.level:
+            base = _resolve_relative(self.module, node.level, node.module, self.is_package)
+        for alias in node.names:
+            if alias.name != "*":
+                self.aliases[alias.asname or alias.name] = f"{base}.{alias.name}" if base else alias.name
+
+    def visit_ClassDef(self, node):
+        self._class.append(node.name)
+        for item in node.body:
+            self.visit(item)
+        self._class.pop()
+
+    def _visit_function(self, node):
+        if self._class and len(self._scope) == 1:
+            qualified = f"{self.module}.{self._class[-1]}.{node.name}"
+        elif len(self._scope) == 1:
+            qualified = f"{self.module}.{node.name}"
+        else:
+            # Nested functions are folded into their enclosing function
+            self.generic_visit(node)
+            return
+        self.definitions.append(qualified)
+        self._scope.append(qualified)
+        self.generic_visit(node)
+        self._scope.pop()
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_Call(self, node):
+        caller = self._scope[-1]
+        func = node.func
+        if isinstance(func, ast.Name):
+            self.calls.append((caller, "name", func.id))
+        elif isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+            if func.value.id in ("self", "cls") and self._class:
+                self.calls.append((caller, "qualified", f"{self.module}.{self._class[-1]}.{func.attr}"))
+            else:
+                self.calls.append((caller, "attr", (func.value.id, func.attr)))
+        self.generic_visit(node)
+
+
+class CallGraph:
+    def __init__(self, names, edges):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+        edges = np.array(sorted(set(edges)), dtype=np.int64).reshape(-1, 2)
+        self.out_indptr, self.out_indices = self._csr(edges[:, 0], edges[:, 1], n)
+        self.in_indptr, self.in_indices = self._csr(edges[:, 1], edges[:, 0], n)
+
+    @staticmethod
+    def _csr(rows, cols, n):
+        order = np.lexsort((cols, rows))
+        indices = cols[order].astype(np.int32)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return indptr, indices
+
+    @property
+    def edge_count(self):
+        return len(self.out_indices)
+
+    def fan_in_array(self):
+        return np.diff(self.in_indptr)
+
+    def fan_out_array(self):
+        return np.diff(self.out_indptr)
+
+    def fan_in(self, name):
+        i = self.index.get(name)
+        return 0 if i is None else int(self.in_indptr[i + 1] - self.in_indptr[i])
+
+    def fan_out(self, name):
+        i = self.index.get(name)
+        return 0 if i is None else int(self.out_indptr[i + 1] - self.out_indptr[i])
+
+    def callers(self, name):
+        i = self.index[name]
+        return [self.names[j] for j in self.in_indices[self.in_indptr[i]:self.in_indptr[i + 1]]]
+
+    def callees(self, name):
+        i = self.index[name]
+        return [self.names[j] for j in self.out_indices[self.out_indptr[i]:self.out_indptr[i + 1]]]
+
+    def reachable_mask(self, entry_names):
+        """Boolean array marking every node reachable from the given entries."""
+        seen = np.zeros(len(self.names), dtype=bool)
+        queue = deque(self.index[n] for n in entry_names if n in self.index)
+        for i in queue:
+            seen[i] = True
+        while queue:
+            i = queue.popleft()
+            for j in self.out_indices[self.out_indptr[i]:self.out_indptr[i + 1]]:
+                if not seen[j]:
+                    seen[j] = True
+                    queue.append(j)
+        return seen
+
+    def reachable_from(self, entry_names):
+        mask = self.reachable_mask(entry_names)
+        return [self.names[i] for i in np.flatnonzero(mask)]
+
+
+def build_call_graph(project_root):
+    """Parses every Python module of the project and links calls to definitions."""
+    indexers = {}
+    # Import-root-relative module name -> name from the project root
+    module_aliases = {}
+    roots = [r for r in import_roots(project_root) if r]
+    for entry in get_manifest(project_root).python_files():
+        module = module_name_for(entry["rel_path"])
+        if not module:
+            continue
+        for root in roots:
+            if entry["rel_path"].startswith(root + os.sep):
+                alias = module_name_for(os.path.relpath(entry["rel_path"], root))
+                if alias:
+                    module_aliases.setdefault(alias, module)
+        try:
+            tree = parse_file(os.path.join(project_root, entry["rel_path"]))
+        except (SyntaxError, UnicodeDecodeError, OSError):
+            continue
+        indexer = _ModuleIndexer(module, entry["name"] == "__init__.py")
+        indexer.visit(tree)
+        indexers[module] = indexer
+
+    names = [d for indexer in indexers.values() for d in indexer.definitions]
+    known = set(names)
+    index = {name: i for i, name in enumerate(names)}
+
+    def canonical(target):
+        parts = target.split(".")
+        for i in range(len(parts) - 1, 0, -1):
+            module = module_aliases.get(".".join(parts[:i]))
+            if module is not None:
+                return ".".join([module] + parts[i:])
+        return target
+
+    def resolve(target):
+        for name in (target, canonical(target)):
+            if name in known:
+                return name
+            # "pkg.mod.func" imported as a module attribute, or a class constructor
+            if f"{name}.__init__" in known:
+                return f"{name}.__init__"
+        return None
+
+    edges = []
+    for module, indexer in indexers.items():
+        for caller, kind, payload in indexer.calls:
+            if kind == "qualified":
+                target = resolve(payload)
+            elif kind == "name":
+                target = resolve(f"{module}.{payload}")
+                if target is None and payload in indexer.aliases:
+                    target = resolve(indexer.aliases[payload])
+            else:
+                base, attr = payload
+                target = resolve(f"{indexer.aliases[base]}.{attr}") if base in indexer.aliases else None
+            if target is not None:
+                edges.append((index[caller], index[target]))
+
+    return CallGraph(names, edges)
+
+
+def qualified_name(project_root, fn):
+    """Call-graph name of a CodeAnalyzer record carrying a "file" key."""
+    rel_path = os.path.relpath(os.path.abspath(fn["file"]), os.path.abspath(project_root))
+    module = module_name_for(rel_path)
+    if fn.get("class_name"):
+        return f"{module}.{fn['class_name']}.{fn['name']}"
+    return f"{module}.{fn['name']}"
+
+
+def entry_module_nodes(project_root, entry_files):
+    return [
+        f"{module_name_for(os.path.relpath(os.path.abspath(p), os.path.abspath(project_root)))}.{MODULE_NODE}"
+        for p in entry_files
+    ]
@@ -1,31 +1,195 @@
 import ast
 import os
+import sys
+
+from parse_cache import get_source, parse_file
+
+
+# ------------------ Function Records ------------------
+class FunctionRecord:
+    """
+    Compact metadata for one function. Supports the dict-style access the
+    pipeline uses (fn["name"], fn.get(...), fn["priority"] = ...) but keeps
+    no reference to the AST: `node` is re-parsed from the parse cache on
+    demand, so the tree can be freed while records live in session state.
+    """
+
+    __slots__ = (
+        'name', 'args', 'is_async', 'decorators', 'complexity', 'calls',
+        'line', 'end_line', 'class_name', 'defaults', 'annotations', 'returns',
+        'raises', 'guards', 'loc', 'nesting', 'file', 'priority',
+    )
+
+    def __init__(self, **fields):
+        for key in self.__slots__:
+            setattr(self, key, fields.pop(key, None))
+        if fields:
+            raise TypeError(f"Unknown function record fields: {sorted(fields)}")
+
+    @property
+    def node(self):
+        """The FunctionDef node, located by name and line in the cached tree."""
+        for n in ast.walk(parse_file(self.file)):
+            if isinstance(n, ast.FunctionDef) and n.lineno == self.line and n.name == self.name:
+                return n
+        return None
+
+    def __getitem__(self, key):
+        if key not in self.__slots__ and key != 'node':
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def __repr__(self):
+        return f"FunctionRecord({self.name!r}, file={self.file!r}, line={self.line})"
+
 
 # ------------------ PHASE 1: Deep Code Analysis ------------------
 class CodeAnalyzer:
     def __init__(self, file_path):
         self.file_path = file_path
-        with open(file_path, 'r') as f:
-            self.code = f.read()
-        self.tree = ast.parse(self.code)  
-    
+        # Shared with the other analyzers; records only keep line spans
+        self.code = get_source(file_path)
+        self.tree = parse_file(file_path)
+
     def extract_functions(self):
         """Extract all functions with complexity, params, decorators"""
         functions = []
+        owners = self._method_owners()
         for node in ast.walk(self.tree):
             if isinstance(node, ast.FunctionDef):
-                functions.append({
-                    'name': node.name,
-                    "node": node,
-                    'args': [arg.arg for arg in node.args.args],
-                    'is_async': isinstance(node, ast.AsyncFunctionDef),
-                    'decorators': [d.id if isinstance(d, ast.Name) else "" for d in node.decorator_list],
-                    'complexity': self._count_branches(node),
-                    'calls': self._extract_calls(node),
-                    'line': node.lineno
-                })
+                functions.append(FunctionRecord(
+                    name=sys.intern(node.name),
+                    args=tuple(sys.intern(arg.arg) for arg in node.args.args),
+                    is_async=isinstance(node, ast.AsyncFunctionDef),
+                    decorators=tuple(d.id if isinstance(d, ast.Name) else "" for d in node.decorator_list),
+                    complexity=self._count_branches(node),
+                    calls=tuple(sys.intern(c) for c in self._extract_calls(node)),
+                    line=node.lineno,
+                    end_line=node.end_lineno,
+                    class_name=owners.get(node),
+                    defaults=self._extract_defaults(node),
+                    annotations=self._extract_annotations(node),
+                    returns=ast.unparse(node.returns) if node.returns else None,
+                    raises=tuple(self._extract_raises(node)),
+                    guards=tuple(self._extract_guards(node)),
+                    loc=node.end_lineno - node.lineno + 1,
+                    nesting=self._nesting_depth(node),
+                    file=self.file_path,
+                ))
         return functions
 
+    def _nesting_depth(self, node, depth=0):
+        """Deepest nesting of control-flow blocks inside the function."""
+        deepest = depth
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            if isinstance(child, (ast.If, ast.For, ast.While, ast.Try, ast.With)):
+                deepest = max(deepest, self._nesting_depth(child, depth + 1))
+            else:
+                deepest = max(deepest, self._nesting_depth(child, depth))
+        return deepest
+
+    def _method_owners(self):
+        """Map each method node to the name of the class defining it."""
+        owners = {}
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.ClassDef):
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        owners[item] = node.name
+        return owners
+
+    def _extract_defaults(self, node):
+        """Source text of default values keyed by argument name."""
+        positional = node.args.args
+        defaults = dict(zip(
+            [a.arg for a in positional[len(positional) - len(node.args.defaults):]],
+            [ast.unparse(d) for d in node.args.defaults],
+        ))
+        for arg, default in zip(node.args.kwonlyargs, node.args.kw_defaults):
+            if default is not None:
+                defaults[arg.arg] = ast.unparse(default)
+        return defaults
+
+    def _extract_annotations(self, node):
+        return {
+            arg.arg: ast.unparse(arg.annotation)
+            for arg in node.args.args + node.args.kwonlyargs
+            if arg.annotation is not None
+        }
+
+    def _exception_name(self, exc):
+        if isinstance(exc, ast.Call):
+            exc = exc.func
+        if isinstance(exc, ast.Name):
+            return exc.id
+        if isinstance(exc, ast.Attribute):
+            return exc.attr
+        return None
+
+    def _extract_raises(self, node):
+        raises = []
+        for n in ast.walk(node):
+            if isinstance(n, ast.Raise) and n.exc is not None:
+                name = self._exception_name(n.exc)
+                if name and name not in raises:
+                    raises.append(name)
+        return raises
+
+    def _extract_guards(self, node):
+        """
+        Argument checks of the form `if <arg test>: raise X`, e.g.
+        `if x is None`, `if not x`, `if x < 0`, as {arg, op, value, raises}.
+        """
+        arg_names = {a.arg for a in node.args.args + node.args.kwonlyargs}
+        guards = []
+        for n in ast.walk(node):
+            if not isinstance(n, ast.If) or not n.body or not isinstance(n.body[0], ast.Raise):
+                continue
+            exc = self._exception_name(n.body[0].exc) if n.body[0].exc is not None else None
+            if exc is None:
+                continue
+            test = n.test
+            if (isinstance(test, ast.UnaryOp) and isinstance(test.op, ast.Not)
+                    and isinstance(test.operand, ast.Name) and test.operand.id in arg_names):
+                guards.append({'arg': test.operand.id, 'op': 'not', 'value': None, 'raises': exc})
+            elif (isinstance(test, ast.Compare) and len(test.ops) == 1
+                    and isinstance(test.left, ast.Name) and test.left.id in arg_names
+                    and isinstance(test.comparators[0], ast.Constant)):
+                guards.append({
+                    'arg': test.left.id,
+                    'op': type(test.ops[0]).__name__,
+                    'value': test.comparators[0].value,
+                    'raises': exc,
+                })
+        return guards
+
     def _count_branches(self, node):
         count = 0
         for n in ast.walk(node):
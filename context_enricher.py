@@ -1,18 +1,12 @@
 import ast
+import codeop
 import os
 import re
-from openai import OpenAI
-
-# =========================
-# Load API Key (SAFE)
-# =========================
-api_key = os.getenv("OPENAI_API_KEY")
-
-client = None
-if not api_key:
-    print("OPENAI_API_KEY not found. LLM features disabled.")
-else:
-    client = OpenAI(api_key=api_key)
+import warnings
+from llm_backend import get_backend
+from project_manifest import get_manifest, invalidate_manifest
+from pipeline_metrics import span, record, record_llm_usage
+from suite_merge import merge_test_modules
 
 # =========================
 # Extract Imports
@@ -38,17 +32,19 @@ def extract_imports_from_file(file_path):
 
 def find_local_imported_files(imports, project_root):
     local_files = []
-    for root, _, files in os.walk(project_root):
-        for file in files:
-            if file.endswith(".py") and os.path.splitext(file)[0] in imports:
-                local_files.append(os.path.join(root, file))
+    wanted = set(imports)
+    for entry in get_manifest(project_root).python_files():
+        if os.path.splitext(entry["name"])[0] in wanted:
+            local_files.append(os.path.join(project_root, entry["rel_path"]))
     return local_files
 
 
 def get_file_content(filepath):
     try:
         with open(filepath, "r", encoding="utf-8") as f:
-            return f.read()
+            content = f.read()
+        record("bytes_read", len(content))
+        return content
     except Exception as e:
         print(f"Error reading file {filepath}: {e}")
         return ""
@@ -91,26 +87,29 @@ def gather_all_project_context(project_root):
     # Extensions to include
     valid_extensions = {".py", ".md", ".txt", ".json", ".html", ".css", ".js"}
 
-    for root, dirs, files in os.walk(project_root):
-        # Remove ignored directories from traversal
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
-        
-        for file in files:
-            ext = os.path.splitext(file)[1].lower()
-            if ext in valid_extensions:
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, project_root)
-                
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        file_content = f.read()
-                        
-                    context += f"\n\n# File: {rel_path}\n"
-                    context += "=" * 40 + "\n"
-                    context += file_content + "\n"
-                except Exception as e:
-                    print(f"Skipping file {rel_path} due to error: {e}")
-                    
+    parts = []
+    for entry in get_manifest(project_root).files():
+        rel_path = entry["rel_path"]
+        # Skip files under ignored directories
+        if ignore_dirs.intersection(rel_path.split(os.sep)[:-1]):
+            continue
+
+        ext = os.path.splitext(entry["name"])[1].lower()
+        if ext in valid_extensions:
+            file_path = os.path.join(project_root, rel_path)
+
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    file_content = f.read()
+                record("bytes_read", len(file_content))
+
+                parts.append(f"\n\n# File: {rel_path}\n")
+                parts.append("=" * 40 + "\n")
+                parts.append(file_content + "\n")
+            except Exception as e:
+                print(f"Skipping file {rel_path} due to error: {e}")
+
+    context += "".join(parts)
     return context
 
 
@@ -134,13 +133,7 @@ def clean_test_code(raw_code):
 # =========================
 # Generate Tests (SAFE)
 # =========================
-def generate_tests_with_llm(enriched_context):
-    if client is None:
-        print(" LLM disabled. Skipping test generation.")
-        return ""
-
-    print("\n Sending context to LLM for test generation...")
-
+def build_test_generation_messages(enriched_context):
     prompt = f"""
 You are an expert Python test engineer. Generate a SINGLE, COMPLETE, and RUNNABLE Python unittest module with exactly 3 test cases.
 
@@ -182,20 +175,166 @@ PROJECT CONTEXT:
 {enriched_context}
 """
 
-    response = client.chat.completions.create(
-        model="gpt-5-nano",
-        messages=[
-            {"role": "system", "content": "You are a senior Python QA engineer."},
-            {"role": "user", "content": prompt},
-        ],
-    )
+    return [
+        {"role": "system", "content": "You are a senior Python QA engineer."},
+        {"role": "user", "content": prompt},
+    ]
 
-    test_code = response.choices[0].message.content
+
+def generate_tests_with_llm(enriched_context):
+    backend = get_backend()
+    if not backend.available():
+        print(" LLM disabled. Skipping test generation.")
+        return ""
+
+    print("\n Sending context to LLM for test generation...")
+
+    with span("llm_call", purpose="test_generation", model=backend.model):
+        response = backend.complete(build_test_generation_messages(enriched_context), purpose="test_generation")
+        record_llm_usage(response)
+
+    test_code = response.content
     print(" Test code generated successfully.")
     return clean_test_code(test_code)
 
 
-def save_generated_tests(save_dir, target_file, test_code):
+# =========================
+# Streaming Generation
+# =========================
+def _is_test_module(source):
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return False
+    return any(isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) for node in tree.body)
+
+
+def _continues_code(source, line):
+    """False when line cannot follow source as Python (e.g. trailing prose)."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            codeop.compile_command(f"{source}\n{line}", "<generated_tests>", "exec")
+        return True
+    except (SyntaxError, ValueError, OverflowError):
+        return False
+
+
+class StreamingCodeExtractor:
+    """
+    Incrementally tracks the ```python block of a streamed response.
+    Falls back to clean_test_code() rules when the model sends no fence;
+    an unfenced module counts as complete once a top-level line that is
+    not Python (trailing prose) follows a valid test module.
+    """
+
+    FENCE = "```python"
+
+    def __init__(self):
+        self.buffer = ""
+        self.code_start = None
+        self.code_end = None
+        self.unfenced_code = None
+        self._checked_lines = 0
+        self._unfenced_head = None
+
+    def feed(self, delta):
+        self.buffer += delta
+        if self.code_start is None:
+            idx = self.buffer.find(self.FENCE)
+            if idx != -1:
+                self.code_start = idx + len(self.FENCE)
+        if self.code_start is not None and self.code_end is None and "`" in self.buffer[self.code_start:]:
+            idx = self.buffer.find("```", self.code_start)
+            if idx != -1:
+                self.code_end = idx
+        if self.code_start is None and self.unfenced_code is None and "\n" in delta and "```" not in self.buffer:
+            self._scan_unfenced()
+
+    def _scan_unfenced(self):
+        text = clean_test_code(self.buffer)
+        lines = text.split("\n")[:-1]  # complete lines only
+        # Leading prose is cut once "import unittest" arrives; start over then
+        if self._unfenced_head != text[:64]:
+            self._unfenced_head = text[:64]
+            self._checked_lines = 0
+        for i in range(max(self._checked_lines, 1), len(lines)):
+            line = lines[i]
+            if not line.strip() or line[0].isspace() or line.startswith("#"):
+                continue
+            prefix = "\n".join(lines[:i]).rstrip()
+            if _is_test_module(prefix) and not _continues_code(prefix, line):
+                self.unfenced_code = prefix
+                break
+        self._checked_lines = len(lines)
+
+    @property
+    def code(self):
+        if self.unfenced_code is not None:
+            return self.unfenced_code
+        if self.code_start is not None:
+            end = self.code_end if self.code_end is not None else len(self.buffer)
+            code = self.buffer[self.code_start:end]
+            # Hide a closing fence that has only partially arrived
+            return code.rstrip("`").strip()
+        return clean_test_code(self.buffer)
+
+    def is_complete(self):
+        """True once the fenced block is closed and compiles, or unfenced code is followed by prose."""
+        if self.unfenced_code is not None:
+            return True
+        if self.code_end is None:
+            return False
+        try:
+            compile(self.code, "<generated_tests>", "exec")
+            return True
+        except SyntaxError:
+            return False
+
+
+def generate_tests_with_llm_stream(enriched_context, on_update=None, stop_when_complete=True):
+    """
+    Streams the test generation, calling on_update(partial_code) whenever a
+    new line of code arrives. Stops reading as soon as a complete, valid
+    module has been received (when stop_when_complete is set): a closed
+    fence, or prose after unfenced code.
+    """
+    backend = get_backend()
+    if not backend.available():
+        print(" LLM disabled. Skipping test generation.")
+        return ""
+
+    print("\n Streaming test generation from LLM...")
+    extractor = StreamingCodeExtractor()
+
+    with span("llm_call", purpose="test_generation", model=backend.model, streamed=True):
+        stream = backend.stream(build_test_generation_messages(enriched_context), purpose="test_generation")
+        try:
+            for delta in stream:
+                extractor.feed(delta)
+                if on_update and "\n" in delta:
+                    on_update(extractor.code)
+                if stop_when_complete and extractor.is_complete():
+                    print(" Complete test module received — stopping stream early.")
+                    break
+        finally:
+            stream.close()
+        record_llm_usage(stream)
+        if stream.first_token_s is not None:
+            record("first_token_ms", round(stream.first_token_s * 1000))
+
+    test_code = extractor.code
+    if on_update:
+        on_update(test_code)
+    print(" Test code generated successfully.")
+    return test_code
+
+
+def save_generated_tests(save_dir, target_file, test_code, mode=None):
+    """
+    mode "overwrite" (default, TEST_SUITE_MODE) replaces an existing test
+    file; "merge" adds only unseen tests to it.
+    """
     if not test_code.strip():
         print(" No test code to save.")
         return None
@@ -204,9 +343,20 @@ def save_generated_tests(save_dir, target_file, test_code):
 
     test_filename = f"test_{os.path.basename(target_file)}"
     test_file_path = os.path.join(save_dir, test_filename)
+    mode = mode or os.getenv("TEST_SUITE_MODE", "overwrite")
+
+    if mode == "merge" and os.path.exists(test_file_path):
+        with open(test_file_path, "r", encoding="utf-8") as f:
+            existing = f.read()
+        try:
+            test_code, added, updated, duplicates = merge_test_modules(existing, test_code.strip())
+            print(f" Merged tests: {added} new, {updated} updated, {duplicates} duplicate(s) dropped")
+        except SyntaxError as e:
+            print(f" Could not merge into existing tests ({e}) — overwriting.")
 
     with open(test_file_path, "w", encoding="utf-8") as f:
-        f.write(test_code.strip())
+        f.write(test_code.strip() + "\n")
+    invalidate_manifest(test_file_path)
 
     print(f" generated tests to: {test_file_path}")
     return test_file_path
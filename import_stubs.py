@@ -0,0 +1,154 @@
+"""
+Import Stubs — lightweight sys.modules stand-ins for third-party packages.
+
+Generated tests import the real target module, which imports its
+third-party dependencies at import time; a missing or slow package then
+fails or slows down the whole run. The executor classifies the project's
+imports as local, stdlib or third-party and the test runner installs a
+StubFinder for the third-party ones before discovery:
+
+    TEST_STUB_IMPORTS=off       import everything for real (default)
+    TEST_STUB_IMPORTS=missing   stub only packages that are not installed
+    TEST_STUB_IMPORTS=all       stub every third-party package (hermetic)
+
+A stubbed module (and any submodule) returns a permissive class for every
+attribute: it can be called, subclassed and iterated, and names ending in
+Error / Exception / Warning are real exception classes, so module-level
+code such as `class Game(pygame.sprite.Sprite)` or
+`except requests.RequestException` still imports. Tests that need
+behaviour should patch those attributes with unittest.mock.
+
+This module only uses the standard library: the runner imports it inside
+the sandbox.
+"""
+
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import sys
+
+STUB_MODES = ("off", "missing", "all")
+DEFAULT_STUB_MODE = "off"
+
+_EXCEPTION_SUFFIXES = ("Error", "Exception", "Warning")
+
+
+def stdlib_modules():
+    names = set(getattr(sys, "stdlib_module_names", ()))
+    return names | set(sys.builtin_module_names) | {"__future__"}
+
+
+def classify_imports(imports, local_modules):
+    """Splits top-level import names into {"local", "stdlib", "third_party"} sorted lists."""
+    stdlib = stdlib_modules()
+    groups = {"local": set(), "stdlib": set(), "third_party": set()}
+    for name in imports:
+        root = name.split(".")[0]
+        if not root:
+            continue
+        if root in local_modules:
+            groups["local"].add(root)
+        elif root in stdlib:
+            groups["stdlib"].add(root)
+        else:
+            groups["third_party"].add(root)
+    return {kind: sorted(names) for kind, names in groups.items()}
+
+
+# ------------------ Stub Objects ------------------
+class _StubMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        # Kept, so `raise pkg.Client.NotFound` and `except pkg.Client.NotFound` see one class
+        value = _stub_class(name, f"{cls.__module__}.{cls.__qualname__}")
+        setattr(cls, name, value)
+        return value
+
+    def __iter__(cls):
+        return iter(())
+
+
+class StubObject(metaclass=_StubMeta):
+    """Instances accept any call and return stubs for any attribute."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return StubObject()
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name.endswith(_EXCEPTION_SUFFIXES):
+            return getattr(type(self), name)
+        return StubObject()
+
+    def __iter__(self):
+        return iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _stub_class(name, module):
+    if name.endswith(_EXCEPTION_SUFFIXES):
+        return type(name, (Exception,), {"__module__": module})
+    return _StubMeta(name, (StubObject,), {"__module__": module})
+
+
+class StubModule(type(sys)):
+    """Module whose missing attributes are created (and kept) on first access."""
+
+    __stub__ = True
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = _stub_class(name, self.__name__)
+        setattr(self, name, value)
+        return value
+
+
+# ------------------ Import Hook ------------------
+class StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def __init__(self, roots):
+        self.roots = set(roots)
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname.split(".")[0] not in self.roots:
+            return None
+        return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+
+    def create_module(self, spec):
+        module = StubModule(spec.name)
+        module.__path__ = []
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+def install_stubs(names, mode=DEFAULT_STUB_MODE):
+    """
+    Stubs the given top-level packages according to mode; returns the
+    names actually stubbed. Must run before the code under test imports.
+    """
+    if mode not in STUB_MODES:
+        raise ValueError(f"Unknown stub mode: {mode}")
+    if mode == "off":
+        return []
+    roots = []
+    for name in names:
+        if name in sys.modules:
+            continue
+        if mode == "missing" and importlib.util.find_spec(name) is not None:
+            continue
+        roots.append(name)
+    if roots:
+        sys.meta_path.insert(0, StubFinder(roots))
+    return roots
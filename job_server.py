@@ -0,0 +1,479 @@
+"""
+Job Server — asyncio HTTP API that runs the pipeline for CI systems.
+
+    python job_server.py --port 8765 --workers 4 --queue-size 32
+
+Endpoints (JSON unless noted):
+    POST /jobs?target=src/app.py&ai_analysis=0   body: project ZIP -> 202 {"id", "status"}
+    GET  /jobs/<id>                              status and timings
+    GET  /jobs/<id>/logs?follow=1                plain-text log, streamed until the job ends
+    GET  /jobs/<id>/results                      test results, summary and per-test outcomes
+    GET  /jobs/<id>/reports/<markdown|pdf|log|junit|json>   report files
+    GET  /health                                 queue depth and worker usage
+
+Jobs wait in a bounded queue and run on a fixed pool of worker threads.
+When the queue is full, submissions get 503 with Retry-After. Each job
+runs in its own workspace, leased from upload until the job finishes so
+the workspace GC cannot evict it while queued. Its printed output goes to the
+job's log file: sys.stdout is routed through a ContextVar, which the DAG
+scheduler carries into its stage threads.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from urllib.parse import parse_qs, urlsplit
+
+from llm_scheduler import get_llm_scheduler, request_context
+from llm_usage import ledger_from_env, use_ledger
+from pipeline_metrics import PipelineTracer, use_tracer
+from pipeline_stages import get_scheduler
+from unittest_runner import read_results
+from workspace import create_workspace
+from workspace_gc import get_workspace_gc
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 32
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+MAX_KEPT_JOBS = 1000
+LOG_POLL_S = 0.25
+READ_CHUNK = 64 * 1024
+
+_job_log = contextvars.ContextVar("job_log", default=None)
+
+_REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 410: "Gone", 411: "Length Required", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+# ------------------ Per-job output ------------------
+class JobLog:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(text)
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class _StdoutRouter:
+    """Sends writes to the current job's log, everything else to the real stream."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        log = _job_log.get()
+        if log is not None:
+            log.write(text)
+            return len(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def install_stdout_router():
+    if not isinstance(sys.stdout, _StdoutRouter):
+        sys.stdout = _StdoutRouter(sys.stdout)
+
+
+# ------------------ Jobs ------------------
+class Job:
+    def __init__(self, project_name, target=None, ai_analysis=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.workspace = create_workspace(project_name, session_id="api")
+        # Held while receiving, queued and running; released by release_workspace()
+        self._lease = ExitStack()
+        self._lease.enter_context(self.workspace.lease())
+        self.target = target
+        self.ai_analysis = ai_analysis
+        self.status = "receiving"
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.values = {}
+        self.ledger = ledger_from_env(f"job {self.id}")
+        self.log_path = os.path.join(self.workspace.root, "job.log")
+
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed")
+
+    def release_workspace(self):
+        self._lease.close()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "project": self.workspace.project_name,
+            "target_file": self.values.get("target_file"),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_s": round(self.finished_at - self.started_at, 3) if self.finished_at and self.started_at else None,
+        }
+
+    def results(self):
+        test_results = self.values.get("test_results") or {}
+        summary = dict(self.values.get("test_summary") or {})
+        summary.pop("raw_log", None)
+        return {
+            **self.to_dict(),
+            "test_results": test_results,
+            "test_summary": summary,
+            "tests": read_results(test_results.get("results_file")),
+            "preflight": self.values.get("preflight"),
+            "llm_usage": self.ledger.totals(),
+            "test_path": self.values.get("test_path"),
+            "ranked_functions": [
+                {"name": fn["name"], "priority": fn["priority"], "line": fn["line"]}
+                for fn in self.values.get("ranked_functions") or []
+            ],
+        }
+
+    def report_path(self, kind):
+        report_paths = self.values.get("report_paths") or {}
+        if kind == "log":
+            return (self.values.get("test_results") or {}).get("log_report")
+        if kind in ("junit", "json"):
+            return (self.values.get("export_paths") or {}).get(kind)
+        return report_paths.get(kind)
+
+
+def _resolve_target(job, folder, entry_candidates):
+    if job.target:
+        target = os.path.normpath(os.path.join(folder, job.target))
+        if not target.startswith(os.path.abspath(folder) + os.sep) or not os.path.isfile(target):
+            raise ValueError(f"Target file not found in project: {job.target}")
+        return target
+    if not entry_candidates:
+        raise ValueError("No Python files found in project")
+    return entry_candidates[0]["path"]
+
+
+def run_job(job):
+    """Runs the whole pipeline for one job (in a worker thread)."""
+    log = JobLog(job.log_path)
+    token = _job_log.set(log)
+    job.started_at = time.time()
+    job.status = "running"
+    scheduler = get_scheduler()
+    try:
+        tracer = PipelineTracer(job.workspace.trace_path)
+        with use_tracer(tracer), use_ledger(job.ledger), request_context(f"job {job.id}", "batch"):
+            values = scheduler.run(
+                {"zip_path": job.workspace.upload_path, "extract_dir": job.workspace.project_dir},
+                targets=["entry_candidates"],
+            )
+            job.workspace.remove_upload()
+            folder = os.path.abspath(values["folder"])
+            target_file = _resolve_target(job, folder, values["entry_candidates"])
+            print(f" [Job {job.id}] target file: {target_file}")
+
+            job.values = scheduler.run(
+                {
+                    "folder": folder,
+                    "entry_candidates": values["entry_candidates"],
+                    "target_file": target_file,
+                    "ai_analysis_enabled": job.ai_analysis,
+                },
+                targets=["report", "export"],
+            )
+            tracer.print_summary()
+        job.status = "succeeded"
+    except Exception as e:
+        job.error = f"{type(e).__name__}: {e}"
+        job.status = "failed"
+        traceback.print_exc(file=sys.stdout)
+    finally:
+        job.finished_at = time.time()
+        job.release_workspace()
+        _job_log.reset(token)
+        log.close()
+
+
+class JobManager:
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.jobs = OrderedDict()
+        self.running = 0
+        self.completed = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            self.running += 1
+            try:
+                await loop.run_in_executor(self._executor, run_job, job)
+            finally:
+                self.running -= 1
+                self.completed += 1
+                self.queue.task_done()
+
+    def create(self, project_name, target=None, ai_analysis=False):
+        job = Job(project_name, target, ai_analysis)
+        self.jobs[job.id] = job
+        # Forget the oldest finished jobs; their workspaces are left to the GC
+        while len(self.jobs) > MAX_KEPT_JOBS:
+            oldest = next((j for j in self.jobs.values() if j.finished), None)
+            if oldest is None:
+                break
+            del self.jobs[oldest.id]
+        return job
+
+    def submit(self, job):
+        """Queue a received job; raises asyncio.QueueFull when saturated."""
+        self.queue.put_nowait(job)
+        job.status = "queued"
+
+    def discard(self, job):
+        self.jobs.pop(job.id, None)
+        job.release_workspace()
+        job.workspace.remove()
+
+    def health(self):
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "completed": self.completed,
+            "workspaces": get_workspace_gc().usage(),
+            "llm_queue": get_llm_scheduler().stats(),
+        }
+
+
+# ------------------ HTTP ------------------
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+async def _send(writer, status, body, content_type="application/json", headers=None):
+    if content_type == "application/json" and not isinstance(body, bytes):
+        body = json.dumps(body, default=str).encode("utf-8")
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+    head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}", "Connection: close"]
+    head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+async def _send_file(writer, path, content_type):
+    size = os.path.getsize(path)
+    head = [f"HTTP/1.1 200 OK", f"Content-Type: {content_type}", f"Content-Length: {size}", "Connection: close"]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_CHUNK):
+            writer.write(chunk)
+            await writer.drain()
+
+
+class JobServer:
+    def __init__(self, manager, max_upload_bytes=MAX_UPLOAD_BYTES):
+        self.manager = manager
+        self.max_upload_bytes = max_upload_bytes
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, target, _ = request_line.split(" ", 2)
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            url = urlsplit(target)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            await self.route(method, url.path.rstrip("/") or "/", query, headers, reader, writer)
+        except HTTPError as e:
+            await _send(writer, e.status, {"error": str(e)}, headers=e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            await _send(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            writer.close()
+
+    def _job(self, job_id):
+        job = self.manager.jobs.get(job_id)
+        if job is None:
+            raise HTTPError(404, f"Unknown job: {job_id}")
+        return job
+
+    async def route(self, method, path, query, headers, reader, writer):
+        parts = path.strip("/").split("/")
+        if path == "/health":
+            return await _send(writer, 200, self.manager.health())
+        if path == "/jobs":
+            if method == "POST":
+                return await self.submit(query, headers, reader, writer)
+            return await _send(writer, 200, [j.to_dict() for j in self.manager.jobs.values()])
+        if parts[0] != "jobs" or len(parts) < 2:
+            raise HTTPError(404, f"No route for {path}")
+        if method != "GET":
+            raise HTTPError(405, f"{method} not allowed on {path}")
+
+        job = self._job(parts[1])
+        if len(parts) == 2:
+            return await _send(writer, 200, job.to_dict())
+        if parts[2] == "logs":
+            return await self.stream_logs(job, query.get("follow", "1") != "0", writer)
+        if parts[2] == "results":
+            if not job.finished:
+                raise HTTPError(409, f"Job is {job.status}")
+            return await _send(writer, 200, job.results())
+        if parts[2] == "reports" and len(parts) == 4:
+            if not job.finished:
+                raise HTTPError(409, f"Job is {job.status}")
+            report = job.report_path(parts[3])
+            if not report:
+                raise HTTPError(404, f"No {parts[3]} report for this job")
+            if not os.path.exists(report):
+                raise HTTPError(410, "Report was removed with the job's workspace")
+            content_type = {
+                "pdf": "application/pdf",
+                "markdown": "text/markdown",
+                "junit": "application/xml",
+                "json": "application/json",
+            }.get(parts[3], "text/plain")
+            return await _send_file(writer, report, content_type)
+        raise HTTPError(404, f"No route for {path}")
+
+    async def submit(self, query, headers, reader, writer):
+        if "content-length" not in headers:
+            raise HTTPError(411, "Content-Length required")
+        length = int(headers["content-length"])
+        if length > self.max_upload_bytes:
+            raise HTTPError(413, f"Upload exceeds {self.max_upload_bytes} bytes")
+        if self.manager.queue.full():
+            raise HTTPError(503, "Job queue is full", {"Retry-After": "30"})
+
+        job = self.manager.create(
+            query.get("project", "project"),
+            target=query.get("target"),
+            ai_analysis=query.get("ai_analysis", "0") == "1",
+        )
+        try:
+            # Stream the upload to disk instead of holding it in memory
+            remaining = length
+            with open(job.workspace.upload_path, "wb") as f:
+                while remaining:
+                    chunk = await reader.read(min(READ_CHUNK, remaining))
+                    if not chunk:
+                        raise HTTPError(400, "Upload ended early")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            self.manager.submit(job)
+        except asyncio.QueueFull:
+            self.manager.discard(job)
+            raise HTTPError(503, "Job queue is full", {"Retry-After": "30"})
+        except BaseException:
+            self.manager.discard(job)
+            raise
+        await _send(writer, 202, job.to_dict(), headers={"Location": f"/jobs/{job.id}"})
+
+    async def stream_logs(self, job, follow, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; charset=utf-8\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+        )
+        offset = 0
+        while True:
+            finished = job.finished
+            data = b""
+            if os.path.exists(job.log_path):
+                with open(job.log_path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+            if data:
+                offset += len(data)
+                writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+                await writer.drain()
+            if finished or not follow:
+                break
+            await asyncio.sleep(LOG_POLL_S)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+    install_stdout_router()
+    get_workspace_gc()
+    manager = JobManager(workers, queue_size)
+    manager.start()
+    server = await asyncio.start_server(JobServer(manager).handle, host, port)
+    print(f" Job server listening on http://{host}:{port} ({workers} workers, queue {queue_size})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await manager.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP job server for the test generation pipeline.")
+    parser.add_argument("--host", default=os.getenv("JOB_SERVER_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.getenv("JOB_SERVER_PORT", DEFAULT_PORT)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("JOB_SERVER_WORKERS", DEFAULT_WORKERS)))
+    parser.add_argument("--queue-size", type=int, default=int(os.getenv("JOB_SERVER_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)))
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.queue_size))
+    except KeyboardInterrupt:
+        print(" Job server stopped.")
+
+
+if __name__ == "__main__":
+    main()
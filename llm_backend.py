@@ -0,0 +1,422 @@
+"""
+LLM Backend — a single interface for every LLM call in the pipeline.
+
+Backends:
+ - OpenAIBackend: one pooled HTTP client reused across calls, with
+   configurable model, timeout and retries.
+ - ReplayBackend: serves recorded responses (JSON lines written with
+   record_path) or a synthetic response, with configurable latency, so
+   the pipeline can be load-tested offline.
+
+Selection is by environment variable:
+    LLM_BACKEND=openai|replay   LLM_MODEL=gpt-5-nano   LLM_TIMEOUT_S=60
+    LLM_REPLAY_FILE=recordings.jsonl   LLM_REPLAY_LATENCY_S=0.5
+
+Every call is admitted against and recorded in the active llm_usage
+ledger, which may downgrade the model or raise LLMBudgetExceeded, and
+waits for a slot from the process-wide llm_scheduler so concurrent
+sessions share the provider's rate limits.
+"""
+
+import abc
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from llm_scheduler import get_llm_scheduler
+from llm_usage import estimate_prompt_tokens, get_ledger
+
+DEFAULT_MODEL = "gpt-5-nano"
+DEFAULT_TIMEOUT_S = 60.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_RATE_LIMIT_PAUSE_S = 5.0
+
+SYNTHETIC_TEST_MODULE = '''```python
+import unittest
+
+
+class TestGenerated(unittest.TestCase):
+    def setUp(self):
+        self.value = 1
+
+    def tearDown(self):
+        self.value = None
+
+    def test_normal_case(self):
+        self.assertEqual(self.value, 1)
+
+    def test_edge_case(self):
+        self.assertIsNotNone(self.value)
+
+    def test_error_case(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.value / 0
+```'''
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+class LLMResponse:
+    def __init__(self, content, model, usage=None, latency_s=0.0):
+        self.content = content or ""
+        self.model = model
+        self.usage = usage or {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        self.latency_s = latency_s
+
+    def to_dict(self):
+        return {
+            "content": self.content,
+            "model": self.model,
+            "usage": self.usage,
+            "latency_s": round(self.latency_s, 4),
+        }
+
+
+def _estimate_tokens(text):
+    # Rough heuristic used when the provider does not report usage
+    return max(1, len(text) // 4)
+
+
+def _rate_limit_pause(exc):
+    """Seconds to hold the scheduler after a provider 429, else None."""
+    if getattr(exc, "status_code", None) != 429:
+        return None
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", DEFAULT_RATE_LIMIT_PAUSE_S))
+    except (TypeError, ValueError):
+        return DEFAULT_RATE_LIMIT_PAUSE_S
+
+
+def messages_key(messages, model):
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMStream:
+    """
+    Iterates over text deltas of a streamed completion. usage and content
+    are filled in as the stream is consumed; close() aborts it early.
+    """
+
+    def __init__(self, chunks, model, on_finish=None, prompt_tokens=0):
+        self._chunks = chunks
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.usage = None
+        self.parts = []
+        self.latency_s = 0.0
+        self.first_token_s = None
+        self._start = time.perf_counter()
+        self._on_finish = on_finish
+        self._finished = False
+        self._source = None
+
+    @property
+    def content(self):
+        return "".join(self.parts)
+
+    def __iter__(self):
+        self._source = self._chunks(self)
+        try:
+            for delta in self._source:
+                if self.first_token_s is None:
+                    self.first_token_s = time.perf_counter() - self._start
+                self.parts.append(delta)
+                yield delta
+        finally:
+            self._finish()
+
+    def close(self):
+        if self._source is not None:
+            # Runs the backend's cleanup (e.g. releasing the HTTP connection)
+            self._source.close()
+        self._finish()
+
+    def estimated_usage(self):
+        """Usage estimate for streams that ended without a usage report (e.g. closed early)."""
+        completion = _estimate_tokens(self.content)
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": completion,
+            "total_tokens": self.prompt_tokens + completion,
+        }
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        self.latency_s = time.perf_counter() - self._start
+        if self.usage is None:
+            self.usage = self.estimated_usage()
+        if self._on_finish:
+            self._on_finish(self)
+
+
+class LLMBackend(abc.ABC):
+    name = "base"
+
+    def __init__(self, model=None, record_path=None):
+        self.model = model or os.getenv("LLM_MODEL", DEFAULT_MODEL)
+        self.record_path = record_path
+        self._record_lock = threading.Lock()
+
+    def available(self) -> bool:
+        return True
+
+    def _scheduled(self, prompt_tokens):
+        return get_llm_scheduler().slot(prompt_tokens)
+
+    def _on_error(self, exc):
+        pause = _rate_limit_pause(exc)
+        if pause:
+            print(f" LLM rate limited by provider — pausing requests for {pause:.0f}s.")
+            get_llm_scheduler().pause(pause)
+
+    def complete(self, messages, model=None, purpose=None, **kwargs) -> LLMResponse:
+        ledger = get_ledger()
+        prompt_tokens = estimate_prompt_tokens(messages)
+        model = ledger.admit(model or self.model, prompt_tokens, purpose, get_llm_scheduler().completion_reserve)
+        with self._scheduled(prompt_tokens) as slot:
+            start = time.perf_counter()
+            try:
+                response = self._complete(messages, model, **kwargs)
+            except Exception as e:
+                self._on_error(e)
+                raise
+            response.latency_s = time.perf_counter() - start
+            slot.actual_tokens = response.usage.get("total_tokens") or None
+        ledger.add(model, response.usage, response.latency_s)
+        if self.record_path:
+            self._record(messages, model, response)
+        return response
+
+    @abc.abstractmethod
+    def _complete(self, messages, model, **kwargs) -> LLMResponse:
+        """Send one chat completion request to the provider."""
+
+    def stream(self, messages, model=None, purpose=None, **kwargs) -> LLMStream:
+        """Start a streamed completion; iterate the result for text deltas."""
+        ledger = get_ledger()
+        prompt_tokens = estimate_prompt_tokens(messages)
+        model = ledger.admit(model or self.model, prompt_tokens, purpose, get_llm_scheduler().completion_reserve)
+
+        def chunks(stream):
+            # The slot is taken when consumption starts and held until the stream ends
+            with self._scheduled(prompt_tokens) as slot:
+                stream._start = time.perf_counter()
+                try:
+                    yield from self._stream_chunks(stream, messages, model, **kwargs)
+                except Exception as e:
+                    self._on_error(e)
+                    raise
+                finally:
+                    usage = stream.usage or stream.estimated_usage()
+                    slot.actual_tokens = usage.get("total_tokens") or None
+
+        def on_finish(stream):
+            ledger.add(model, stream.usage, stream.latency_s)
+            if self.record_path:
+                response = LLMResponse(stream.content, model, stream.usage, stream.latency_s)
+                self._record(messages, model, response)
+
+        return LLMStream(chunks, model, on_finish, prompt_tokens)
+
+    def _stream_chunks(self, stream, messages, model, **kwargs):
+        # Backends without native streaming deliver the whole answer at once
+        response = self._complete(messages, model, **kwargs)
+        stream.usage = response.usage
+        yield response.content
+
+    def _record(self, messages, model, response):
+        line = json.dumps({"key": messages_key(messages, model), **response.to_dict()})
+        with self._record_lock:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def close(self):
+        pass
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, model=None, api_key=None, timeout_s=None, max_retries=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, record_path=None):
+        super().__init__(model, record_path)
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.timeout_s = float(timeout_s or os.getenv("LLM_TIMEOUT_S", DEFAULT_TIMEOUT_S))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+        self.max_connections = max_connections
+        self._client = None
+        self._http_client = None
+        self._client_lock = threading.Lock()
+
+        if not self.api_key:
+            print("OPENAI_API_KEY not found. LLM features disabled.")
+
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                import httpx
+                from openai import OpenAI
+
+                # One keep-alive connection pool shared by every call
+                self._http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                    timeout=self.timeout_s,
+                )
+                self._client = OpenAI(
+                    api_key=self.api_key,
+                    http_client=self._http_client,
+                    timeout=self.timeout_s,
+                    max_retries=self.max_retries,
+                )
+            return self._client
+
+    def _complete(self, messages, model, **kwargs):
+        response = self._get_client().chat.completions.create(
+            model=model, messages=messages, **kwargs
+        )
+        usage = getattr(response, "usage", None)
+        return LLMResponse(
+            content=response.choices[0].message.content,
+            model=getattr(response, "model", model),
+            usage={
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+                "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+            },
+        )
+
+    def _stream_chunks(self, stream, messages, model, **kwargs):
+        chunks = self._get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs,
+        )
+        try:
+            for chunk in chunks:
+                usage = getattr(chunk, "usage", None)
+                if usage is not None:
+                    stream.usage = {
+                        "prompt_tokens": usage.prompt_tokens or 0,
+                        "completion_tokens": usage.completion_tokens or 0,
+                        "total_tokens": usage.total_tokens or 0,
+                    }
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response releases the pooled connection on early abort
+            chunks.close()
+
+    def close(self):
+        with self._client_lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._client = None
+            self._http_client = None
+
+
+class ReplayBackend(LLMBackend):
+    name = "replay"
+
+    def __init__(self, replay_path=None, default_response=SYNTHETIC_TEST_MODULE,
+                 latency_s=0.0, jitter_s=0.0, stream_chunk_chars=40, model=None, record_path=None):
+        super().__init__(model, record_path)
+        self.stream_chunk_chars = stream_chunk_chars
+        self.default_response = default_response
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.recordings = {}
+        if replay_path and os.path.exists(replay_path):
+            with open(replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        self.recordings[item["key"]] = item
+
+    def _delay(self):
+        return self.latency_s + (random.uniform(0, self.jitter_s) if self.jitter_s else 0.0)
+
+    def _complete(self, messages, model, **kwargs):
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return self._lookup(messages, model)
+
+    def _stream_chunks(self, stream, messages, model, **kwargs):
+        # Spread the configured latency evenly over the streamed chunks
+        response = self._lookup(messages, model)
+        chunks = [
+            response.content[i:i + self.stream_chunk_chars]
+            for i in range(0, len(response.content), self.stream_chunk_chars)
+        ] or [""]
+        per_chunk = self._delay() / len(chunks)
+        stream.usage = response.usage
+        for chunk in chunks:
+            if per_chunk:
+                time.sleep(per_chunk)
+            yield chunk
+
+    def _lookup(self, messages, model):
+        recorded = self.recordings.get(messages_key(messages, model))
+        if recorded is not None:
+            return LLMResponse(recorded["content"], recorded.get("model", model), recorded.get("usage"))
+
+        prompt_text = "".join(m.get("content", "") for m in messages)
+        return LLMResponse(
+            content=self.default_response,
+            model=model,
+            usage={
+                "prompt_tokens": _estimate_tokens(prompt_text),
+                "completion_tokens": _estimate_tokens(self.default_response),
+                "total_tokens": _estimate_tokens(prompt_text) + _estimate_tokens(self.default_response),
+            },
+        )
+
+
+def create_backend_from_env():
+    kind = os.getenv("LLM_BACKEND", "openai").lower()
+    record_path = os.getenv("LLM_RECORD_FILE")
+    if kind == "replay":
+        return ReplayBackend(
+            replay_path=os.getenv("LLM_REPLAY_FILE"),
+            latency_s=float(os.getenv("LLM_REPLAY_LATENCY_S", "0")),
+            jitter_s=float(os.getenv("LLM_REPLAY_JITTER_S", "0")),
+            record_path=record_path,
+        )
+    if kind == "openai":
+        return OpenAIBackend(record_path=record_path)
+    raise ValueError(f"Unknown LLM_BACKEND: {kind}")
+
+
+def get_backend():
+    """Process-wide backend shared by test generation and reporting."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend_from_env()
+        return _backend
+
+
+def set_backend(backend):
+    """Replace the shared backend (e.g. with a ReplayBackend for load tests)."""
+    global _backend
+    with _backend_lock:
+        previous = _backend
+        _backend = backend
+    return previous
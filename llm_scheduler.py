@@ -0,0 +1,252 @@
+"""
+LLM Scheduler — process-wide admission control for LLM requests.
+
+Every backend call waits for a slot from the shared LLMScheduler:
+ - token buckets cap requests and tokens per minute (LLM_RPM, LLM_TPM)
+   and LLM_MAX_CONCURRENT bounds requests in flight
+ - waiting requests are served interactive before batch, and round-robin
+   across sessions within a priority, so one busy session cannot starve
+   the others
+ - on_position(position, waiting) callbacks report queue position
+
+Buckets refill at (1 - BURST_FRACTION) of the limit and hold at most
+BURST_FRACTION of it, so no rolling minute ever exceeds the provider
+limit. Token use is reserved up front (prompt estimate + completion
+reserve) and reconciled with the reported usage afterwards.
+
+Callers describe themselves with request_context(session, priority).
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_COMPLETION_RESERVE = 2_000
+BURST_FRACTION = 0.1
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_request_context = ContextVar("llm_request_context", default=None)
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst_fraction=BURST_FRACTION):
+        self.capacity = max(1.0, per_minute * burst_fraction)
+        self.rate_per_s = per_minute * (1 - burst_fraction) / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount can be taken (0 if now)."""
+        self._refill()
+        # Requests larger than the bucket wait for a full bucket and overdraw it
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate_per_s if self.rate_per_s else float("inf")
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+    def adjust(self, amount):
+        """Return (negative amount) or charge extra usage after the fact."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class Ticket:
+    _ids = itertools.count()
+
+    def __init__(self, session, priority, tokens, on_position=None):
+        self.id = next(self._ids)
+        self.session = session
+        self.priority = priority
+        self.tokens = tokens
+        self.on_position = on_position
+        self.position = None
+        self.queued_at = time.monotonic()
+        self.wait_s = 0.0
+
+
+class LLMScheduler:
+    def __init__(self, rpm=None, tpm=None, max_concurrent=None, completion_reserve=None):
+        self.rpm = int(rpm or os.getenv("LLM_RPM", DEFAULT_RPM))
+        self.tpm = int(tpm or os.getenv("LLM_TPM", DEFAULT_TPM))
+        self.max_concurrent = int(max_concurrent or os.getenv("LLM_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT))
+        self.completion_reserve = int(
+            completion_reserve or os.getenv("LLM_COMPLETION_RESERVE", DEFAULT_COMPLETION_RESERVE)
+        )
+        self.requests = TokenBucket(self.rpm)
+        self.tokens = TokenBucket(self.tpm)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.granted = 0
+        self.total_wait_s = 0.0
+        # priority -> session -> deque of tickets; session order rotates for fairness
+        self._queues = {p: OrderedDict() for p in sorted(PRIORITIES.values())}
+        self._cond = threading.Condition()
+
+    # ------------------ Queue order ------------------
+    def _dispatch_order(self):
+        """Waiting tickets in the order they will be granted."""
+        order = []
+        for sessions in self._queues.values():
+            queues = [list(q) for q in sessions.values()]
+            for round_ in itertools.zip_longest(*queues):
+                order.extend(t for t in round_ if t is not None)
+        return order
+
+    def _enqueue(self, ticket):
+        sessions = self._queues[ticket.priority]
+        sessions.setdefault(ticket.session, deque()).append(ticket)
+
+    def _dequeue(self, ticket):
+        sessions = self._queues[ticket.priority]
+        queue = sessions[ticket.session]
+        queue.remove(ticket)
+        # The served session goes to the back of the round-robin
+        del sessions[ticket.session]
+        if queue:
+            sessions[ticket.session] = queue
+
+    def _wait_time(self, ticket):
+        if self.in_flight >= self.max_concurrent:
+            return None  # woken by a release
+        now = time.monotonic()
+        return max(
+            self.paused_until - now,
+            self.requests.wait_time(1),
+            self.tokens.wait_time(ticket.tokens),
+        )
+
+    def _position_changed(self, ticket, order):
+        """Records the ticket's queue position; returns (position, waiting) when it moved."""
+        position = order.index(ticket) + 1
+        if ticket.on_position and ticket.position != position:
+            ticket.position = position
+            return position, len(order)
+        return None
+
+    def _report_position(self, ticket, position, waiting):
+        # Called by the waiting thread itself and without the lock held, so a
+        # slow UI render neither runs on another thread nor stalls other sessions
+        self._cond.release()
+        try:
+            ticket.on_position(position, waiting)
+        except Exception:
+            ticket.on_position = None
+        finally:
+            self._cond.acquire()
+
+    # ------------------ Public API ------------------
+    def acquire(self, tokens, session=None, priority=None, on_position=None):
+        """Block until the request may be sent; returns its Ticket."""
+        context = _request_context.get() or {}
+        session = session or context.get("session", "default")
+        priority = PRIORITIES[priority or context.get("priority", "interactive")]
+        on_position = on_position or context.get("on_position")
+        ticket = Ticket(session, priority, tokens, on_position)
+
+        with self._cond:
+            self._enqueue(ticket)
+            try:
+                while True:
+                    order = self._dispatch_order()
+                    if order[0] is ticket:
+                        wait = self._wait_time(ticket)
+                        if wait is not None and wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    moved = self._position_changed(ticket, order)
+                    if moved is not None:
+                        self._report_position(ticket, *moved)
+                        continue  # the queue may have moved while unlocked
+                    self._cond.wait(timeout=wait if wait is not None else 1.0)
+            except BaseException:
+                self._dequeue(ticket)
+                self._cond.notify_all()
+                raise
+
+            self._dequeue(ticket)
+            self.requests.take(1)
+            self.tokens.take(ticket.tokens)
+            self.in_flight += 1
+            ticket.wait_s = time.monotonic() - ticket.queued_at
+            self.granted += 1
+            self.total_wait_s += ticket.wait_s
+            self._cond.notify_all()
+        return ticket
+
+    def release(self, ticket, actual_tokens=None):
+        with self._cond:
+            self.in_flight -= 1
+            if actual_tokens is not None:
+                self.tokens.adjust(actual_tokens - ticket.tokens)
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Hold all dispatch, e.g. after the provider answered 429."""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, prompt_tokens, **kwargs):
+        """Hold a request slot; set slot.actual_tokens to reconcile the reservation."""
+        ticket = self.acquire(prompt_tokens + self.completion_reserve, **kwargs)
+        ticket.actual_tokens = None
+        try:
+            yield ticket
+        finally:
+            self.release(ticket, ticket.actual_tokens)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "in_flight": self.in_flight,
+                "waiting": len(self._dispatch_order()),
+                "granted": self.granted,
+                "mean_wait_s": round(self.total_wait_s / self.granted, 3) if self.granted else 0.0,
+            }
+
+
+@contextmanager
+def request_context(session=None, priority="interactive", on_position=None):
+    """Attribute LLM calls in this context to a session and priority class."""
+    token = _request_context.set({"session": session, "priority": priority, "on_position": on_position})
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def set_request_context(session=None, priority="interactive", on_position=None):
+    """Like request_context, for the rest of the current context (e.g. a Streamlit rerun)."""
+    _request_context.set({"session": session, "priority": priority, "on_position": on_position})
+
+
+def get_llm_scheduler():
+    """Process-wide scheduler shared by every backend and session."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
@@ -0,0 +1,220 @@
+"""
+LLM Usage — token and cost accounting with budgets.
+
+Every call made through an LLMBackend is admitted against and added to the
+active UsageLedger. A ledger can have a parent (run -> session), so usage
+adds up at every level and a call must fit every budget in the chain.
+When a call would exceed a cost budget it is downgraded to
+LLM_DOWNGRADE_MODEL if that model fits; otherwise LLMBudgetExceeded is
+raised and the caller skips the LLM step.
+
+    LLM_RUN_TOKEN_BUDGET=200000       LLM_RUN_COST_BUDGET=0.50
+    LLM_SESSION_TOKEN_BUDGET=1000000  LLM_SESSION_COST_BUDGET=2.00
+    LLM_DOWNGRADE_MODEL=gpt-5-nano    LLM_PRICING='{"my-model": [0.1, 0.4]}'
+
+Prices are USD per million (prompt, completion) tokens. Admission counts
+the prompt estimate plus an expected completion (LLM_COMPLETION_RESERVE),
+so a call is stopped before it overruns a budget, not after.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from llm_scheduler import DEFAULT_COMPLETION_RESERVE
+
+PRICING_PER_MILLION = {
+    "gpt-5": (1.25, 10.00),
+    "gpt-5-mini": (0.25, 2.00),
+    "gpt-5-nano": (0.05, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+
+class LLMBudgetExceeded(RuntimeError):
+    pass
+
+
+def model_pricing(model):
+    """(prompt, completion) USD per million tokens; unknown models cost 0."""
+    pricing = dict(PRICING_PER_MILLION)
+    if os.getenv("LLM_PRICING"):
+        pricing.update({k: tuple(v) for k, v in json.loads(os.environ["LLM_PRICING"]).items()})
+    if model in pricing:
+        return pricing[model]
+    # Dated snapshots such as gpt-4o-mini-2024-07-18 use their base model's price
+    base = max((name for name in pricing if model.startswith(name + "-")), key=len, default=None)
+    return pricing[base] if base else (0.0, 0.0)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = model_pricing(model)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def estimate_prompt_tokens(messages):
+    # Same rough heuristic the backends use when the provider reports no usage
+    return max(1, sum(len(m.get("content", "")) for m in messages) // 4)
+
+
+def _budget(value):
+    return float(value) if value not in (None, "") else None
+
+
+class UsageLedger:
+    def __init__(self, name, token_budget=None, cost_budget=None, downgrade_model=None, parent=None):
+        self.name = name
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.downgrade_model = downgrade_model
+        self.parent = parent
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.latency_s = 0.0
+        self.by_model = {}
+        self.skipped = []
+        self.downgraded = 0
+        self._lock = threading.Lock()
+
+    def _chain(self):
+        ledger = self
+        while ledger is not None:
+            yield ledger
+            ledger = ledger.parent
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def _exceeded_by(self, tokens, cost):
+        """Name and reason of the first ledger in the chain the extra usage would exceed."""
+        for ledger in self._chain():
+            if ledger.token_budget is not None and ledger.total_tokens + tokens > ledger.token_budget:
+                return f"{ledger.name} token budget ({ledger.total_tokens}/{ledger.token_budget:.0f})"
+            if ledger.cost_budget is not None and ledger.cost_usd + cost > ledger.cost_budget:
+                return f"{ledger.name} cost budget (${ledger.cost_usd:.4f}/${ledger.cost_budget:.4f})"
+        return None
+
+    def admit(self, model, estimated_prompt_tokens, purpose=None, completion_reserve=None):
+        """
+        Returns the model to call (possibly downgraded) or raises
+        LLMBudgetExceeded when the call does not fit the budgets.
+        """
+        if completion_reserve is None:
+            completion_reserve = int(os.getenv("LLM_COMPLETION_RESERVE", DEFAULT_COMPLETION_RESERVE))
+        tokens = estimated_prompt_tokens + completion_reserve
+        reason = self._exceeded_by(tokens, estimate_cost(model, estimated_prompt_tokens, completion_reserve))
+        if reason is None:
+            return model
+
+        downgrade = next((l.downgrade_model for l in self._chain() if l.downgrade_model), None)
+        if downgrade and downgrade != model:
+            cost = estimate_cost(downgrade, estimated_prompt_tokens, completion_reserve)
+            if self._exceeded_by(tokens, cost) is None:
+                print(f" LLM budget: {reason} would be exceeded — using {downgrade} for {purpose or 'this call'}.")
+                for ledger in self._chain():
+                    with ledger._lock:
+                        ledger.downgraded += 1
+                return downgrade
+
+        for ledger in self._chain():
+            with ledger._lock:
+                ledger.skipped.append(purpose or "llm_call")
+        raise LLMBudgetExceeded(f"LLM call for {purpose or 'unknown purpose'} skipped: {reason} exceeded")
+
+    def add(self, model, usage, latency_s=0.0):
+        prompt = usage.get("prompt_tokens", 0) or 0
+        completion = usage.get("completion_tokens", 0) or 0
+        cost = estimate_cost(model, prompt, completion)
+        for ledger in self._chain():
+            with ledger._lock:
+                ledger.calls += 1
+                ledger.prompt_tokens += prompt
+                ledger.completion_tokens += completion
+                ledger.cost_usd += cost
+                ledger.latency_s += latency_s
+                entry = ledger.by_model.setdefault(model, {
+                    "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "latency_s": 0.0,
+                })
+                entry["calls"] += 1
+                entry["prompt_tokens"] += prompt
+                entry["completion_tokens"] += completion
+                entry["cost_usd"] += cost
+                entry["latency_s"] += latency_s
+        return cost
+
+    def totals(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.total_tokens,
+                "cost_usd": round(self.cost_usd, 6),
+                "latency_s": round(self.latency_s, 3),
+                "token_budget": self.token_budget,
+                "cost_budget": self.cost_budget,
+                "downgraded": self.downgraded,
+                "skipped": list(self.skipped),
+                "by_model": {m: dict(v, cost_usd=round(v["cost_usd"], 6)) for m, v in self.by_model.items()},
+            }
+
+    def summary_lines(self):
+        t = self.totals()
+        lines = [
+            f"LLM calls: {t['calls']} ({t['latency_s']}s)",
+            f"Tokens: {t['prompt_tokens']} prompt + {t['completion_tokens']} completion = {t['total_tokens']}"
+            + (f" of {t['token_budget']:.0f} budget" if t["token_budget"] is not None else ""),
+            f"Estimated cost: ${t['cost_usd']:.4f}"
+            + (f" of ${t['cost_budget']:.2f} budget" if t["cost_budget"] is not None else ""),
+        ]
+        for model, m in t["by_model"].items():
+            lines.append(f"{model}: {m['calls']} calls, {m['prompt_tokens']}+{m['completion_tokens']} tokens, ${m['cost_usd']:.4f}")
+        if t["downgraded"]:
+            lines.append(f"Calls downgraded to a cheaper model: {t['downgraded']}")
+        if t["skipped"]:
+            lines.append(f"Skipped for budget: {', '.join(t['skipped'])}")
+        return lines
+
+
+def ledger_from_env(name, scope="RUN", parent=None):
+    """A ledger with budgets from LLM_<scope>_TOKEN_BUDGET / LLM_<scope>_COST_BUDGET."""
+    return UsageLedger(
+        name,
+        token_budget=_budget(os.getenv(f"LLM_{scope}_TOKEN_BUDGET")),
+        cost_budget=_budget(os.getenv(f"LLM_{scope}_COST_BUDGET")),
+        downgrade_model=os.getenv("LLM_DOWNGRADE_MODEL") or None,
+        parent=parent,
+    )
+
+
+_process_ledger = UsageLedger("process")
+_active_ledger = ContextVar("llm_usage_ledger", default=None)
+
+
+def get_ledger():
+    return _active_ledger.get() or _process_ledger
+
+
+@contextmanager
+def use_ledger(ledger):
+    """Make ledger the active one for the current context (thread / run)."""
+    token = _active_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _active_ledger.reset(token)
+
+
+def activate_ledger(ledger):
+    """Make ledger active for the rest of the current context (e.g. a Streamlit rerun)."""
+    _active_ledger.set(ledger)
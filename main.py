@@ -16,24 +16,35 @@ import sys
 from tkinter import Tk, filedialog
 from dotenv import load_dotenv
 from tree.astree import ASTTree
-from Test_executor_agent import TestExecutorAgent
-from reporting_agent import ReportingAgent
-from context_enricher import (
-    extract_imports_from_file,
-    find_local_imported_files,
-    save_generated_tests,
-    gather_enriched_context,
-    generate_tests_with_llm
-)
-from project_analyzer import find_python_entry_files, extract_zip, generate_ast_tree
-from code_analyzer import CodeAnalyzer
+from llm_usage import ledger_from_env, use_ledger
+from pipeline_metrics import PipelineTracer, get_tracer, use_tracer
+from pipeline_stages import get_scheduler
+from workspace import create_workspace
 
 load_dotenv()
 PROJECT_PATH = os.path.dirname(__file__)
 
 # ------------------ MAIN PIPELINE ------------------
 def main():
+    # Traces go to PIPELINE_TRACE_FILE, else into the run's workspace;
+    # memory tracing follows PIPELINE_TRACE_MEMORY
+    tracer = PipelineTracer()
+    ledger = ledger_from_env("run")
+    with use_tracer(tracer), use_ledger(ledger):
+        try:
+            run_pipeline()
+        finally:
+            tracer.print_summary()
+            if tracer.jsonl_path:
+                print(f" Stage traces appended to: {os.path.abspath(tracer.jsonl_path)}")
+            print("\n LLM Usage:")
+            for line in ledger.summary_lines():
+                print(f"   {line}")
+
+
+def run_pipeline():
     print("\n🤖 Automated Test Generation & Execution Pipeline Started")
+    scheduler = get_scheduler()
 
     # Step 1: Select ZIP file
     Tk().withdraw()
@@ -48,31 +59,33 @@ def main():
 
     print(f"\n Selected file: {zip_path}")
 
-    # Step 2: Extract ZIP
-    folder = extract_zip(zip_path)
+    # Steps 2-4: Extract ZIP into a fresh workspace, ensure package structure,
+    # find entry files, analyze imports
+    project_name = os.path.splitext(os.path.basename(zip_path))[0]
+    workspace = create_workspace(project_name, session_id="cli")
+    tracer = get_tracer()
+    tracer.jsonl_path = tracer.jsonl_path or workspace.trace_path
+    # The lease keeps a server's workspace GC from evicting this run mid-way
+    with workspace.lease():
+        run_in_workspace(scheduler, zip_path, workspace)
+
+
+def run_in_workspace(scheduler, zip_path, workspace):
+    values = scheduler.run(
+        {"zip_path": zip_path, "extract_dir": workspace.project_dir},
+        targets=["import_analysis"],
+    )
+    folder = values["folder"]
     print(f" Extracted to: {folder}")
 
-    # Step 3: Ensure package structure
-    for sub in ["", "src", "generated_tests"]:
-        init_path = os.path.join(folder, sub, "__init__.py")
-        os.makedirs(os.path.dirname(init_path), exist_ok=True)
-        if not os.path.exists(init_path):
-            open(init_path, "w").close()
-
-    print("Initialized package structure.")
-
-    # Step 4: Find Python entry files
-    entry_files = find_python_entry_files(folder)
+    # Score-0 candidates only define functions: selectable targets, not entry files
+    entry_files = [c["path"] for c in values["entry_candidates"] if c["score"] > 0]
     print(f" Entry Python files detected: {entry_files}")
 
-    # Step 4a: Analyze imports
-    for py_file in entry_files:
-        imports = extract_imports_from_file(py_file)
-        local_files = find_local_imported_files(imports, folder)
-
+    for py_file, info in values["import_map"].items():
         print(f"\n File: {py_file}")
-        print(f"    Imports: {imports}")
-        print(f"    Local Files: {local_files}")
+        print(f"    Imports: {info['imports']}")
+        print(f"    Local Files: {info['local_files']}")
 
     # Step 5: Select target Python file
     target_file = input("\nEnter the target Python file for test generation: ").strip()
@@ -82,26 +95,23 @@ def main():
 
     print(f"🎯 Target file: {target_file}")
 
-    # ----------------- Step 5a: Generate AST Tree -----------------
-    print("\n🌳 Generating AST Tree...")
-    try:
-        ast_tree_path = generate_ast_tree(target_file)
-        print(f"🌲 AST Tree generated at: {ast_tree_path}")
-    except Exception as e:
-        print(f"⚠️ AST generation failed: {e}")
-        return
-
-    # ----------------- Step 5b: Deep Code Analysis -----------------
-    print("\n🔍 Running Deep Code Analyzer...")
-    analyzer = CodeAnalyzer(target_file)
-    functions = analyzer.extract_functions()
-    for func in functions:
-        func["priority"] = analyzer.calculate_priority(func)
+    # ----------------- Steps 5a-6: AST, Deep Analysis, Context (concurrent) -----------------
+    print("\n🌳 Generating AST, analyzing code and gathering context...")
+    values = scheduler.run(
+        {"folder": folder, "target_file": target_file},
+        targets=["ast", "ranking", "context"],
+    )
 
-    ranked_functions = sorted(functions, key=lambda x: x["priority"], reverse=True)
+    ast_outline = values["ast_outline"]
+    if ast_outline.get("error"):
+        print(f"⚠️ AST generation failed: {ast_outline['error']}")
+        return
+    print(f"🌲 AST Tree generated: {ast_outline['total']} top-level nodes")
+    for node in ast_outline["nodes"]:
+        print(f"   • {node['type']} {node['label']} (line {node['lineno']}, {node['child_count']} children)")
 
     print("\n📌 Functions Found (sorted by priority):")
-    for idx, fn in enumerate(ranked_functions, start=1):
+    for idx, fn in enumerate(values["ranked_functions"], start=1):
         print(
             f"{idx}. {fn['name']} "
             f"(Priority: {fn['priority']}, "
@@ -109,62 +119,37 @@ def main():
             f"Args: {fn['args']})"
         )
 
-    # ----------------- Step 6: Gather Enriched Context -----------------
-    print("\n Gathering enriched LLM execution context...")
-    context = gather_enriched_context(target_file, folder)
-
-    # ----------------- Step 7: Generate Tests via LLM -----------------
-    print("\n Generating tests using LLM...")
-    test_code = generate_tests_with_llm(context)
-
-    # ----------------- Step 8: Save Generated Tests -----------------
-    print("\n Saving generated tests...")
-    test_path = save_generated_tests(
-        save_dir=os.path.join(folder, "generated_tests"),
-        target_file=target_file,
-        test_code=test_code,
-    )
-    print(f" Test file saved at: {test_path}")
-
     # ----------------- Step 9: Prepare Environment -----------------
     abs_folder = os.path.abspath(folder)
     if abs_folder not in sys.path:
         sys.path.insert(0, abs_folder)
 
-    # ----------------- Step 10: Execute Tests -----------------
-    print("\n Executing generated tests...\n")
-    executor = TestExecutorAgent(project_path=PROJECT_PATH)
-    test_results = executor.execute_tests()
+    # ----------------- Steps 7-11: Generate, Save, Execute, Report -----------------
+    print("\n Generating, saving and executing tests...")
+    values = scheduler.run(
+        {
+            "folder": folder,
+            "target_file": target_file,
+            "context": values["context"],
+            "ai_analysis_enabled": True,
+        },
+        targets=["report", "export"],
+    )
+    print(f" Test file saved at: {values['test_path']}")
 
     print("\n Test Execution Summary:")
-    print(test_results)
+    print(values["test_results"])
 
-    # ----------------- Step 11: AI Reporting Agent -----------------
-    print("\n Generating AI Test Report...")
+    export_paths = values["export_paths"]
+    if export_paths:
+        print(f"\n JUnit XML saved at: {os.path.abspath(export_paths['junit'])}")
+        print(f" JSON results saved at: {os.path.abspath(export_paths['json'])}")
 
-    log_path = test_results.get("log_report")
-    if not log_path or not os.path.exists(log_path):
-        print(" Test log not found. Skipping report generation.")
+    report_paths = values["report_paths"]
+    if not report_paths:
         return
-
-    # Initialize Reporting Agent
-    reporter = ReportingAgent(log_path)
-
-    # Step 1: Parse logs
-    summary = reporter.parse_unittest_log()
-
-    # Step 2: Optional AI analysis
-    ai_analysis = reporter.analyze_with_llm(summary)
-
-    # Step 3: Generate Markdown report
-    markdown_report = reporter.generate_markdown_report(summary, ai_analysis)
-    md_path = reporter.save_markdown_report(markdown_report)
-    print(f"\n Markdown report saved at: {md_path.resolve()}")
-
-    # Step 4: Generate PDF report
-    pdf_path = os.path.join(folder, "ai_test_report.pdf")
-    reporter.generate_pdf_report(pdf_path)
-    print(f"\n PDF report saved at: {os.path.abspath(pdf_path)}")
+    print(f"\n Markdown report saved at: {os.path.abspath(report_paths['markdown'])}")
+    print(f"\n PDF report saved at: {os.path.abspath(report_paths['pdf'])}")
 
 
 if __name__ == "__main__":
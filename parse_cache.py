@@ -0,0 +1,75 @@
+"""
+Parse Cache — reads and parses Python source files once and shares
+the result between the analyzers.
+
+Entries are keyed by absolute path and invalidated when the file's
+mtime or size changes.
+"""
+
+import ast
+import os
+import threading
+from collections import OrderedDict
+
+from pipeline_metrics import record
+
+MAX_ENTRIES = 256
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _stat_key(file_path):
+    st = os.stat(file_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _load(file_path):
+    """Return the cache entry (source, tree) for a file, filling it if needed."""
+    path = os.path.abspath(file_path)
+    key = _stat_key(path)
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry["key"] == key:
+            _cache.move_to_end(path)
+            return entry
+
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    record("bytes_read", len(source))
+    entry = {"key": key, "source": source, "tree": None, "error": None}
+
+    with _lock:
+        _cache[path] = entry
+        _cache.move_to_end(path)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return entry
+
+
+def get_source(file_path):
+    """Return the text of a file, served from the cache when unchanged."""
+    return _load(file_path)["source"]
+
+
+def parse_file(file_path):
+    """
+    Return the parsed ast.Module for a file.
+    Raises SyntaxError like ast.parse; the failure is cached too.
+    """
+    entry = _load(file_path)
+    if entry["tree"] is None and entry["error"] is None:
+        try:
+            entry["tree"] = ast.parse(entry["source"], filename=file_path)
+        except SyntaxError as e:
+            entry["error"] = e
+    if entry["error"] is not None:
+        raise entry["error"]
+    return entry["tree"]
+
+
+def clear():
+    """Drop all cached entries."""
+    with _lock:
+        _cache.clear()
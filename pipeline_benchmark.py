@@ -0,0 +1,253 @@
+"""
+Pipeline Benchmark — generates synthetic Python projects of configurable
+size and times each pipeline stage with a stubbed LLM.
+
+The LLM is replaced by a zero-latency ReplayBackend (see --llm-latency).
+Results are written as JSON so runs can be compared across commits:
+
+    python pipeline_benchmark.py --modules 200 --functions 20 --output bench.json
+    python pipeline_benchmark.py --modules 200 --functions 20 --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import zipfile
+from code_analyzer import CodeAnalyzer
+from context_enricher import gather_enriched_context, generate_tests_with_llm
+from llm_backend import ReplayBackend, set_backend
+from priority_scoring import rank_project_functions
+from project_analyzer import extract_zip
+from reporting_agent import ReportingAgent
+from Test_executor_agent import TestExecutorAgent
+
+# ------------------ Synthetic Project Generator ------------------
+def _nested_body(depth, indent):
+    pad = " " * indent
+    if depth == 0:
+        return f"{pad}total += helper_value(x)\n"
+    kind = depth % 3
+    if kind == 0:
+        head = f"{pad}for i in range(x):\n"
+    elif kind == 1:
+        head = f"{pad}if x > {depth}:\n"
+    else:
+        head = f"{pad}while x > {depth}:\n{pad}    x -= 1\n"
+    return head + _nested_body(depth - 1, indent + 4)
+
+
+def generate_module(index, functions, depth, fan_out, modules, rng):
+    imports = sorted(rng.sample(range(modules), min(fan_out, modules)))
+    lines = [f'"""Synthetic module {index}."""', "import os", "import json"]
+    lines += [f"import mod_{j}" for j in imports if j != index]
+    lines += ["", "", "def helper_value(x):", "    return x * 2", ""]
+
+    for f in range(functions):
+        lines.append("")
+        lines.append(f"def func_{index}_{f}(x, y=1, z=None, *args, **kwargs):")
+        lines.append("    total = 0")
+        lines.append(_nested_body(depth, 4).rstrip("\n"))
+        lines.append("    if z is None:")
+        lines.append("        raise ValueError('z required')")
+        lines.append("    return json.dumps({'total': total, 'y': y})")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def generate_log(tests, failure_rate, rng):
+    """Builds a unittest-style log with the given number of tests."""
+    lines = []
+    failures = 0
+    for t in range(tests):
+        if rng.random() < failure_rate:
+            failures += 1
+            lines.append("=" * 70)
+            lines.append(f"FAIL: test_case_{t} (generated_tests.test_mod.TestMod.test_case_{t})")
+            lines.append("-" * 70)
+            lines.append("Traceback (most recent call last):")
+            lines.append(f'  File "test_mod.py", line {t}, in test_case_{t}')
+            lines.append("AssertionError: 1 != 2")
+    lines.append("-" * 70)
+    lines.append(f"Ran {tests} tests in 1.234s")
+    lines.append("")
+    lines.append(f"FAILED (failures={failures})" if failures else "OK")
+    return "\n".join(lines) + "\n"
+
+
+def generate_project(root, modules=20, functions=10, depth=3, fan_out=3, tests=20, seed=0):
+    """Writes a synthetic project under root and returns its path."""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "generated_tests"), exist_ok=True)
+    open(os.path.join(root, "__init__.py"), "w").close()
+    open(os.path.join(root, "generated_tests", "__init__.py"), "w").close()
+
+    for i in range(modules):
+        with open(os.path.join(root, f"mod_{i}.py"), "w", encoding="utf-8") as f:
+            f.write(generate_module(i, functions, depth, fan_out, modules, rng))
+
+    with open(os.path.join(root, "main.py"), "w", encoding="utf-8") as f:
+        f.write("import mod_0\n\n\nif __name__ == '__main__':\n    print(mod_0.helper_value(1))\n")
+
+    methods = "\n".join(
+        f"    def test_{t}(self):\n        self.assertEqual({t}, {t})\n" for t in range(tests)
+    )
+    with open(os.path.join(root, "generated_tests", "test_synthetic.py"), "w", encoding="utf-8") as f:
+        f.write(f"import unittest\n\n\nclass TestSynthetic(unittest.TestCase):\n{methods}")
+    return root
+
+
+def zip_project(project_dir, zip_path):
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for root, _, files in os.walk(project_dir):
+            for file in files:
+                full = os.path.join(root, file)
+                zf.write(full, os.path.relpath(full, project_dir))
+    return zip_path
+
+
+# ------------------ Timing ------------------
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min_s": round(min(samples), 6),
+        "median_s": round(statistics.median(samples), 6),
+        "max_s": round(max(samples), 6),
+        "repeat": repeat,
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_benchmarks(modules=20, functions=10, depth=3, fan_out=3, tests=20,
+                   log_tests=1000, failure_rate=0.1, repeat=3, seed=0, llm_latency=0.0):
+    """Runs every stage against a fresh synthetic project and returns the results dict."""
+    params = {
+        "modules": modules, "functions": functions, "depth": depth, "fan_out": fan_out,
+        "tests": tests, "log_tests": log_tests, "failure_rate": failure_rate,
+        "repeat": repeat, "seed": seed, "llm_latency": llm_latency,
+    }
+    stages = {}
+    work_dir = tempfile.mkdtemp(prefix="qa_bench_")
+
+    original_backend = set_backend(ReplayBackend(latency_s=llm_latency))
+
+    try:
+        source_dir = generate_project(
+            os.path.join(work_dir, "source"), modules, functions, depth, fan_out, tests, seed
+        )
+        zip_path = zip_project(source_dir, os.path.join(work_dir, "project.zip"))
+        project_dir = os.path.join(work_dir, "project")
+
+        stages["extract_zip"] = _time(lambda: extract_zip(zip_path, extract_to=project_dir), repeat)
+
+        module_paths = [os.path.join(project_dir, f"mod_{i}.py") for i in range(modules)]
+
+        def analyze_all():
+            for path in module_paths:
+                analyzer = CodeAnalyzer(path)
+                for fn in analyzer.extract_functions():
+                    analyzer.calculate_priority(fn)
+
+        stages["extract_functions"] = _time(analyze_all, repeat)
+        stages["rank_project_functions"] = _time(lambda: rank_project_functions(project_dir), repeat)
+
+        context = {}
+
+        def gather():
+            context["text"] = gather_enriched_context(module_paths[0], project_dir)
+
+        stages["gather_enriched_context"] = _time(gather, repeat)
+        stages["generate_tests_with_llm"] = _time(lambda: generate_tests_with_llm(context["text"]), repeat)
+
+        executor = TestExecutorAgent(project_path=project_dir)
+        stages["execute_tests"] = _time(executor.execute_tests, repeat)
+
+        log_path = os.path.join(work_dir, "unittest_output.log")
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write(generate_log(log_tests, failure_rate, random.Random(seed)))
+        reporter = ReportingAgent(log_path)
+        stages["parse_unittest_log"] = _time(reporter.parse_unittest_log, repeat)
+    finally:
+        set_backend(original_backend)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": params,
+        "stages": stages,
+    }
+
+
+def compare_results(current, baseline):
+    """Prints the median-time ratio of every stage against a baseline run."""
+    print(f"\n Comparing against {baseline.get('commit')} ({baseline.get('timestamp')})")
+    if current["params"] != baseline.get("params"):
+        print(" Warning: benchmark parameters differ from the baseline.")
+    for name, stats in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or not base["median_s"]:
+            print(f"   {name:<26} {stats['median_s']:.4f}s (no baseline)")
+            continue
+        ratio = stats["median_s"] / base["median_s"]
+        print(f"   {name:<26} {stats['median_s']:.4f}s vs {base['median_s']:.4f}s  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the test generation pipeline.")
+    parser.add_argument("--modules", type=int, default=20)
+    parser.add_argument("--functions", type=int, default=10, help="functions per module")
+    parser.add_argument("--depth", type=int, default=3, help="nesting depth of function bodies")
+    parser.add_argument("--fan-out", type=int, default=3, help="imports per module")
+    parser.add_argument("--tests", type=int, default=20, help="test methods in the synthetic suite")
+    parser.add_argument("--log-tests", type=int, default=1000, help="tests in the synthetic log")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated LLM latency in seconds")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        modules=args.modules, functions=args.functions, depth=args.depth,
+        fan_out=args.fan_out, tests=args.tests, log_tests=args.log_tests,
+        failure_rate=args.failure_rate, repeat=args.repeat, seed=args.seed,
+        llm_latency=args.llm_latency,
+    )
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n Results saved to: {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare_results(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Pipeline DAG — runs pipeline stages as a dependency graph.
+
+Each Stage declares the values it consumes (inputs) and produces
+(outputs). The scheduler resolves which stages are needed for the
+requested targets, starts every stage whose inputs are ready, and runs
+independent stages concurrently: "thread" stages on a thread pool for
+I/O-bound work, "process" stages on a process pool for CPU-bound work.
+Outputs of cacheable stages are memoised by a hash of their inputs, and
+a stage already running for the same inputs in another run (e.g. a
+background prefetch) is awaited rather than started twice. A run can be
+cancelled between stages through a threading.Event.
+"""
+
+import contextvars
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from pipeline_metrics import span
+from project_manifest import get_manifest
+
+MAX_CACHE_ENTRIES = 128
+# Pipeline outputs inside a project folder; no stage reads them as source
+FINGERPRINT_EXCLUDED_DIRS = ("report", "generated_tests")
+FINGERPRINT_CONFIG_FILES = ("pyproject.toml", "setup.cfg")
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class Stage:
+    def __init__(self, name, func, inputs, outputs, kind="thread", cacheable=True):
+        """
+        func is called with the inputs as keyword arguments and returns the
+        single output value, or a dict keyed by output name when there are
+        several. Process stages need a module-level (picklable) func.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown stage kind: {kind}")
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.kind = kind
+        self.cacheable = cacheable
+
+
+def _source_files(folder):
+    """Python sources and packaging config of a project, without pipeline outputs."""
+    manifest = get_manifest(folder)
+    entries = manifest.python_files() + [
+        e for e in manifest.files("text") if e["name"] in FINGERPRINT_CONFIG_FILES
+    ]
+    return sorted(
+        e["rel_path"] for e in entries
+        if e["rel_path"].split(os.sep)[0] not in FINGERPRINT_EXCLUDED_DIRS
+    )
+
+
+def _fingerprint(value):
+    """
+    Stable digest of an input value. Paths to files or directories are
+    hashed by their stat data so edits invalidate cached outputs. For a
+    directory only the files stages read count (_source_files); they are
+    re-statted every time, since an in-place edit does not show in the
+    cached manifest, while the manifest itself is rescanned only when a
+    directory changed.
+    """
+    h = hashlib.sha256()
+    if isinstance(value, str) and os.path.isfile(value):
+        st = os.stat(value)
+        h.update(f"file:{os.path.abspath(value)}:{st.st_mtime_ns}:{st.st_size}".encode())
+    elif isinstance(value, str) and os.path.isdir(value):
+        h.update(f"dir:{os.path.abspath(value)}".encode())
+        for rel_path in _source_files(value):
+            try:
+                st = os.stat(os.path.join(value, rel_path))
+            except OSError:
+                continue
+            h.update(f"{rel_path}:{st.st_mtime_ns}:{st.st_size}".encode())
+    else:
+        try:
+            h.update(pickle.dumps(value, protocol=4))
+        except Exception:
+            h.update(repr(value).encode())
+    return h.hexdigest()
+
+
+class DAGScheduler:
+    def __init__(self, stages, max_threads=None, max_processes=None):
+        self.stages = {}
+        self.producers = {}
+        for stage in stages:
+            self.add_stage(stage)
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self._process_pool = None
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage):
+        for output in stage.outputs:
+            if output in self.producers:
+                raise ValueError(f"Output '{output}' is produced by more than one stage")
+            self.producers[output] = stage.name
+        self.stages[stage.name] = stage
+
+    def _required_stages(self, targets, available):
+        """Stages needed to produce targets (stage or value names) from available values."""
+        needed = []
+        seen = set()
+
+        def visit(stage_name):
+            if stage_name in seen:
+                return
+            seen.add(stage_name)
+            for name in self.stages[stage_name].inputs:
+                if name in available:
+                    continue
+                if name not in self.producers:
+                    raise KeyError(f"No stage produces '{name}' needed by '{stage_name}'")
+                visit(self.producers[name])
+            needed.append(stage_name)
+
+        for target in targets:
+            if target in self.stages:
+                visit(target)
+            elif target in self.producers:
+                if target not in available:
+                    visit(self.producers[target])
+            elif target not in available:
+                raise KeyError(f"Unknown target: {target}")
+        return needed
+
+    def _cache_key(self, stage, values):
+        parts = [stage.name] + [_fingerprint(values[name]) for name in stage.inputs]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def _get_process_pool(self):
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes)
+        return self._process_pool
+
+    def _run_stage(self, stage, kwargs):
+        with span(stage.name, kind=stage.kind):
+            if stage.kind == "process":
+                result = self._get_process_pool().submit(stage.func, **kwargs).result()
+            else:
+                result = stage.func(**kwargs)
+        if len(stage.outputs) == 1:
+            return {stage.outputs[0]: result}
+        return {name: result[name] for name in stage.outputs}
+
+    def _store(self, key, future):
+        """Done-callback: caches a finished stage even if its run was cancelled."""
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._cache[key] = future.result()
+            while len(self._cache) > MAX_CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+
+    def run(self, inputs, targets, cancel=None):
+        """
+        Runs the stages required for targets and returns all known values
+        (the given inputs plus every output produced along the way).
+        Raises PipelineCancelled once cancel (a threading.Event) is set;
+        stages already running still finish and are cached.
+        """
+        values = dict(inputs)
+        pending = self._required_stages(targets, values)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_threads) as pool:
+            while pending or running:
+                if cancel is not None and cancel.is_set():
+                    raise PipelineCancelled(f"Cancelled with {len(pending)} stage(s) not started")
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for name in list(pending):
+                        stage = self.stages[name]
+                        if not all(i in values for i in stage.inputs):
+                            continue
+                        pending.remove(name)
+                        progressed = True
+                        kwargs = {i: values[i] for i in stage.inputs}
+
+                        key = self._cache_key(stage, values) if stage.cacheable else None
+                        ctx = contextvars.copy_context()
+                        if key is None:
+                            running[pool.submit(ctx.run, self._run_stage, stage, kwargs)] = name
+                            continue
+
+                        # Look up and register under one lock so concurrent runs
+                        # cannot both miss and start the same stage twice
+                        cached = shared = future = None
+                        with self._lock:
+                            cached = self._cache.get(key)
+                            if cached is not None:
+                                self._cache.move_to_end(key)
+                            else:
+                                shared = self._inflight.get(key)
+                                if shared is None:
+                                    future = pool.submit(ctx.run, self._run_stage, stage, kwargs)
+                                    self._inflight[key] = future
+                        if cached is not None:
+                            print(f" [DAG] {name}: cached")
+                            values.update(cached)
+                        elif shared is not None:
+                            print(f" [DAG] {name}: waiting for the run already in progress")
+                            running[shared] = name
+                        else:
+                            running[future] = name
+                            future.add_done_callback(lambda f, key=key: self._store(key, f))
+
+                if not running:
+                    if pending:
+                        raise RuntimeError(f"Stages can never run: {pending}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    values.update(future.result())
+
+        return values
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        if self._process_pool is not None:
+            self._process_pool.shutdown(cancel_futures=True)
+            self._process_pool = None
@@ -0,0 +1,238 @@
+"""
+Pipeline Metrics — lightweight per-stage tracing.
+
+Each stage runs inside a span that records wall time, CPU time, bytes
+read and LLM token usage. Finished spans are kept on the active tracer
+and optionally appended to a JSON lines file.
+
+Peak memory (tracemalloc) is opt-in: trace_memory=True or
+PIPELINE_TRACE_MEMORY=1. tracemalloc slows every allocation in the
+process, so it runs only while a memory-tracing span is open. Its peak is process-wide, so with concurrent sessions or DAG
+threads a span's peak includes their allocations too.
+
+    tracer = PipelineTracer("report/pipeline_trace.jsonl")
+    with use_tracer(tracer):
+        with span("extract"):
+            ...
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from llm_usage import estimate_cost
+
+TRACE_FILE_ENV = "PIPELINE_TRACE_FILE"
+TRACE_MEMORY_ENV = "PIPELINE_TRACE_MEMORY"
+MAX_KEPT_SPANS = 10000
+
+# Open memory-tracing spans; tracemalloc is stopped when the last one closes
+_memory_spans = 0
+_memory_started = False
+_memory_lock = threading.Lock()
+
+
+def _start_memory_tracing():
+    global _memory_spans, _memory_started
+    with _memory_lock:
+        if _memory_spans == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _memory_started = True
+        _memory_spans += 1
+
+
+def _stop_memory_tracing():
+    global _memory_spans, _memory_started
+    with _memory_lock:
+        _memory_spans -= 1
+        # Leave tracemalloc alone if someone else started it
+        if _memory_spans == 0 and _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+
+
+class Span:
+    def __init__(self, name, parent=None, attrs=None):
+        self.name = name
+        self.parent = parent
+        self.span_id = uuid.uuid4().hex[:12]
+        self.attrs = dict(attrs or {})
+        self.counters = {}
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_mem_bytes = 0
+        self.status = "ok"
+        self.error = None
+        self.started_at = time.time()
+        self._observed_peak = 0
+
+    def add(self, key, value):
+        """Accumulate a numeric counter (bytes_read, prompt_tokens, ...)."""
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    def to_dict(self):
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "started_at": round(self.started_at, 6),
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "peak_mem_bytes": self.peak_mem_bytes,
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs,
+            **self.counters,
+        }
+
+
+class PipelineTracer:
+    def __init__(self, jsonl_path=None, trace_memory=None, max_spans=MAX_KEPT_SPANS):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.jsonl_path = jsonl_path or os.getenv(TRACE_FILE_ENV)
+        if trace_memory is None:
+            trace_memory = os.getenv(TRACE_MEMORY_ENV, "0") == "1"
+        self.trace_memory = trace_memory
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name, **attrs):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        current = Span(name, parent, attrs)
+
+        mem_start = 0
+        if self.trace_memory:
+            _start_memory_tracing()
+            # reset_peak() is process-wide, so the enclosing span's peak so far
+            # is carried over by hand when this span closes.
+            mem_start, outer_peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent._observed_peak = max(parent._observed_peak, outer_peak)
+            tracemalloc.reset_peak()
+
+        stack.append(current)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield current
+        except BaseException as e:
+            current.status = "error"
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.wall_s = time.perf_counter() - wall_start
+            current.cpu_s = time.thread_time() - cpu_start
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, current._observed_peak)
+                current.peak_mem_bytes = max(0, peak - mem_start)
+                if parent is not None:
+                    parent._observed_peak = max(parent._observed_peak, peak)
+                _stop_memory_tracing()
+            stack.pop()
+            self._finish(current)
+
+    def _finish(self, finished):
+        record = finished.to_dict()
+        record["run_id"] = self.run_id
+        with self._lock:
+            self.spans.append(record)
+            if self.jsonl_path:
+                directory = os.path.dirname(os.path.abspath(self.jsonl_path))
+                os.makedirs(directory, exist_ok=True)
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def summary(self):
+        """Totals per span name, in the order stages first finished."""
+        totals = {}
+        with self._lock:
+            for record in self.spans:
+                entry = totals.setdefault(record["name"], {
+                    "count": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_mem_bytes": 0,
+                    "bytes_read": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+                })
+                entry["count"] += 1
+                entry["wall_s"] += record["wall_s"]
+                entry["cpu_s"] += record["cpu_s"]
+                entry["peak_mem_bytes"] = max(entry["peak_mem_bytes"], record["peak_mem_bytes"])
+                for key in ("bytes_read", "prompt_tokens", "completion_tokens", "cost_usd"):
+                    entry[key] += record.get(key, 0)
+        return totals
+
+    def print_summary(self):
+        print("\n Pipeline Stage Metrics:")
+        for name, m in self.summary().items():
+            print(
+                f"   {name:<18} wall {m['wall_s']:.3f}s  cpu {m['cpu_s']:.3f}s  "
+                f"peak {m['peak_mem_bytes'] / 1024:.0f} KiB  read {m['bytes_read']} B  "
+                f"tokens {m['prompt_tokens']}+{m['completion_tokens']}  ${m['cost_usd']:.4f}"
+            )
+
+
+_default_tracer = PipelineTracer()
+_active_tracer = ContextVar("pipeline_tracer", default=None)
+
+
+def get_tracer():
+    return _active_tracer.get() or _default_tracer
+
+
+@contextmanager
+def use_tracer(tracer):
+    """Make tracer the active one for the current context (thread / session run)."""
+    token = _active_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _active_tracer.reset(token)
+
+
+def activate_tracer(tracer):
+    """Make tracer active for the rest of the current context (e.g. a Streamlit rerun)."""
+    _active_tracer.set(tracer)
+
+
+def span(name, **attrs):
+    """Open a span on the active tracer."""
+    return get_tracer().span(name, **attrs)
+
+
+def record(key, value):
+    """Add a counter to the innermost open span, if any."""
+    current = get_tracer().current()
+    if current is not None:
+        current.add(key, value)
+
+
+def record_llm_usage(response):
+    """Record token usage and estimated cost from an LLMResponse on the current span."""
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return
+    prompt = usage.get("prompt_tokens", 0)
+    completion = usage.get("completion_tokens", 0)
+    record("prompt_tokens", prompt)
+    record("completion_tokens", completion)
+    record("cost_usd", estimate_cost(getattr(response, "model", ""), prompt, completion))
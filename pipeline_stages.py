@@ -0,0 +1,213 @@
+"""
+Pipeline Stages — the test generation pipeline expressed as a DAG.
+
+    zip_path, extract_dir -> extract -> folder
+    folder -> entry_detection -> entry_candidates -> import_analysis
+    target_file -> ast | analysis | context   (run concurrently)
+    folder -> call_graph;  functions + call_graph -> ranking -> ranked_functions
+    ranked_functions -> baseline (LLM-free tests)
+    context -> generate (+ pre-flight repair loop) -> save -> execute -> parse -> report
+    test_results -> export (JUnit XML + JSON, no LLM or PDF step)
+
+main.py and app.py both drive the shared scheduler returned by
+get_scheduler().
+"""
+
+import os
+import threading
+
+from baseline_test_generator import generate_baseline_tests, llm_focus_note, save_baseline_tests
+from call_graph import build_call_graph
+from code_analyzer import CodeAnalyzer
+from context_enricher import (
+    extract_imports_from_file,
+    find_local_imported_files,
+    gather_enriched_context,
+    generate_tests_with_llm,
+    save_generated_tests,
+)
+from llm_backend import get_backend
+from llm_usage import get_ledger
+from pipeline_dag import DAGScheduler, Stage
+from priority_scoring import graph_metrics, rank_functions
+from preflight_checker import format_diagnostics, generate_with_preflight
+from project_analyzer import extract_zip, generate_ast_outline, rank_entry_candidates
+from reporting_agent import ReportingAgent
+from Test_executor_agent import TestExecutorAgent
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+# ------------------ Stage Functions ------------------
+def extract_stage(zip_path, extract_dir):
+    folder = extract_zip(zip_path, extract_to=extract_dir)
+
+    # Ensure package structure
+    for sub in ["", "src", "generated_tests"]:
+        init_path = os.path.join(folder, sub, "__init__.py")
+        os.makedirs(os.path.dirname(init_path), exist_ok=True)
+        if not os.path.exists(init_path):
+            open(init_path, "w").close()
+    return folder
+
+
+def entry_detection_stage(folder):
+    return rank_entry_candidates(folder)
+
+
+def import_analysis_stage(entry_candidates, folder):
+    import_map = {}
+    for candidate in entry_candidates:
+        imports = extract_imports_from_file(candidate["path"])
+        import_map[candidate["path"]] = {
+            "imports": imports,
+            "local_files": find_local_imported_files(imports, folder),
+        }
+    return import_map
+
+
+def ast_stage(target_file):
+    return generate_ast_outline(target_file)
+
+
+def analysis_stage(target_file):
+    """Returns the target's function records."""
+    return CodeAnalyzer(target_file).extract_functions()
+
+
+def call_graph_stage(folder):
+    return build_call_graph(folder)
+
+
+def ranking_stage(functions, call_graph, folder, entry_candidates):
+    entry_files = [c["path"] for c in entry_candidates if set(c["reasons"]) - {"defines_functions"}]
+    fan_in, reachable = graph_metrics(folder, functions, call_graph, entry_files)
+    return rank_functions(functions, fan_in=fan_in, reachable=reachable)
+
+
+def context_stage(target_file, folder):
+    return gather_enriched_context(target_file, folder)
+
+
+def baseline_stage(target_file, folder, ranked_functions):
+    test_code = generate_baseline_tests(target_file, folder, ranked_functions)
+    return save_baseline_tests(os.path.join(folder, "generated_tests"), target_file, test_code)
+
+
+def generate_stage(context, target_file, folder, ranked_functions):
+    if not get_backend().available():
+        print(" LLM unavailable — using baseline tests only.")
+        preflight = {"ok": False, "attempts": 0, "diagnostics": []}
+        return {"test_code": "", "preflight": preflight}
+
+    # Baseline tests cover every function; point the LLM at the riskiest ones
+    test_code, preflight = generate_with_preflight(
+        context + llm_focus_note(ranked_functions), target_file, folder,
+        generate=generate_tests_with_llm,
+    )
+    return {"test_code": test_code, "preflight": preflight}
+
+
+def save_stage(folder, target_file, test_code, preflight, baseline_path):
+    if not preflight["ok"]:
+        if preflight["diagnostics"]:
+            print(" Generated tests rejected by pre-flight checks:")
+            print(format_diagnostics(preflight["diagnostics"]))
+        # Baseline tests are still worth running
+        return baseline_path
+    return save_generated_tests(
+        save_dir=os.path.join(folder, "generated_tests"),
+        target_file=target_file,
+        test_code=test_code,
+    )
+
+
+def execute_stage(folder, test_path):
+    if test_path is None:
+        return {"status": "rejected", "message": "Generated tests failed pre-flight checks"}
+    executor = TestExecutorAgent(project_path=folder)
+    return executor.execute_tests()
+
+
+def parse_stage(test_results):
+    log_path = test_results.get("log_report")
+    if not log_path or not os.path.exists(log_path):
+        print(" Test log not found. Skipping report generation.")
+        return None
+    return ReportingAgent(log_path).parse_unittest_log()
+
+
+def report_stage(test_results, test_summary, folder, ai_analysis_enabled):
+    if test_summary is None:
+        return None
+
+    reporter = ReportingAgent(test_results["log_report"])
+    reporter.results = test_summary
+
+    ai_analysis = reporter.analyze_with_llm(test_summary) if ai_analysis_enabled else ""
+    reporter.llm_usage = get_ledger().summary_lines()
+
+    markdown_report = reporter.generate_markdown_report(test_summary, ai_analysis)
+    md_path = reporter.save_markdown_report(
+        markdown_report, os.path.join(folder, "test_report.md")
+    )
+
+    pdf_path = os.path.join(folder, "ai_test_report.pdf")
+    reporter.generate_pdf_report(pdf_path)
+    return {"markdown": str(md_path), "pdf": pdf_path}
+
+
+def export_stage(test_results):
+    log_path = test_results.get("log_report")
+    if not log_path or not os.path.exists(log_path) or not test_results.get("results_file"):
+        return None
+    return ReportingAgent(log_path).export_results(test_results["results_file"])
+
+
+# ------------------ Pipeline Definition ------------------
+def build_stages():
+    return [
+        Stage("extract", extract_stage, ["zip_path", "extract_dir"], ["folder"], cacheable=False),
+        Stage("entry_detection", entry_detection_stage, ["folder"], ["entry_candidates"]),
+        Stage("import_analysis", import_analysis_stage, ["entry_candidates", "folder"], ["import_map"]),
+        Stage("ast", ast_stage, ["target_file"], ["ast_outline"]),
+        # One file parses in milliseconds: a thread keeps its bytes_read span and
+        # avoids forking a process pool inside the threaded Streamlit server
+        Stage("analysis", analysis_stage, ["target_file"], ["functions"]),
+        Stage("call_graph", call_graph_stage, ["folder"], ["call_graph"]),
+        Stage(
+            "ranking", ranking_stage, ["functions", "call_graph", "folder", "entry_candidates"],
+            ["ranked_functions"], cacheable=False,
+        ),
+        Stage("context", context_stage, ["target_file", "folder"], ["context"]),
+        Stage(
+            "baseline", baseline_stage, ["target_file", "folder", "ranked_functions"],
+            ["baseline_path"], cacheable=False,
+        ),
+        Stage(
+            "generate", generate_stage, ["context", "target_file", "folder", "ranked_functions"],
+            ["test_code", "preflight"], cacheable=False,
+        ),
+        Stage(
+            "save", save_stage, ["folder", "target_file", "test_code", "preflight", "baseline_path"],
+            ["test_path"], cacheable=False,
+        ),
+        Stage("execute", execute_stage, ["folder", "test_path"], ["test_results"], cacheable=False),
+        Stage("parse", parse_stage, ["test_results"], ["test_summary"], cacheable=False),
+        Stage(
+            "report", report_stage,
+            ["test_results", "test_summary", "folder", "ai_analysis_enabled"],
+            ["report_paths"], cacheable=False,
+        ),
+        Stage("export", export_stage, ["test_results"], ["export_paths"], cacheable=False),
+    ]
+
+
+def get_scheduler():
+    """Process-wide scheduler shared by the CLI and the Streamlit app."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DAGScheduler(build_stages())
+        return _scheduler
@@ -0,0 +1,84 @@
+"""
+Prefetch — speculative analysis of a project right after upload.
+
+As soon as a project is extracted, a background thread runs the cacheable
+per-file stages (AST outline, function analysis, import resolution,
+enriched context) and the project call graph for the detected entry
+files, best candidates first. When the user then picks a target, the
+scheduler finds the results in its cache, or joins a stage that is still
+running instead of starting it again.
+
+cancel() stops a prefetch between stages, e.g. when another project is
+uploaded. Only real entry points (score > 0) and the top candidate, the
+target preselected in the UI, are prefetched; PREFETCH_MAX_FILES caps
+how many.
+"""
+
+import contextvars
+import os
+import threading
+
+from pipeline_dag import PipelineCancelled
+
+DEFAULT_MAX_FILES = 12
+PREFETCH_TARGETS = ["call_graph", "import_map", "ast_outline", "functions", "context"]
+
+
+class Prefetcher:
+    def __init__(self, scheduler, folder, entry_candidates, max_files=None):
+        self.scheduler = scheduler
+        self.folder = folder
+        self.entry_candidates = entry_candidates
+        self.max_files = int(max_files or os.getenv("PREFETCH_MAX_FILES", DEFAULT_MAX_FILES))
+        likely = [c for i, c in enumerate(entry_candidates) if i == 0 or c["score"] > 0]
+        self.files = [c["path"] for c in likely[: self.max_files]]
+        self.done = []
+        self.failed = {}
+        self.status = "pending"
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        self.status = "running"
+        try:
+            for target_file in self.files:
+                try:
+                    self.scheduler.run(
+                        {"folder": self.folder, "target_file": target_file, "entry_candidates": self.entry_candidates},
+                        targets=PREFETCH_TARGETS,
+                        cancel=self._cancel,
+                    )
+                    self.done.append(target_file)
+                except PipelineCancelled:
+                    raise
+                except Exception as e:
+                    # The foreground run will hit and report the same error
+                    self.failed[target_file] = str(e)
+            self.status = "done"
+        except PipelineCancelled:
+            self.status = "cancelled"
+            print(f" [Prefetch] cancelled for {self.folder}")
+
+    def start(self):
+        if self._thread is None:
+            # Spans and LLM accounting go to the starting session's tracer / ledger
+            ctx = contextvars.copy_context()
+            self._thread = threading.Thread(target=ctx.run, args=(self._run,), name="prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def cancel(self, wait=False):
+        self._cancel.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def is_ready(self, target_file):
+        return target_file in self.done
+
+    def progress(self):
+        return {
+            "status": self.status,
+            "ready": len(self.done),
+            "failed": len(self.failed),
+            "total": len(self.files),
+        }
@@ -0,0 +1,217 @@
+"""
+Pre-flight Checker — validates generated test code in-process before it is
+saved and executed, so broken output is rejected in milliseconds rather
+than after a subprocess run.
+
+Checks:
+ - the module compiles
+ - every imported module resolves (stdlib, installed, or in the project)
+ - names imported from the target module exist in it
+ - no name is used that is never bound anywhere in the test module
+"""
+
+import ast
+import builtins
+import importlib.util
+import os
+import sys
+
+from llm_usage import LLMBudgetExceeded
+from parse_cache import parse_file
+from project_manifest import get_manifest
+
+PREFLIGHT_MAX_ATTEMPTS = int(os.getenv("PREFLIGHT_MAX_ATTEMPTS", "3"))
+
+_BUILTIN_NAMES = set(dir(builtins)) | {"__file__", "__name__", "__doc__", "__spec__", "__package__"}
+
+
+def _diagnostic(kind, line, message):
+    return {"kind": kind, "line": line, "message": message}
+
+
+def project_module_names(project_root):
+    """Top-level module and package names available inside the project."""
+    names = set()
+    for entry in get_manifest(project_root).python_files():
+        parts = entry["rel_path"].split(os.sep)
+        names.update(parts[:-1])
+        names.add(os.path.splitext(parts[-1])[0])
+    return names
+
+
+def _module_resolves(name, local_modules):
+    top = name.split(".")[0]
+    if top in local_modules or top in sys.stdlib_module_names:
+        return True
+    try:
+        # find_spec on a top-level name locates it without importing it
+        return importlib.util.find_spec(top) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _target_symbols(target_file):
+    """Names bound at the top level of the target module."""
+    tree = parse_file(target_file)
+    symbols = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            symbols.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                symbols.add((alias.asname or alias.name).split(".")[0])
+        else:
+            for sub in ast.walk(node):
+                if isinstance(sub, ast.Name) and isinstance(sub.ctx, ast.Store):
+                    symbols.add(sub.id)
+                elif isinstance(sub, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    symbols.add(sub.name)
+    return symbols
+
+
+def _bound_names(tree):
+    """Every name bound anywhere in the module (flow-insensitive)."""
+    bound = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                bound.add((alias.asname or alias.name).split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            bound.add(node.name)
+    return bound
+
+
+def preflight_check(test_code, target_file, project_root):
+    """
+    Returns {"ok": bool, "diagnostics": [...]} for the given test code.
+    """
+    diagnostics = []
+
+    try:
+        tree = ast.parse(test_code, filename="<generated_tests>")
+        compile(tree, "<generated_tests>", "exec")
+    except SyntaxError as e:
+        diagnostics.append(_diagnostic("syntax", e.lineno, f"{e.msg}"))
+        return {"ok": False, "diagnostics": diagnostics}
+
+    local_modules = project_module_names(project_root)
+    target_module = os.path.splitext(os.path.basename(target_file))[0]
+    try:
+        target_symbols = _target_symbols(target_file)
+    except (OSError, SyntaxError):
+        target_symbols = None
+    target_aliases = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if not _module_resolves(alias.name, local_modules):
+                    diagnostics.append(_diagnostic("import", node.lineno, f"Module not found: {alias.name}"))
+                if alias.name.split(".")[-1] == target_module:
+                    # `import src.main` binds `src`; the module is reached as `src.main`
+                    target_aliases.add(alias.asname or alias.name)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            if not _module_resolves(node.module, local_modules):
+                diagnostics.append(_diagnostic("import", node.lineno, f"Module not found: {node.module}"))
+            elif node.module.split(".")[-1] == target_module and target_symbols is not None:
+                for alias in node.names:
+                    if alias.name != "*" and alias.name not in target_symbols:
+                        diagnostics.append(_diagnostic(
+                            "symbol", node.lineno,
+                            f"'{alias.name}' is not defined in {target_module}",
+                        ))
+
+    bound = _bound_names(tree)
+    # A star import can bind anything, so undefined-name checks are skipped
+    has_star_import = any(
+        isinstance(node, ast.ImportFrom) and any(a.name == "*" for a in node.names)
+        for node in ast.walk(tree)
+    )
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and not has_star_import:
+            if node.id not in bound and node.id not in _BUILTIN_NAMES:
+                diagnostics.append(_diagnostic("name", node.lineno, f"Undefined name: {node.id}"))
+        elif (
+            target_symbols is not None
+            and isinstance(node, ast.Attribute)
+            and _dotted_name(node.value) in target_aliases
+            and node.attr not in target_symbols
+        ):
+            diagnostics.append(_diagnostic(
+                "symbol", node.lineno, f"'{node.attr}' is not defined in {target_module}",
+            ))
+
+    return {"ok": not diagnostics, "diagnostics": diagnostics}
+
+
+def _dotted_name(node):
+    """'a.b.c' for a Name / Attribute chain, else None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def format_diagnostics(diagnostics):
+    return "\n".join(f"- line {d['line']}: [{d['kind']}] {d['message']}" for d in diagnostics)
+
+
+def build_repair_context(enriched_context, test_code, diagnostics):
+    """Appends the failed attempt and its diagnostics to the generation context."""
+    return (
+        f"{enriched_context}\n\n"
+        "=======\n"
+        "YOUR PREVIOUS ATTEMPT FAILED THESE PRE-FLIGHT CHECKS. FIX THEM:\n"
+        f"{format_diagnostics(diagnostics)}\n\n"
+        "PREVIOUS ATTEMPT:\n"
+        f"{test_code}\n"
+    )
+
+
+def generate_with_preflight(enriched_context, target_file, project_root, generate,
+                            max_attempts=PREFLIGHT_MAX_ATTEMPTS):
+    """
+    Calls generate(context) until the result passes preflight_check or
+    max_attempts is reached. Returns (test_code, report) where report
+    holds the final check result and the number of attempts made.
+    """
+    context = enriched_context
+    test_code = ""
+    result = {"ok": False, "diagnostics": []}
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            test_code = generate(context)
+        except LLMBudgetExceeded as e:
+            print(f" {e}")
+            result = {"ok": False, "diagnostics": [_diagnostic("budget", None, str(e))]}
+            break
+        if not test_code.strip():
+            result = {"ok": False, "diagnostics": [_diagnostic("empty", None, "No test code generated")]}
+            break
+
+        result = preflight_check(test_code, target_file, project_root)
+        if result["ok"]:
+            print(f" Pre-flight passed (attempt {attempt}).")
+            break
+
+        print(f" Pre-flight failed (attempt {attempt}/{max_attempts}):")
+        print(format_diagnostics(result["diagnostics"]))
+        context = build_repair_context(enriched_context, test_code, result["diagnostics"])
+
+    result["attempts"] = attempt
+    return test_code, result
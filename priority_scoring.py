@@ -0,0 +1,171 @@
+"""
+Priority Scoring — vectorised function prioritisation.
+
+Function metrics are stored as columns of a NumPy matrix and scored
+with a weight vector in one matrix-vector product; the top-K functions
+are picked with np.argpartition instead of a full sort.
+
+The default weights start from CodeAnalyzer.calculate_priority
+(complexity + 2 if async + 1 if more than 3 args) and add the call-graph
+signals: +0.5 per call site in the project calling the function (fan_in)
+and +1 if it is reachable from an entry file (entry_reachable), so widely
+used code on a live path is tested first. Override them with a JSON
+object in PRIORITY_WEIGHTS or a JSON file named by PRIORITY_WEIGHTS_FILE,
+e.g. PRIORITY_WEIGHTS='{"fan_in": 0, "entry_reachable": 0}' for the
+plain CodeAnalyzer ranking.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from call_graph import build_call_graph, entry_module_nodes, qualified_name
+from code_analyzer import CodeAnalyzer
+from project_manifest import get_manifest
+
+METRIC_COLUMNS = [
+    "complexity", "calls", "args", "many_args", "fan_in", "loc", "nesting", "is_async",
+    "entry_reachable",
+]
+
+DEFAULT_WEIGHTS = {
+    "complexity": 1.0,
+    "calls": 0.0,
+    "args": 0.0,
+    "many_args": 1.0,
+    "fan_in": 0.5,
+    "loc": 0.0,
+    "nesting": 0.0,
+    "is_async": 2.0,
+    "entry_reachable": 1.0,
+}
+
+
+def load_weights(overrides=None):
+    """Default weights updated from PRIORITY_WEIGHTS(_FILE) and overrides."""
+    weights = dict(DEFAULT_WEIGHTS)
+    weights_file = os.getenv("PRIORITY_WEIGHTS_FILE")
+    if weights_file and os.path.exists(weights_file):
+        with open(weights_file, "r", encoding="utf-8") as f:
+            weights.update(json.load(f))
+    if os.getenv("PRIORITY_WEIGHTS"):
+        weights.update(json.loads(os.environ["PRIORITY_WEIGHTS"]))
+    if overrides:
+        weights.update(overrides)
+
+    unknown = set(weights) - set(METRIC_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown priority weights: {sorted(unknown)}")
+    return weights
+
+
+def weight_vector(weights):
+    return np.array([weights[name] for name in METRIC_COLUMNS], dtype=np.float64)
+
+
+def compute_fan_in(functions):
+    """Number of call sites naming each function, across all given records."""
+    counts = {}
+    for fn in functions:
+        for call in fn.get("calls", []):
+            counts[call] = counts.get(call, 0) + 1
+    return [counts.get(fn["name"], 0) for fn in functions]
+
+
+class FunctionMetrics:
+    def __init__(self, functions, fan_in=None, reachable=None):
+        self.functions = functions
+        n = len(functions)
+        self.matrix = np.zeros((n, len(METRIC_COLUMNS)), dtype=np.float64)
+        if not n:
+            return
+
+        if fan_in is None:
+            fan_in = compute_fan_in(functions)
+
+        columns = {
+            "complexity": [fn["complexity"] for fn in functions],
+            "calls": [len(fn.get("calls", [])) for fn in functions],
+            "args": [len(fn["args"]) for fn in functions],
+            "fan_in": fan_in,
+            "loc": [fn.get("loc", 0) for fn in functions],
+            "nesting": [fn.get("nesting", 0) for fn in functions],
+            "is_async": [fn["is_async"] for fn in functions],
+            "entry_reachable": reachable if reachable is not None else [0] * n,
+        }
+        for name, values in columns.items():
+            self.matrix[:, METRIC_COLUMNS.index(name)] = values
+        args_col = self.matrix[:, METRIC_COLUMNS.index("args")]
+        self.matrix[:, METRIC_COLUMNS.index("many_args")] = args_col > 3
+
+    def column(self, name):
+        return self.matrix[:, METRIC_COLUMNS.index(name)]
+
+    def scores(self, weights=None):
+        return self.matrix @ weight_vector(load_weights(weights))
+
+    def top_k_indices(self, k, scores):
+        """Indices of the k best scores, best first (ties broken by position)."""
+        n = len(scores)
+        if k >= n:
+            return np.lexsort((np.arange(n), -scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order]
+
+
+def _as_priority(value):
+    value = round(float(value), 2)
+    return int(value) if value.is_integer() else value
+
+
+def graph_metrics(project_root, functions, graph, entry_files=()):
+    """Call-graph fan-in and entry reachability for records carrying a "file" key."""
+    fan_in_all = graph.fan_in_array()
+    reachable_all = graph.reachable_mask(entry_module_nodes(project_root, entry_files))
+    fan_in, reachable = [], []
+    for fn in functions:
+        i = graph.index.get(qualified_name(project_root, fn))
+        fan_in.append(int(fan_in_all[i]) if i is not None else 0)
+        reachable.append(bool(reachable_all[i]) if i is not None else False)
+    return fan_in, reachable
+
+
+def rank_functions(functions, weights=None, top_k=None, fan_in=None, reachable=None):
+    """
+    Sets fn["priority"] on every record and returns them best first,
+    limited to the top_k when given.
+    """
+    metrics = FunctionMetrics(functions, fan_in, reachable)
+    if not functions:
+        return []
+    scores = metrics.scores(weights)
+    for fn, score in zip(functions, scores):
+        fn["priority"] = _as_priority(score)
+    order = metrics.top_k_indices(top_k or len(functions), scores)
+    return [functions[i] for i in order]
+
+
+def _analyze_file(path):
+    try:
+        return CodeAnalyzer(path).extract_functions()
+    except (SyntaxError, UnicodeDecodeError, OSError) as e:
+        print(f"Skipping {path}: {e}")
+        return []
+
+
+def rank_project_functions(project_root, weights=None, top_k=50, max_workers=None, entry_files=()):
+    """
+    Analyzes every non-test module in the project and ranks all functions
+    together, using call-graph fan-in and reachability from entry_files.
+    """
+    paths = [
+        os.path.join(project_root, e["rel_path"])
+        for e in get_manifest(project_root).files("python")
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        functions = [fn for result in pool.map(_analyze_file, paths) for fn in result]
+    fan_in, reachable = graph_metrics(project_root, functions, build_call_graph(project_root), entry_files)
+    return rank_functions(functions, weights, top_k, fan_in, reachable)
@@ -8,10 +8,33 @@ import os
 import shutil
 import zipfile
 import ast
+import configparser
+import tomllib
 from tkinter import Tk, filedialog
-import ast
 from pathlib import Path
 import astpretty
+from parse_cache import parse_file
+from project_manifest import get_manifest, import_roots, invalidate_manifest, module_rel_paths
+
+AST_PAGE_SIZE = 50
+AST_MAX_DEPTH = 1
+AST_MAX_VALUE_LEN = 80
+
+ENTRY_FILENAMES = {
+    "main.py", "app.py", "run.py", "manage.py", "index.py", "__main__.py", "cli.py"
+}
+
+# Score contributed by each entry-point signal. Nearly every module defines
+# functions, so that signal only keeps a file selectable as a test target
+# and breaks ties; it does not make the file an entry point.
+ENTRY_SCORES = {
+    "console_script": 6,
+    "main_guard": 5,
+    "dunder_main": 4,
+    "entry_filename": 3,
+    "side_effects": 2,
+    "defines_functions": 0,
+}
 
 def extract_zip(zip_path, extract_to="extracted"):
     """
@@ -20,6 +43,7 @@ def extract_zip(zip_path, extract_to="extracted"):
     """
     if os.path.exists(extract_to):
         shutil.rmtree(extract_to)
+    invalidate_manifest(extract_to)
 
     os.makedirs(extract_to, exist_ok=True)
 
@@ -30,29 +54,131 @@ def extract_zip(zip_path, extract_to="extracted"):
     return extract_to
 
 
-def find_python_entry_files(folder):
+def _console_script_modules(folder):
+    """
+    Collects module paths declared as console scripts in pyproject.toml
+    ([project.scripts] / Poetry scripts) and setup.cfg (console_scripts).
+    """
+    targets = []
+
+    pyproject = os.path.join(folder, "pyproject.toml")
+    if os.path.isfile(pyproject):
+        try:
+            with open(pyproject, "rb") as f:
+                data = tomllib.load(f)
+            scripts = dict(data.get("project", {}).get("scripts", {}))
+            scripts.update(data.get("tool", {}).get("poetry", {}).get("scripts", {}))
+            targets.extend(v for v in scripts.values() if isinstance(v, str))
+        except Exception as e:
+            print(f"Could not read {pyproject}: {e}")
+
+    setup_cfg = os.path.join(folder, "setup.cfg")
+    if os.path.isfile(setup_cfg):
+        parser = configparser.ConfigParser()
+        try:
+            parser.read(setup_cfg, encoding="utf-8")
+            raw = parser.get("options.entry_points", "console_scripts", fallback="")
+            targets.extend(line.split("=", 1)[1] for line in raw.splitlines() if "=" in line)
+        except Exception as e:
+            print(f"Could not read {setup_cfg}: {e}")
+
+    modules = set()
+    for target in targets:
+        module = target.split(":", 1)[0].strip()
+        if module:
+            modules.add(module)
+    return modules
+
+
+def _is_main_guard(node):
+    if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+        return False
+    names = [node.test.left, *node.test.comparators]
+    has_name = any(isinstance(n, ast.Name) and n.id == "__name__" for n in names)
+    has_main = any(isinstance(n, ast.Constant) and n.value == "__main__" for n in names)
+    return has_name and has_main
+
+
+def _entry_signals(file_path):
+    """Parses one file and returns the entry-point signals found in it."""
+    signals = set()
+    try:
+        tree = parse_file(file_path)
+    except Exception:
+        return signals
+
+    for idx, node in enumerate(tree.body):
+        if _is_main_guard(node):
+            signals.add("main_guard")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            signals.add("defines_functions")
+        elif isinstance(node, ast.Expr):
+            is_docstring = idx == 0 and isinstance(node.value, ast.Constant)
+            if isinstance(node.value, (ast.Call, ast.Await)) and not is_docstring:
+                signals.add("side_effects")
+        elif isinstance(node, (ast.For, ast.While, ast.With, ast.AsyncFor, ast.AsyncWith)):
+            signals.add("side_effects")
+    return signals
+
+
+def rank_entry_candidates(folder):
     """
-    Searches for main Python entry files like main.py, app.py, etc.
-    Returns a list of found entry file paths.
+    Scores every non-test Python file in the project as an entry point /
+    test target. Files are parsed once, sequentially (parsing holds the
+    GIL, so threads would not help), through the shared parse cache.
+    Returns a list of {"path", "score", "reasons"} sorted by score; files
+    whose only signal is defining functions come last, with score 0.
     """
-    
-    entry_candidates = [
-        "main.py", "app.py", "run.py", "manage.py", "index.py", "__main__.py"
-    ]
-    found_entries = []
+    manifest = get_manifest(folder)
+    files = manifest.files("python")
+    script_paths = set()
+    roots = import_roots(folder)
+    for module in _console_script_modules(folder):
+        script_paths |= module_rel_paths(module, roots)
+
+    paths = [os.path.join(folder, e["rel_path"]) for e in files]
+    all_signals = [_entry_signals(path) for path in paths]
+
+    candidates = []
+    for entry, path, signals in zip(files, paths, all_signals):
+        name = entry["name"].lower()
+        if name == "__main__.py":
+            signals.add("dunder_main")
+        if name in ENTRY_FILENAMES:
+            signals.add("entry_filename")
+        if os.path.normpath(entry["rel_path"]) in script_paths:
+            signals.add("console_script")
+
+        score = sum(ENTRY_SCORES[s] for s in signals)
+        if signals:
+            candidates.append({
+                "path": path,
+                "score": score,
+                "reasons": sorted(signals, key=lambda s: -ENTRY_SCORES[s]),
+            })
 
-    for root, _, files in os.walk(folder):
-        for file in files:
-            if file.lower() in entry_candidates:
-                full_path = os.path.join(root, file)
-                found_entries.append(full_path)
+    candidates.sort(key=lambda c: (-c["score"], "defines_functions" not in c["reasons"], c["path"]))
+    return candidates
+
+
+def find_python_entry_files(folder, limit=None):
+    """
+    Detects Python entry files (main guards, console scripts, known
+    filenames, module-level side effects) and returns their paths,
+    best candidates first. Modules that only define functions are not
+    entry files.
+    """
+    candidates = [c for c in rank_entry_candidates(folder) if c["score"] > 0]
+    if limit is not None:
+        candidates = candidates[:limit]
+    found_entries = [c["path"] for c in candidates]
 
     if found_entries:
         print("\n Possible Python entry files found:")
-        for f in found_entries:
-            print(f"   • {f}")
+        for c in candidates:
+            print(f"   • {c['path']} (score {c['score']}: {', '.join(c['reasons'])})")
     else:
-        print("\n No common Python entry file found.")
+        print("\n No Python entry file found.")
 
     return found_entries
 
@@ -74,3 +200,111 @@ def generate_ast_tree(file_path):
         return f"Syntax error in {file_path}: {e}"
     except Exception as e:
         return f"Error generating AST: {e}"
+
+
+# ------------------ Compact AST Outline ------------------
+def _node_label(node):
+    for attr in ("name", "id", "arg", "attr", "module"):
+        value = getattr(node, attr, None)
+        if isinstance(value, str):
+            return value
+    return ""
+
+
+def _scalar(value):
+    if isinstance(value, str) and len(value) > AST_MAX_VALUE_LEN:
+        return value[:AST_MAX_VALUE_LEN] + "..."
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return repr(value)[:AST_MAX_VALUE_LEN]
+
+
+def _child_nodes(node):
+    """Yield (path_step, child) for every AST child of node."""
+    for field, value in ast.iter_fields(node):
+        if isinstance(value, ast.AST):
+            yield field, value
+        elif isinstance(value, list):
+            for idx, item in enumerate(value):
+                if isinstance(item, ast.AST):
+                    yield f"{field}.{idx}", item
+
+
+def _summarize_node(node, path, depth, max_depth):
+    """
+    Builds a JSON-serialisable summary of a node.
+    Children below max_depth are left out and only counted.
+    """
+    summary = {
+        "path": path,
+        "type": type(node).__name__,
+        "label": _node_label(node),
+        "lineno": getattr(node, "lineno", None),
+        "end_lineno": getattr(node, "end_lineno", None),
+        "fields": {},
+    }
+    for field, value in ast.iter_fields(node):
+        if not isinstance(value, (ast.AST, list)):
+            summary["fields"][field] = _scalar(value)
+
+    children = list(_child_nodes(node))
+    summary["child_count"] = len(children)
+    if depth < max_depth:
+        summary["children"] = [
+            _summarize_node(child, f"{path}.{step}", depth + 1, max_depth)
+            for step, child in children
+        ]
+    else:
+        summary["children"] = None
+    return summary
+
+
+def _resolve_path(tree, node_path):
+    """Walk a dotted node path like 'body.3.body.0' down from the module."""
+    node = tree
+    parts = node_path.split(".") if node_path else []
+    idx = 0
+    while idx < len(parts):
+        value = getattr(node, parts[idx])
+        idx += 1
+        if isinstance(value, list):
+            value = value[int(parts[idx])]
+            idx += 1
+        node = value
+    return node
+
+
+def generate_ast_outline(file_path, offset=0, limit=AST_PAGE_SIZE, max_depth=AST_MAX_DEPTH):
+    """
+    Returns one page of top-level AST nodes as depth-limited summaries.
+    Use expand_ast_node() to load a subtree on demand.
+    """
+    try:
+        tree = parse_file(file_path)
+    except SyntaxError as e:
+        return {"file": file_path, "error": f"Syntax error in {file_path}: {e}"}
+    except Exception as e:
+        return {"file": file_path, "error": f"Error generating AST: {e}"}
+
+    page = tree.body[offset:offset + limit]
+    return {
+        "file": file_path,
+        "total": len(tree.body),
+        "offset": offset,
+        "limit": limit,
+        "nodes": [
+            _summarize_node(node, f"body.{offset + i}", 0, max_depth)
+            for i, node in enumerate(page)
+        ],
+    }
+
+
+def expand_ast_node(file_path, node_path, max_depth=AST_MAX_DEPTH):
+    """
+    Returns the summary of a single node (addressed by the 'path' of a
+    previous summary) with its children expanded to max_depth.
+    """
+    tree = parse_file(file_path)
+    node = _resolve_path(tree, node_path)
+    return _summarize_node(node, node_path, 0, max_depth)
+
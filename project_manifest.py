@@ -0,0 +1,169 @@
+"""
+Project Manifest — walks a project tree once with os.scandir and
+records every file (path, size, mtime, kind) so the entry-file finder,
+import resolver, context gatherer and test executor do not each walk
+the tree on their own.
+
+Cached manifests are checked for staleness on every get_manifest() call
+by re-statting the scanned directories (creating, deleting or renaming a
+file changes its directory's mtime), and at most MAX_MANIFESTS are kept,
+least recently used first out. In-place edits of a file do not change
+directory mtimes: pass refresh=True when file mtimes / sizes must be
+current.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+# Directories that never contain project code worth scanning
+PRUNED_DIRS = {
+    "__pycache__", ".git", ".hg", ".svn", ".venv", "env", "venv",
+    "node_modules", "site-packages", ".tox", ".nox", ".mypy_cache",
+    ".pytest_cache", ".ruff_cache", ".idea", ".vscode", "build", "dist",
+}
+
+TEXT_EXTENSIONS = {".md", ".txt", ".json", ".html", ".css", ".js", ".toml", ".cfg", ".ini", ".yaml", ".yml"}
+
+MAX_MANIFESTS = 64
+
+_manifests = OrderedDict()
+_lock = threading.Lock()
+
+
+def _file_kind(name):
+    stem, ext = os.path.splitext(name)
+    ext = ext.lower()
+    if ext == ".py":
+        return "test" if stem.startswith("test_") else "python"
+    if ext in TEXT_EXTENSIONS:
+        return "text"
+    return "other"
+
+
+class ProjectManifest:
+    def __init__(self, root, pruned_dirs=None):
+        self.root = os.path.abspath(root)
+        self.pruned_dirs = PRUNED_DIRS if pruned_dirs is None else set(pruned_dirs)
+        self.entries = []
+        self.dir_mtimes = {}
+        self._scan()
+
+    def _scan(self):
+        """Iterative scandir walk that never descends into pruned directories."""
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            try:
+                self.dir_mtimes[current] = os.stat(current).st_mtime_ns
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.pruned_dirs:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            self.entries.append({
+                                "path": entry.path,
+                                "rel_path": os.path.relpath(entry.path, self.root),
+                                "name": entry.name,
+                                "size": st.st_size,
+                                "mtime": st.st_mtime,
+                                "kind": _file_kind(entry.name),
+                            })
+            except OSError as e:
+                print(f"Skipping directory {current}: {e}")
+        self.entries.sort(key=lambda e: e["rel_path"])
+
+    def files(self, kinds=None):
+        """Return entries, optionally restricted to a kind or set of kinds."""
+        if kinds is None:
+            return list(self.entries)
+        if isinstance(kinds, str):
+            kinds = {kinds}
+        return [e for e in self.entries if e["kind"] in kinds]
+
+    def python_files(self):
+        return self.files({"python", "test"})
+
+    def in_dir(self, rel_dir, kinds=None):
+        """Entries located directly inside rel_dir ('' for the root)."""
+        rel_dir = os.path.normpath(rel_dir) if rel_dir else ""
+        return [
+            e for e in self.files(kinds)
+            if os.path.dirname(e["rel_path"]) == rel_dir
+        ]
+
+    def total_size(self):
+        return sum(e["size"] for e in self.entries)
+
+    def is_stale(self):
+        """True when a scanned directory gained, lost or renamed an entry (or vanished)."""
+        for path, mtime in self.dir_mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+
+def import_roots(root):
+    """
+    Project-relative folders that imports can be relative to: the root
+    itself, src/ (src layout) and the single top-level folder holding all
+    the code (a ZIP of "project-main/"), plus that folder's src/.
+    """
+    manifest = get_manifest(root)
+    roots = [""]
+    code_dirs = set()
+    for entry in manifest.files("python"):
+        parts = entry["rel_path"].split(os.sep)
+        if len(parts) > 1 and entry["name"] != "__init__.py":
+            code_dirs.add(parts[0])
+    if "src" in code_dirs:
+        roots.append("src")
+    code_dirs.discard("src")
+    if len(code_dirs) == 1:
+        top = code_dirs.pop()
+        roots.append(top)
+        if any(e["rel_path"].startswith(os.path.join(top, "src") + os.sep) for e in manifest.files("python")):
+            roots.append(os.path.join(top, "src"))
+    return roots
+
+
+def module_rel_paths(module, roots=("", "src")):
+    """Possible project-relative files for a dotted module name under the given import roots."""
+    base = module.replace(".", os.sep)
+    paths = []
+    for prefix in roots:
+        paths.append(os.path.join(prefix, base + ".py"))
+        paths.append(os.path.join(prefix, base, "__init__.py"))
+        paths.append(os.path.join(prefix, base, "__main__.py"))
+    return {os.path.normpath(p) for p in paths}
+
+
+def get_manifest(root, refresh=False):
+    """Return the shared manifest for root, scanning it on first use."""
+    key = os.path.abspath(root)
+    with _lock:
+        manifest = _manifests.get(key)
+        if manifest is not None:
+            _manifests.move_to_end(key)
+    if manifest is None or refresh or manifest.is_stale():
+        manifest = ProjectManifest(key)
+        with _lock:
+            _manifests[key] = manifest
+            _manifests.move_to_end(key)
+            while len(_manifests) > MAX_MANIFESTS:
+                _manifests.popitem(last=False)
+    return manifest
+
+
+def invalidate_manifest(path):
+    """Drop every cached manifest whose root contains path."""
+    path = os.path.abspath(path)
+    with _lock:
+        for root in list(_manifests):
+            if path == root or path.startswith(root + os.sep) or root.startswith(path + os.sep):
+                del _manifests[root]
@@ -6,30 +6,103 @@ Responsibilities:
 - Extract test metrics (pass/fail/error)
 - Analyze failures using LLM
 - Generate Markdown & PDF test reports
+- Export per-test results as JUnit XML and JSON for CI
 """
 
+import json
 import re
+import shutil
+import tempfile
 from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
 from fpdf import FPDF
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_backend import get_backend
+from llm_usage import LLMBudgetExceeded
+from pipeline_metrics import span, record, record_llm_usage
+from unittest_runner import iter_results
 
 load_dotenv()
 
+# Runner outcome -> status used in the exports
+EXPORT_STATUS = {
+    "pass": "passed",
+    "expected_failure": "passed",
+    "fail": "failed",
+    "unexpected_success": "failed",
+    "error": "error",
+    "skip": "skipped",
+}
+_XML_INVALID = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# unittest reports fixture errors as "<method> (<module.Class>)", e.g. "setUpClass (pkg.mod.TestX)"
+_FIXTURE_ID = re.compile(r"^(?P<name>\S+) \((?P<classname>[^()]+)\)$")
+
+
+def _xml_text(value):
+    return escape(_XML_INVALID.sub("", value or ""))
+
+
+def _export_record(result):
+    """Flat per-test record shared by the JUnit and JSON exports."""
+    test_id = result["test"]
+    fixture = _FIXTURE_ID.match(test_id)
+    if fixture:
+        classname, name = fixture.group("classname"), fixture.group("name")
+    else:
+        classname, _, name = test_id.rpartition(".")
+    return {
+        "id": test_id,
+        "classname": classname or test_id,
+        "name": name,
+        "status": EXPORT_STATUS.get(result["outcome"], "error"),
+        "outcome": result["outcome"],
+        "duration_s": result["duration_s"],
+        "message": result.get("message"),
+        "traceback": result.get("traceback"),
+    }
+
+
+def _junit_testcase(test):
+    attrs = (
+        f'classname={quoteattr(test["classname"])} name={quoteattr(test["name"])} '
+        f'time="{test["duration_s"]:.6f}"'
+    )
+    if test["status"] == "passed":
+        return f"    <testcase {attrs}/>\n"
+    if test["status"] == "skipped":
+        inner = "<skipped/>"
+    else:
+        tag = "error" if test["status"] == "error" else "failure"
+        message = quoteattr(_XML_INVALID.sub("", test["message"] or test["outcome"]))
+        inner = f"<{tag} message={message} type={quoteattr(test['outcome'])}>{_xml_text(test['traceback'])}</{tag}>"
+    return f"    <testcase {attrs}>\n      {inner}\n    </testcase>\n"
+
+
+def _empty_counts():
+    return {"tests": 0, "passed": 0, "failed": 0, "error": 0, "skipped": 0, "duration_s": 0.0}
+
+
+def _count(counts, test):
+    counts["tests"] += 1
+    counts[test["status"]] += 1
+    counts["duration_s"] += test["duration_s"]
+
 class ReportingAgent:
     def __init__(self, log_path: str):
         self.log_path = Path(log_path)
         if not self.log_path.exists():
             raise FileNotFoundError(f"Log file not found: {log_path}")
 
-        self.client = OpenAI()
+        self.backend = get_backend()
         self.results = {}  # stores parsed log summary
+        self.llm_usage = []  # UsageLedger.summary_lines() of the run, if any
 
     # --------------------------------------------------
     # STEP 1: Parse unittest log
     # --------------------------------------------------
     def parse_unittest_log(self) -> dict:
         content = self.log_path.read_text(encoding="utf-8", errors="ignore")
+        record("bytes_read", len(content))
 
         # Basic summary dictionary
         self.results = {
@@ -79,6 +152,10 @@ class ReportingAgent:
     # STEP 2: AI-based Failure Analysis (optional)
     # --------------------------------------------------
     def analyze_with_llm(self, summary: dict) -> str:
+        if not self.backend.available():
+            print(" LLM disabled. Skipping AI analysis.")
+            return "AI analysis skipped: no LLM backend available"
+
         prompt = f"""
 You are a Senior QA Automation Engineer.
 
@@ -108,20 +185,28 @@ Your Tasks:
 Respond in clear, professional language.
 """
 
-        response = self.client.chat.completions.create(
-            model="gpt-5-nano",
-            messages=[
-                {"role": "system", "content": "You are an expert QA engineer."},
-                {"role": "user", "content": prompt},
-            ],
-        )
-
-        return response.choices[0].message.content
+        with span("llm_call", purpose="failure_analysis", model=self.backend.model):
+            try:
+                response = self.backend.complete([
+                    {"role": "system", "content": "You are an expert QA engineer."},
+                    {"role": "user", "content": prompt},
+                ], purpose="failure_analysis")
+            except LLMBudgetExceeded as e:
+                print(f" {e}")
+                return f"AI analysis skipped: {e}"
+            except Exception as e:
+                # A provider or network failure must not lose the report of a finished test run
+                print(f" AI analysis failed: {type(e).__name__}: {e}")
+                return f"AI analysis skipped: LLM call failed ({type(e).__name__}: {e})"
+            record_llm_usage(response)
+
+        return response.content
 
     # --------------------------------------------------
     # STEP 3: Generate Markdown Report
     # --------------------------------------------------
-    def generate_markdown_report(self, summary: dict, ai_analysis: str = "") -> str:
+    def generate_markdown_report(self, summary: dict, ai_analysis: str = "", llm_usage: list = None) -> str:
+        llm_usage = self.llm_usage if llm_usage is None else llm_usage
         status = " PASSED" if summary["failures"] == 0 and summary["errors"] == 0 else " FAILED"
 
         report = f"""
@@ -154,6 +239,11 @@ Respond in clear, professional language.
 
 ---
 
+##  LLM Usage
+{chr(10).join(f"- {line}" for line in llm_usage) if llm_usage else "No LLM calls recorded"}
+
+---
+
 ## 🛠 Generated By
 *AI-Powered Test Reporting Agent*
 """
@@ -162,15 +252,17 @@ Respond in clear, professional language.
     # --------------------------------------------------
     # STEP 4: Save Markdown Report
     # --------------------------------------------------
-    def save_markdown_report(self, report_content: str, output_path: str = "test_report.md") -> Path:
-        output_path = Path(output_path)
+    def save_markdown_report(self, report_content: str, output_path: str = None) -> Path:
+        # Defaults to the log's folder so concurrent runs never share a report file
+        output_path = Path(output_path) if output_path else self.log_path.parent / "test_report.md"
         output_path.write_text(report_content, encoding="utf-8")
         return output_path
 
     # --------------------------------------------------
     # STEP 5: Generate PDF Report
     # --------------------------------------------------
-    def generate_pdf_report(self, output_path: str = "test_report.pdf"):
+    def generate_pdf_report(self, output_path: str = None):
+        output_path = str(output_path or self.log_path.parent / "test_report.pdf")
         if not self.results:
             raise ValueError("No parsed results found. Run parse_unittest_log() first.")
 
@@ -214,10 +306,71 @@ Respond in clear, professional language.
         for rec in self.results.get('recommendations', []):
             pdf.multi_cell(0, 8, f"- {rec}")
 
+        # LLM Usage
+        if self.llm_usage:
+            pdf.ln(5)
+            pdf.set_font("Arial", 'B', 12)
+            pdf.cell(0, 10, "LLM Usage", ln=True)
+            pdf.set_font("Arial", '', 12)
+            for line in self.llm_usage:
+                pdf.multi_cell(0, 8, f"- {line}")
+
         # Save PDF
         pdf.output(output_path)
         print(f"PDF generated successfully at {Path(output_path).resolve()}")
 
+    # --------------------------------------------------
+    # STEP 6: Export JUnit XML & JSON
+    # --------------------------------------------------
+    # Both exports stream the runner's per-test JSON lines, so memory stays
+    # flat however large the suite, and partial results of a killed run
+    # are exported too.
+    def export_junit_xml(self, results_path: str, output_path: str = None, suite_name: str = "unittest") -> Path:
+        output_path = Path(output_path) if output_path else self.log_path.parent / "junit.xml"
+        counts = _empty_counts()
+
+        # The <testsuite> header carries the totals, so test cases are
+        # spooled to a temporary file first and copied in after it
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as body:
+            for result in iter_results(results_path):
+                test = _export_record(result)
+                _count(counts, test)
+                body.write(_junit_testcase(test))
+            body.seek(0)
+
+            with open(output_path, "w", encoding="utf-8") as out:
+                totals = (
+                    f'tests="{counts["tests"]}" failures="{counts["failed"]}" errors="{counts["error"]}" '
+                    f'skipped="{counts["skipped"]}" time="{counts["duration_s"]:.6f}"'
+                )
+                out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+                out.write(f"<testsuites {totals}>\n")
+                out.write(f"  <testsuite name={quoteattr(suite_name)} {totals}>\n")
+                shutil.copyfileobj(body, out)
+                out.write("  </testsuite>\n</testsuites>\n")
+        return output_path
+
+    def export_json(self, results_path: str, output_path: str = None) -> Path:
+        output_path = Path(output_path) if output_path else self.log_path.parent / "test_results.json"
+        counts = _empty_counts()
+        with open(output_path, "w", encoding="utf-8") as out:
+            out.write('{"tests": [')
+            for result in iter_results(results_path):
+                test = _export_record(result)
+                out.write(("," if counts["tests"] else "") + "\n  " + json.dumps(test))
+                _count(counts, test)
+            counts["duration_s"] = round(counts["duration_s"], 6)
+            counts["status"] = "PASSED" if not counts["failed"] and not counts["error"] else "FAILED"
+            out.write('\n],\n"summary": ' + json.dumps(counts) + "}\n")
+        return output_path
+
+    def export_results(self, results_path: str) -> dict:
+        """JUnit XML and JSON exports next to the log; returns their paths."""
+        return {
+            "junit": str(self.export_junit_xml(results_path)),
+            "json": str(self.export_json(results_path)),
+        }
+
 # --------------------------------------------------
 # Standalone Execution (Optional)
 # --------------------------------------------------
@@ -238,4 +391,4 @@ if __name__ == "__main__":
     print(f"Markdown report saved at: {md_path.resolve()}")
 
     # Generate PDF
-    agent.generate_pdf_report("ai_test_report.pdf")
+    agent.generate_pdf_report(agent.log_path.parent / "ai_test_report.pdf")
@@ -0,0 +1,272 @@
+"""
+Run History — append-only SQLite record of every test execution.
+
+Each run stores its status, duration and a fingerprint of the project's
+Python sources; each test stores its outcome and duration. Queries:
+ - slowest_tests: mean / max duration per test
+ - flaky_tests: tests that both passed and failed on the same code
+   fingerprint, with how often the outcome flipped between runs
+ - duration_trend: run (or single test) durations over time
+ - failure_scores: how likely each test is to fail next, for ordering
+
+The database defaults to run_history.sqlite3 in the user's data directory
+($XDG_DATA_HOME or ~/.local/share, under ai-test-pipeline/); override it
+with RUN_HISTORY_DB. Runs are keyed by project_key(): the project folder
+name plus a hash of its top-level package and module names, so unrelated
+uploads that share a ZIP name do not share history.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from project_manifest import get_manifest, import_roots
+
+DEFAULT_DATA_DIR = os.path.join(
+    os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "ai-test-pipeline",
+)
+DEFAULT_DB_PATH = os.path.join(DEFAULT_DATA_DIR, "run_history.sqlite3")
+
+# Top-level names the pipeline itself adds to a project; they do not identify it
+_PIPELINE_NAMES = {"__init__", "generated_tests", "report"}
+
+# Outcomes counted as passing; fail, error and unexpected_success are not
+PASSING = ("pass", "skip", "expected_failure")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    code_hash TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration_s REAL NOT NULL,
+    status TEXT NOT NULL,
+    exit_code INTEGER
+);
+CREATE TABLE IF NOT EXISTS test_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration_s REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_project ON runs(project, started_at);
+CREATE INDEX IF NOT EXISTS idx_results_test ON test_results(test_id, run_id);
+"""
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def code_fingerprint(project_path):
+    """Hash of every Python file (sources and tests) in the project."""
+    digest = hashlib.sha256()
+    manifest = get_manifest(project_path, refresh=True)
+    for entry in manifest.python_files():
+        digest.update(entry["rel_path"].encode("utf-8"))
+        with open(entry["path"], "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def project_key(project_path):
+    """Folder name plus a hash of the project's top-level package / module names."""
+    root = os.path.abspath(project_path)
+    # Deepest import root first, so src/pkg/mod.py counts as "pkg"
+    roots = sorted(import_roots(root), key=len, reverse=True)
+    names = set()
+    for entry in get_manifest(root).files("python"):
+        rel_path = entry["rel_path"]
+        prefix = next(p for p in roots if not p or rel_path.startswith(p + os.sep))
+        top = rel_path[len(prefix) + 1 if prefix else 0:].split(os.sep)[0]
+        name = os.path.splitext(top)[0]
+        if name not in _PIPELINE_NAMES:
+            names.add(name)
+    digest = hashlib.sha256("\n".join(sorted(names)).encode("utf-8")).hexdigest()[:12]
+    return f"{os.path.basename(root)}-{digest}"
+
+
+class RunHistory:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.getenv("RUN_HISTORY_DB", DEFAULT_DB_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_run(self, project, code_hash, status, duration_s, tests, exit_code=None, started_at=None):
+        """Append one run and its per-test results; returns the run id."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO runs (project, code_hash, started_at, duration_s, status, exit_code) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (project, code_hash, started_at or time.time(), duration_s, status, exit_code),
+            )
+            run_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO test_results (run_id, test_id, outcome, duration_s) VALUES (?, ?, ?, ?)",
+                [(run_id, t["test"], t["outcome"], t["duration_s"]) for t in tests],
+            )
+        return run_id
+
+    def runs(self, project=None, limit=20):
+        query = "SELECT * FROM runs"
+        params = []
+        if project:
+            query += " WHERE project = ?"
+            params.append(project)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def slowest_tests(self, project=None, limit=10, last_runs=50):
+        """Tests with the highest mean duration over the project's recent runs."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT t.test_id, COUNT(*) AS runs,
+                       AVG(t.duration_s) AS mean_s, MAX(t.duration_s) AS max_s
+                FROM test_results t
+                JOIN ({self._recent_runs_sql(project)}) r ON r.id = t.run_id
+                GROUP BY t.test_id
+                ORDER BY mean_s DESC
+                LIMIT ?
+                """,
+                self._recent_runs_params(project, last_runs) + [limit],
+            )
+            return [dict(row) for row in rows]
+
+    def flaky_tests(self, project=None, min_runs=2, last_runs=200):
+        """
+        Tests with both passing and failing outcomes on the same code
+        fingerprint. flip_rate is the share of consecutive runs on that
+        fingerprint whose outcome changed.
+        """
+        passing = ", ".join("?" * len(PASSING))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                WITH outcomes AS (
+                    SELECT t.test_id, r.code_hash,
+                           t.outcome IN ({passing}) AS passed,
+                           LAG(t.outcome IN ({passing})) OVER (
+                               PARTITION BY t.test_id, r.code_hash ORDER BY r.id
+                           ) AS previous
+                    FROM test_results t
+                    JOIN ({self._recent_runs_sql(project)}) r ON r.id = t.run_id
+                )
+                SELECT test_id, code_hash, COUNT(*) AS runs,
+                       SUM(passed) AS passes, COUNT(*) - SUM(passed) AS failures,
+                       SUM(previous IS NOT NULL AND previous != passed) AS flips
+                FROM outcomes
+                GROUP BY test_id, code_hash
+                HAVING runs >= ? AND passes > 0 AND failures > 0
+                ORDER BY flips DESC, runs DESC
+                """,
+                list(PASSING) * 2 + self._recent_runs_params(project, last_runs) + [min_runs],
+            )
+            flaky = []
+            for row in rows:
+                item = dict(row)
+                item["flip_rate"] = round(item["flips"] / (item["runs"] - 1), 3)
+                flaky.append(item)
+            return flaky
+
+    def duration_trend(self, project=None, test_id=None, limit=20):
+        """Oldest-first durations of the last runs, for the whole run or one test."""
+        with self._connect() as conn:
+            if test_id is None:
+                rows = conn.execute(
+                    f"SELECT id AS run_id, started_at, duration_s, status "
+                    f"FROM ({self._recent_runs_sql(project)}) ORDER BY id",
+                    self._recent_runs_params(project, limit),
+                )
+            else:
+                rows = conn.execute(
+                    f"""
+                    SELECT r.id AS run_id, r.started_at, t.duration_s, t.outcome AS status
+                    FROM test_results t JOIN ({self._recent_runs_sql(project)}) r ON r.id = t.run_id
+                    WHERE t.test_id = ?
+                    ORDER BY r.id
+                    """,
+                    self._recent_runs_params(project, limit) + [test_id],
+                )
+            return [dict(row) for row in rows]
+
+    def failure_scores(self, project, last_runs=20, decay=0.5):
+        """
+        Per test: score = sum of decay**k over the recent runs it failed in
+        (k = 0 for its latest run), its last outcome, and the mean duration
+        of its failing (else all) runs, so quick failures can go first.
+        """
+        passing = ", ".join("?" * len(PASSING))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT t.test_id, t.outcome NOT IN ({passing}) AS failed, t.duration_s
+                FROM test_results t
+                JOIN ({self._recent_runs_sql(project)}) r ON r.id = t.run_id
+                ORDER BY r.id DESC
+                """,
+                list(PASSING) + self._recent_runs_params(project, last_runs),
+            )
+            scores = {}
+            for row in rows:
+                item = scores.setdefault(row["test_id"], {
+                    "score": 0.0, "runs": 0, "last_failed": bool(row["failed"]),
+                    "fail_durations": [], "durations": [],
+                })
+                if row["failed"]:
+                    item["score"] += decay ** item["runs"]
+                    item["fail_durations"].append(row["duration_s"])
+                item["durations"].append(row["duration_s"])
+                item["runs"] += 1
+
+        for item in scores.values():
+            durations = item.pop("fail_durations") or item["durations"]
+            item.pop("durations")
+            item["score"] = round(item["score"], 4)
+            item["duration_s"] = round(sum(durations) / len(durations), 6)
+        return scores
+
+    def suggested_timeout(self, project, factor=3.0, minimum_s=10.0, last_runs=20):
+        """A run timeout of factor x the slowest recent passing run, or None without history."""
+        durations = [
+            r["duration_s"] for r in self.duration_trend(project, limit=last_runs) if r["status"] == "success"
+        ]
+        if not durations:
+            return None
+        return max(minimum_s, round(max(durations) * factor, 1))
+
+    @staticmethod
+    def _recent_runs_sql(project):
+        where = "WHERE project = ?" if project else ""
+        return f"SELECT * FROM runs {where} ORDER BY id DESC LIMIT ?"
+
+    @staticmethod
+    def _recent_runs_params(project, limit):
+        return ([project] if project else []) + [limit]
+
+
+def get_run_history():
+    """Process-wide history store shared by the executor and the UI."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = RunHistory()
+        return _history
@@ -0,0 +1,235 @@
+"""
+Sandbox — runs generated tests with bounded resources (Linux).
+
+Each run gets:
+ - a private temporary copy of the project as its working directory,
+   with HOME and TMPDIR pointing inside it and secrets removed from the
+   environment
+ - rlimits on CPU time, address space, file size, open files and
+   processes, applied by re-executing through this module so no
+   preexec_fn runs in the (threaded) server process
+ - its own network namespace when unprivileged user namespaces are
+   available, i.e. no network access
+ - captured output capped at max_output_bytes per stream
+ - its whole process group killed on timeout
+
+Limits come from SANDBOX_* environment variables (see SandboxLimits.from_env);
+SANDBOX_ENABLED=0 runs tests without the sandbox.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from project_manifest import PRUNED_DIRS
+
+DEFAULT_CPU_S = 120
+DEFAULT_MEMORY_MB = 1024
+DEFAULT_FILE_SIZE_MB = 64
+DEFAULT_OPEN_FILES = 256
+DEFAULT_PROCESSES = 64
+DEFAULT_OUTPUT_BYTES = 1024 * 1024
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+
+# Environment variables never passed to generated code
+SECRET_MARKERS = ("KEY", "TOKEN", "SECRET", "PASSWORD", "CREDENTIAL")
+
+# Directories of the project not copied into the sandbox
+SKIPPED_DIRS = PRUNED_DIRS | {"report"}
+
+
+class SandboxLimits:
+    def __init__(self, cpu_s=DEFAULT_CPU_S, memory_mb=DEFAULT_MEMORY_MB, file_size_mb=DEFAULT_FILE_SIZE_MB,
+                 open_files=DEFAULT_OPEN_FILES, processes=DEFAULT_PROCESSES,
+                 max_output_bytes=DEFAULT_OUTPUT_BYTES, deny_network=True, enabled=True):
+        self.cpu_s = cpu_s
+        self.memory_mb = memory_mb
+        self.file_size_mb = file_size_mb
+        self.open_files = open_files
+        self.processes = processes
+        self.max_output_bytes = max_output_bytes
+        self.deny_network = deny_network
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            cpu_s=int(os.getenv("SANDBOX_CPU_S", DEFAULT_CPU_S)),
+            memory_mb=int(os.getenv("SANDBOX_MEMORY_MB", DEFAULT_MEMORY_MB)),
+            file_size_mb=int(os.getenv("SANDBOX_FILE_SIZE_MB", DEFAULT_FILE_SIZE_MB)),
+            open_files=int(os.getenv("SANDBOX_OPEN_FILES", DEFAULT_OPEN_FILES)),
+            processes=int(os.getenv("SANDBOX_PROCESSES", DEFAULT_PROCESSES)),
+            max_output_bytes=int(os.getenv("SANDBOX_MAX_OUTPUT_BYTES", DEFAULT_OUTPUT_BYTES)),
+            deny_network=os.getenv("SANDBOX_DENY_NETWORK", "1") != "0",
+            enabled=os.getenv("SANDBOX_ENABLED", "1") != "0",
+        )
+
+    def wrapper_args(self):
+        """Arguments for `python sandbox.py ... -- cmd` that apply these limits."""
+        args = [
+            "--cpu-s", str(self.cpu_s),
+            "--memory-mb", str(self.memory_mb),
+            "--file-size-mb", str(self.file_size_mb),
+            "--open-files", str(self.open_files),
+            # RLIMIT_NPROC counts every task of the user, not just this run's
+            "--processes", str(_user_task_count() + self.processes),
+        ]
+        if self.deny_network:
+            args.append("--deny-network")
+        return args
+
+
+def _user_task_count():
+    uid = os.getuid()
+    count = 0
+    try:
+        for pid in os.listdir("/proc"):
+            if pid.isdigit():
+                try:
+                    if os.stat(f"/proc/{pid}").st_uid == uid:
+                        count += len(os.listdir(f"/proc/{pid}/task"))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return count
+
+
+def _set_limit(kind, value):
+    _, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(kind, (value, value))
+
+
+def apply_limits(cpu_s, memory_mb, file_size_mb, open_files, processes):
+    _set_limit(resource.RLIMIT_CPU, cpu_s)
+    _set_limit(resource.RLIMIT_AS, memory_mb * 1024 * 1024)
+    _set_limit(resource.RLIMIT_FSIZE, file_size_mb * 1024 * 1024)
+    _set_limit(resource.RLIMIT_NOFILE, open_files)
+    _set_limit(resource.RLIMIT_NPROC, processes)
+    _set_limit(resource.RLIMIT_CORE, 0)
+
+
+def deny_network():
+    """Move into new user + network namespaces (loopback only). Returns success."""
+    uid, gid = os.getuid(), os.getgid()
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if libc.unshare(CLONE_NEWUSER | CLONE_NEWNET) != 0:
+        return False
+    # Keep the same ids inside the namespace
+    try:
+        with open("/proc/self/setgroups", "w") as f:
+            f.write("deny")
+        with open("/proc/self/uid_map", "w") as f:
+            f.write(f"{uid} {uid} 1")
+        with open("/proc/self/gid_map", "w") as f:
+            f.write(f"{gid} {gid} 1")
+    except OSError:
+        pass
+    return True
+
+
+def sandbox_env(workdir):
+    env = {
+        k: v for k, v in os.environ.items()
+        if not any(marker in k.upper() for marker in SECRET_MARKERS)
+    }
+    env.update({"HOME": workdir, "TMPDIR": os.path.join(workdir, ".tmp"), "PYTHONDONTWRITEBYTECODE": "1"})
+    return env
+
+
+def _read_capped(path, limit):
+    with open(path, "rb") as f:
+        data = f.read(limit + 1)
+    text = data[:limit].decode("utf-8", errors="replace")
+    if len(data) > limit:
+        text += f"\n[sandbox] output truncated at {limit} bytes\n"
+    return text
+
+
+def run_sandboxed(cmd, project_path, limits=None, timeout_s=90):
+    """
+    Runs cmd on a temporary copy of project_path. Returns a
+    subprocess.CompletedProcess with capped text output; raises
+    subprocess.TimeoutExpired after killing the whole process group.
+    """
+    limits = limits or SandboxLimits.from_env()
+    if not limits.enabled:
+        return subprocess.run(cmd, cwd=project_path, timeout=timeout_s, capture_output=True, text=True)
+
+    sandbox_root = tempfile.mkdtemp(prefix="qa_sandbox_")
+    try:
+        workdir = os.path.join(sandbox_root, os.path.basename(os.path.abspath(project_path)))
+        shutil.copytree(project_path, workdir, ignore=lambda d, names: [n for n in names if n in SKIPPED_DIRS])
+        os.makedirs(os.path.join(workdir, ".tmp"), exist_ok=True)
+
+        if resource is not None:
+            cmd = [sys.executable, os.path.abspath(__file__), *limits.wrapper_args(), "--", *cmd]
+        else:
+            print(" Resource limits unavailable on this platform; running with timeout only.")
+
+        stdout_path = os.path.join(sandbox_root, "stdout")
+        stderr_path = os.path.join(sandbox_root, "stderr")
+        with open(stdout_path, "wb") as out, open(stderr_path, "wb") as err:
+            proc = subprocess.Popen(
+                cmd, cwd=workdir, env=sandbox_env(workdir),
+                stdin=subprocess.DEVNULL, stdout=out, stderr=err,
+                start_new_session=True,
+            )
+            try:
+                returncode = proc.wait(timeout=timeout_s)
+            except subprocess.TimeoutExpired:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                proc.wait()
+                raise
+
+        return subprocess.CompletedProcess(
+            cmd, returncode,
+            stdout=_read_capped(stdout_path, limits.max_output_bytes),
+            stderr=_read_capped(stderr_path, limits.max_output_bytes),
+        )
+    finally:
+        shutil.rmtree(sandbox_root, ignore_errors=True)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply resource limits, then exec a command.")
+    parser.add_argument("--cpu-s", type=int, default=DEFAULT_CPU_S)
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_MB)
+    parser.add_argument("--file-size-mb", type=int, default=DEFAULT_FILE_SIZE_MB)
+    parser.add_argument("--open-files", type=int, default=DEFAULT_OPEN_FILES)
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES)
+    parser.add_argument("--deny-network", action="store_true")
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("no command given")
+
+    if args.deny_network and not deny_network():
+        print("[sandbox] network namespaces unavailable; network not isolated", file=sys.stderr)
+    apply_limits(args.cpu_s, args.memory_mb, args.file_size_mb, args.open_files, args.processes)
+    os.execvp(command[0], command)
+
+
+if __name__ == "__main__":
+    main()
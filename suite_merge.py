@@ -0,0 +1,261 @@
+"""
+Suite Merge — accumulates generated tests without piling up duplicates.
+
+Each test method is fingerprinted on a normalised AST:
+ - the method name and docstring are dropped
+ - local variable names are renamed in order of first use
+ - formatting and comments do not survive parsing
+so two tests that only differ in naming or layout count as the same test.
+Literal values are kept: tests of other inputs or expectations are new.
+
+merge_test_modules(existing, new) keeps the existing module text as is and
+inserts only new tests: methods into the TestCase class of the same name,
+whole new classes before a trailing `if __name__ == "__main__":` block,
+together with any imports and helpers they need. A changed test with the
+name of an existing method in the same class replaces that method.
+"""
+
+import ast
+import hashlib
+
+TEST_PREFIX = "test"
+
+
+# ------------------ Normalisation ------------------
+class _Normalizer(ast.NodeTransformer):
+    def __init__(self, local_names):
+        self.local_names = {name: f"v{i}" for i, name in enumerate(local_names)}
+
+    def visit_Name(self, node):
+        if node.id in self.local_names:
+            return ast.copy_location(ast.Name(id=self.local_names[node.id], ctx=node.ctx), node)
+        return node
+
+    def visit_arg(self, node):
+        node.annotation = None
+        if node.arg in self.local_names:
+            node.arg = self.local_names[node.arg]
+        return node
+
+
+def _local_names(func):
+    """Arguments and names bound in func, in order of first appearance."""
+    names = []
+    for node in ast.walk(func):
+        if isinstance(node, ast.arg):
+            name = node.arg
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            name = node.id
+        else:
+            continue
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def normalize_test(func):
+    """Normalised ast.dump of a test function (see module docstring)."""
+    func = ast.parse(ast.unparse(func)).body[0]
+    body = func.body
+    if body and isinstance(body[0], ast.Expr) and isinstance(getattr(body[0], "value", None), ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        body = body[1:] or [ast.Pass()]
+    func.body = body
+    func.name = "_"
+    func.returns = None
+    func = _Normalizer(_local_names(func)).visit(func)
+    return ast.dump(func, annotate_fields=False, include_attributes=False)
+
+
+def test_fingerprint(func):
+    return hashlib.sha256(normalize_test(func).encode("utf-8")).hexdigest()
+
+
+def _test_methods(cls):
+    return [
+        node for node in cls.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith(TEST_PREFIX)
+    ]
+
+
+def _classes(tree):
+    return [node for node in tree.body if isinstance(node, ast.ClassDef)]
+
+
+def suite_fingerprints(tree):
+    fingerprints = set()
+    for cls in _classes(tree):
+        fingerprints.update(test_fingerprint(m) for m in _test_methods(cls))
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith(TEST_PREFIX):
+            fingerprints.add(test_fingerprint(node))
+    return fingerprints
+
+
+# ------------------ Source Helpers ------------------
+def _start_line(node):
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+
+def _segment(lines, node):
+    return lines[_start_line(node) - 1:node.end_lineno]
+
+
+def _reindent(block, indent):
+    current = min((len(l) - len(l.lstrip()) for l in block if l.strip()), default=0)
+    return [indent + l[current:] if l.strip() else "" for l in block]
+
+
+def _body_indent(lines, cls):
+    first = cls.body[0]
+    line = lines[first.lineno - 1]
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _is_main_guard(node):
+    return (
+        isinstance(node, ast.If)
+        and isinstance(node.test, ast.Compare)
+        and isinstance(node.test.left, ast.Name)
+        and node.test.left.id == "__name__"
+    )
+
+
+def _defined_names(tree):
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.Assign):
+            names.update(t.id for t in node.targets if isinstance(t, ast.Name))
+    return names
+
+
+# ------------------ Merge ------------------
+def merge_test_modules(existing_source, new_source):
+    """
+    Returns (merged_source, added, updated, duplicates): the existing
+    module with the new module's unseen tests inserted, and the counts of
+    test methods added, replaced in place and dropped as duplicates.
+    Raises SyntaxError if either module does not parse.
+    """
+    existing = ast.parse(existing_source)
+    new = ast.parse(new_source)
+    lines = existing_source.splitlines()
+    new_lines = new_source.splitlines()
+
+    seen = suite_fingerprints(existing)
+    existing_classes = {cls.name: cls for cls in _classes(existing)}
+    defined = _defined_names(existing)
+    existing_imports = {ast.dump(n) for n in existing.body if isinstance(n, (ast.Import, ast.ImportFrom))}
+
+    insertions = {}  # line index in existing -> lines to insert before it
+    replacements = {}  # (start, end) line slice in existing -> lines replacing it
+    appended_classes = []
+    added = updated = duplicates = 0
+
+    def unseen(methods):
+        nonlocal duplicates
+        kept = []
+        for method in methods:
+            fingerprint = test_fingerprint(method)
+            if fingerprint in seen:
+                duplicates += 1
+                continue
+            seen.add(fingerprint)
+            kept.append(method)
+        return kept
+
+    for cls in _classes(new):
+        methods = _test_methods(cls)
+        if not methods:
+            continue
+        kept = unseen(methods)
+        if not kept:
+            continue
+
+        target = existing_classes.get(cls.name)
+        if target is not None:
+            # Same class: a changed test replaces the old one of that name,
+            # other new methods are appended (renamed on name clashes)
+            indent = _body_indent(lines, target)
+            current = {n.name: n for n in target.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+            tests = {m.name: m for m in _test_methods(target)}
+            taken = set(current)
+            block = []
+            for method in kept:
+                segment = _segment(new_lines, method)
+                old = tests.pop(method.name, None)
+                if old is not None:
+                    replacements[(_start_line(old) - 1, old.end_lineno)] = _reindent(segment, indent)
+                    updated += 1
+                    continue
+                added += 1
+                name = method.name
+                suffix = 2
+                while name in taken:
+                    name = f"{method.name}_{suffix}"
+                    suffix += 1
+                taken.add(name)
+                if name != method.name:
+                    offset = method.lineno - _start_line(method)
+                    segment[offset] = segment[offset].replace(f"def {method.name}(", f"def {name}(", 1)
+                block += [""] + _reindent(segment, indent)
+            if block:
+                insertions.setdefault(target.end_lineno, []).extend(block)
+        else:
+            # New class: copy it without the duplicate methods
+            added += len(kept)
+            dropped = [m for m in methods if m not in kept]
+            segment = _segment(new_lines, cls)
+            base = _start_line(cls)
+            for method in sorted(dropped, key=_start_line, reverse=True):
+                del segment[_start_line(method) - base:method.end_lineno - base + 1]
+            while not segment[-1].strip():
+                segment.pop()
+            appended_classes.append(segment)
+            defined.add(cls.name)
+
+    if not added and not updated:
+        return existing_source, 0, 0, duplicates
+
+    # Imports and module-level helpers the new tests may rely on
+    header, helpers = [], []
+    for node in new.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            if ast.dump(node) not in existing_imports:
+                header += _segment(new_lines, node)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Assign)) and not _is_main_guard(node):
+            names = _defined_names(ast.Module(body=[node], type_ignores=[]))
+            if names and not names & defined:
+                helpers += ["", ""] + _segment(new_lines, node)
+                defined |= names
+
+    tail = []
+    for segment in appended_classes:
+        tail += ["", ""] + segment
+    main_guard = next((n for n in existing.body if _is_main_guard(n)), None)
+    tail_at = _start_line(main_guard) - 1 if main_guard is not None else len(lines)
+    block = helpers + tail
+    if block and main_guard is not None:
+        # The existing blank lines already separate the block from what precedes it
+        while block and not block[0]:
+            block.pop(0)
+        block += ["", ""]
+    if block:
+        insertions.setdefault(tail_at, []).extend(block)
+
+    imports = [n for n in existing.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    header_at = imports[-1].end_lineno if imports else 0
+    if header:
+        insertions.setdefault(header_at, [])[:0] = header
+
+    # Apply bottom-up so earlier line numbers stay valid
+    edits = [(at, at, block) for at, block in insertions.items()]
+    edits += [(start, end, block) for (start, end), block in replacements.items()]
+    merged = list(lines)
+    for start, end, block in sorted(edits, key=lambda e: (e[0], e[1]), reverse=True):
+        merged[start:end] = block
+    merged_source = "\n".join(merged).rstrip() + "\n"
+    compile(merged_source, "<merged tests>", "exec")
+    return merged_source, added, updated, duplicates
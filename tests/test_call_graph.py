@@ -0,0 +1,68 @@
+import os
+
+from call_graph import MODULE_NODE, build_call_graph, entry_module_nodes
+
+
+def _write(root, rel_path, text):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_imports_resolve_to_definitions(tmp_path):
+    _write(tmp_path, "pkg/__init__.py", "")
+    _write(tmp_path, "pkg/util.py", "def helper():\n    return 1\n\n\ndef other():\n    return 2\n")
+    _write(tmp_path, "pkg/core.py", (
+        "from .util import helper\n"
+        "import pkg.util as u\n\n\n"
+        "class Engine:\n"
+        "    def __init__(self):\n        self.start()\n\n"
+        "    def start(self):\n        return helper()\n\n\n"
+        "def run():\n    Engine()\n    return u.other()\n"
+    ))
+    _write(tmp_path, "main.py", "from pkg.core import run\n\nrun()\n")
+
+    graph = build_call_graph(str(tmp_path))
+
+    assert graph.callees("pkg.core.run") == ["pkg.core.Engine.__init__", "pkg.util.other"]
+    assert graph.callees("pkg.core.Engine.__init__") == ["pkg.core.Engine.start"]
+    assert graph.callees("pkg.core.Engine.start") == ["pkg.util.helper"]
+    assert graph.callers("pkg.core.run") == [f"main.{MODULE_NODE}"]
+
+
+def test_fan_in_counts_distinct_callers(tmp_path):
+    _write(tmp_path, "calc.py", (
+        "def add(a, b):\n    return a + b\n\n\n"
+        "def double(a):\n    return add(a, a) + add(0, 0)\n\n\n"
+        "def triple(a):\n    return add(double(a), a)\n"
+    ))
+
+    graph = build_call_graph(str(tmp_path))
+
+    assert graph.fan_in("calc.add") == 2
+    assert graph.fan_in("calc.double") == 1
+    assert graph.fan_in("calc.triple") == 0
+    assert graph.fan_in("calc.missing") == 0
+    assert graph.fan_in_array()[graph.index["calc.add"]] == 2
+
+
+def test_src_layout_imports_map_to_project_names(tmp_path):
+    _write(tmp_path, "src/shop/__init__.py", "")
+    _write(tmp_path, "src/shop/cart.py", "def total(items):\n    return sum(items)\n")
+    _write(tmp_path, "src/shop/cli.py", "from shop.cart import total\n\n\ndef main():\n    return total([1, 2])\n")
+
+    graph = build_call_graph(str(tmp_path))
+
+    assert graph.callees("src.shop.cli.main") == ["src.shop.cart.total"]
+
+
+def test_reachability_from_entry_modules(tmp_path):
+    _write(tmp_path, "app.py", "from lib import used\n\nused()\n")
+    _write(tmp_path, "lib.py", "def used():\n    return inner()\n\n\ndef inner():\n    return 1\n\n\ndef unused():\n    return 2\n")
+
+    graph = build_call_graph(str(tmp_path))
+    entries = entry_module_nodes(str(tmp_path), [os.path.join(str(tmp_path), "app.py")])
+    reachable = set(graph.reachable_from(entries))
+
+    assert {"lib.used", "lib.inner"} <= reachable
+    assert "lib.unused" not in reachable
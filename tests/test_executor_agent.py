@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+
+import Test_executor_agent
+from run_history import RunHistory
+
+
+@pytest.fixture
+def project(tmp_path):
+    folder = tmp_path / "project"
+    folder.mkdir()
+    (folder / "calc.py").write_text("def add(a, b):\n    return a + b\n")
+    (folder / "test_calc.py").write_text(
+        "import unittest\n\nfrom calc import add\n\n\n"
+        "class TestAdd(unittest.TestCase):\n"
+        "    def test_add(self):\n        self.assertEqual(add(1, 2), 3)\n"
+    )
+    return str(folder)
+
+
+def _agent(project, tmp_path, **kwargs):
+    history = RunHistory(str(tmp_path / "history.sqlite3"))
+    return Test_executor_agent.TestExecutorAgent(project, history=history, **kwargs)
+
+
+def test_history_records_when_the_run_started(project, tmp_path):
+    agent = _agent(project, tmp_path)
+
+    before = time.time()
+    result = agent.execute_tests()
+    after = time.time()
+    run = agent.history.runs(limit=1)[0]
+
+    assert result["status"] == "success"
+    assert before <= run["started_at"] <= after - run["duration_s"]
+    # An edit made while that run was executing counts as a change for the next one
+    during = run["started_at"] + run["duration_s"] / 2
+    os.utime(os.path.join(project, "test_calc.py"), (during, during))
+    assert "test_calc" in agent.test_priorities()["changed_modules"]
+
+
+def test_import_stubs_are_opt_in(project, tmp_path, monkeypatch):
+    monkeypatch.delenv("TEST_STUB_IMPORTS", raising=False)
+    (tmp_path / "project" / "net.py").write_text("import requests\n")
+
+    assert _agent(project, tmp_path)._stub_args() == []
+    assert _agent(project, tmp_path, stub_mode="missing")._stub_args()[:2] == ["--stub-mode", "missing"]
+
+
+def test_history_order_is_opt_in(project, tmp_path, monkeypatch):
+    monkeypatch.delenv("TEST_ORDER", raising=False)
+    monkeypatch.delenv("TEST_FAIL_FAST", raising=False)
+    report_dir = str(tmp_path)
+
+    assert _agent(project, tmp_path)._order_args(report_dir) == []
+    assert _agent(project, tmp_path, order="history")._order_args(report_dir)[0] == "--priorities"
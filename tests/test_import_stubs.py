@@ -0,0 +1,56 @@
+import importlib
+import sys
+
+import pytest
+
+from import_stubs import StubFinder, classify_imports, install_stubs
+
+PACKAGE = "stubbed_pkg_for_tests"
+
+
+@pytest.fixture
+def stubbed():
+    meta_path = list(sys.meta_path)
+    install_stubs([PACKAGE], mode="all")
+    yield importlib.import_module(PACKAGE)
+    sys.meta_path[:] = meta_path
+    for name in [m for m in sys.modules if m.split(".")[0] == PACKAGE]:
+        del sys.modules[name]
+
+
+def test_nested_stub_exception_is_caught(stubbed):
+    with pytest.raises(stubbed.Client.NotFoundError):
+        raise stubbed.Client.NotFoundError("missing")
+
+    try:
+        raise stubbed.Client.NotFoundError("missing")
+    except stubbed.Client.NotFoundError:
+        pass
+
+
+def test_instance_exception_attributes_are_classes(stubbed):
+    client = stubbed.Client()
+    assert client.TimeoutError is stubbed.Client.TimeoutError
+    assert issubclass(client.TimeoutError, Exception)
+
+
+def test_stub_module_imports_and_subclasses(stubbed):
+    submodule = importlib.import_module(f"{PACKAGE}.sprite")
+
+    class Player(submodule.Sprite):
+        pass
+
+    assert list(Player()) == []
+    assert stubbed.Client is stubbed.Client
+
+
+def test_off_mode_installs_nothing():
+    meta_path = list(sys.meta_path)
+    assert install_stubs([PACKAGE], mode="off") == []
+    assert sys.meta_path == meta_path
+    assert not any(isinstance(f, StubFinder) for f in sys.meta_path)
+
+
+def test_classify_imports():
+    groups = classify_imports(["os.path", "requests", "calc", "json"], {"calc"})
+    assert groups == {"local": ["calc"], "stdlib": ["json", "os"], "third_party": ["requests"]}
@@ -0,0 +1,60 @@
+import threading
+
+from llm_scheduler import LLMScheduler
+
+
+def _scheduler(**kwargs):
+    return LLMScheduler(rpm=60_000, tpm=10_000_000, completion_reserve=1, **kwargs)
+
+
+def test_position_callback_runs_without_the_lock():
+    scheduler = _scheduler(max_concurrent=1)
+    first = scheduler.acquire(10, session="a")
+    entered, gate = threading.Event(), threading.Event()
+    granted = []
+
+    def on_position(position, waiting):
+        entered.set()
+        gate.wait(5)
+
+    waiter = threading.Thread(
+        target=lambda: granted.append(scheduler.acquire(10, session="b", on_position=on_position))
+    )
+    waiter.start()
+    assert entered.wait(5)
+
+    # A blocked UI callback must not stall the other sessions' calls
+    other = threading.Thread(target=lambda: (scheduler.stats(), scheduler.release(first)))
+    other.start()
+    other.join(2)
+    assert not other.is_alive()
+
+    gate.set()
+    waiter.join(5)
+    assert granted
+    scheduler.release(granted[0])
+
+
+def test_interactive_served_before_batch():
+    scheduler = _scheduler(max_concurrent=1)
+    held = scheduler.acquire(10, session="a")
+    order = []
+
+    def request(session, priority):
+        ticket = scheduler.acquire(10, session=session, priority=priority)
+        order.append(priority)
+        scheduler.release(ticket)
+
+    batch = threading.Thread(target=request, args=("job", "batch"))
+    batch.start()
+    while scheduler.stats()["waiting"] < 1:
+        pass
+    interactive = threading.Thread(target=request, args=("ui", "interactive"))
+    interactive.start()
+    while scheduler.stats()["waiting"] < 2:
+        pass
+
+    scheduler.release(held)
+    batch.join(5)
+    interactive.join(5)
+    assert order == ["interactive", "batch"]
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+import pytest
+
+from pipeline_dag import DAGScheduler, PipelineCancelled, Stage, _fingerprint
+
+
+def _project(tmp_path):
+    folder = tmp_path / "project"
+    (folder / "report").mkdir(parents=True)
+    (folder / "generated_tests").mkdir()
+    (folder / "calc.py").write_text("def add(a, b):\n    return a + b\n")
+    return str(folder)
+
+
+def _bump(path, text):
+    """Write text and push the mtime forward so the change is visible on coarse clocks."""
+    with open(path, "a") as f:
+        f.write(text)
+    later = time.time() + 5
+    os.utime(path, (later, later))
+
+
+def test_fingerprint_ignores_pipeline_outputs(tmp_path):
+    folder = _project(tmp_path)
+    before = _fingerprint(folder)
+
+    _bump(os.path.join(folder, "report", "pipeline_trace.jsonl"), '{"stage": "x"}\n')
+    _bump(os.path.join(folder, "generated_tests", "test_calc.py"), "import unittest\n")
+
+    assert _fingerprint(folder) == before
+
+
+def test_fingerprint_changes_on_source_edit(tmp_path):
+    folder = _project(tmp_path)
+    before = _fingerprint(folder)
+
+    _bump(os.path.join(folder, "calc.py"), "\ndef sub(a, b):\n    return a - b\n")
+
+    assert _fingerprint(folder) != before
+
+
+def test_fingerprint_changes_on_new_source_file(tmp_path):
+    folder = _project(tmp_path)
+    before = _fingerprint(folder)
+
+    (tmp_path / "project" / "util.py").write_text("X = 1\n")
+
+    assert _fingerprint(folder) != before
+
+
+def test_fingerprint_covers_packaging_config(tmp_path):
+    folder = _project(tmp_path)
+    before = _fingerprint(folder)
+
+    _bump(os.path.join(folder, "pyproject.toml"), "[project]\nname = 'calc'\n")
+
+    assert _fingerprint(folder) != before
+
+
+def test_cached_stage_survives_trace_writes(tmp_path):
+    folder = _project(tmp_path)
+    calls = []
+
+    def scan(folder):
+        calls.append(folder)
+        _bump(os.path.join(folder, "report", "pipeline_trace.jsonl"), "{}\n")
+        return sorted(os.listdir(folder))
+
+    scheduler = DAGScheduler([Stage("scan", scan, ["folder"], ["files"])])
+    first = scheduler.run({"folder": folder}, targets=["files"])
+    second = scheduler.run({"folder": folder}, targets=["files"])
+
+    assert len(calls) == 1
+    assert first["files"] == second["files"]
+
+
+def test_concurrent_runs_share_an_in_flight_stage(tmp_path):
+    folder = _project(tmp_path)
+    calls = []
+    release = threading.Event()
+
+    def scan(folder):
+        calls.append(folder)
+        release.wait(5)
+        return sorted(os.listdir(folder))
+
+    scheduler = DAGScheduler([Stage("scan", scan, ["folder"], ["files"])])
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(scheduler.run({"folder": folder}, targets=["files"])))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert [r["files"] for r in results] == [results[0]["files"]] * 2
+
+
+def test_cancel_stops_before_the_next_stage(tmp_path):
+    folder = _project(tmp_path)
+    cancel = threading.Event()
+    ran = []
+
+    def scan(folder):
+        ran.append("scan")
+        cancel.set()
+        return ["calc.py"]
+
+    def count(files):
+        ran.append("count")
+        return len(files)
+
+    scheduler = DAGScheduler([
+        Stage("scan", scan, ["folder"], ["files"]),
+        Stage("count", count, ["files"], ["total"]),
+    ])
+    with pytest.raises(PipelineCancelled):
+        scheduler.run({"folder": folder}, targets=["total"], cancel=cancel)
+
+    assert ran == ["scan"]
+    # The stage that finished is cached for the next run
+    assert scheduler.run({"folder": folder}, targets=["total"])["total"] == 1
+    assert ran == ["scan", "count"]
+
+
+def test_unknown_target_is_rejected():
+    scheduler = DAGScheduler([Stage("scan", sorted, ["folder"], ["files"])])
+
+    with pytest.raises(KeyError):
+        scheduler.run({"folder": "."}, targets=["nothing"])
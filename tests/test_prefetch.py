@@ -0,0 +1,39 @@
+import os
+
+from pipeline_dag import DAGScheduler, Stage
+from pipeline_metrics import PipelineTracer, use_tracer
+from prefetch import PREFETCH_TARGETS, Prefetcher
+
+
+def _scheduler(calls):
+    def stage(name):
+        def func(folder, target_file):
+            calls.append(name)
+            return f"{name}:{os.path.basename(target_file)}"
+        return Stage(name, func, ["folder", "target_file"], [name])
+
+    return DAGScheduler([stage(name) for name in PREFETCH_TARGETS])
+
+
+def test_foreground_run_hits_prefetched_results(tmp_path):
+    folder = tmp_path / "project"
+    folder.mkdir()
+    (folder / "main.py").write_text("print('hi')\n")
+    target = str(folder / "main.py")
+    candidates = [{"path": target, "score": 3}]
+    calls = []
+    scheduler = _scheduler(calls)
+
+    # As in the app, spans go to the trace file inside the project folder
+    tracer = PipelineTracer(str(folder / "report" / "pipeline_trace.jsonl"))
+    with use_tracer(tracer):
+        prefetch = Prefetcher(scheduler, str(folder), candidates).start()
+        prefetch._thread.join()
+        assert prefetch.is_ready(target)
+        assert os.path.getsize(folder / "report" / "pipeline_trace.jsonl") > 0
+        prefetched = len(calls)
+
+        values = scheduler.run({"folder": str(folder), "target_file": target}, targets=PREFETCH_TARGETS)
+
+    assert len(calls) == prefetched
+    assert values["call_graph"] == "call_graph:main.py"
@@ -0,0 +1,50 @@
+import os
+
+from call_graph import build_call_graph
+from code_analyzer import CodeAnalyzer
+from priority_scoring import graph_metrics, rank_functions
+
+
+def test_high_fan_in_outranks_identical_function(tmp_path):
+    (tmp_path / "util.py").write_text(
+        "def used(x):\n    return x + 1\n\n\n"
+        "def unused(x):\n    return x + 1\n"
+    )
+    (tmp_path / "app.py").write_text(
+        "from util import used\n\n\n"
+        "def run():\n    return used(1) + used(2) + used(3)\n"
+    )
+    root = str(tmp_path)
+    functions = CodeAnalyzer(os.path.join(root, "util.py")).extract_functions()
+
+    fan_in, reachable = graph_metrics(root, functions, build_call_graph(root))
+    ranked = rank_functions(functions, fan_in=fan_in, reachable=reachable)
+
+    assert [fn["name"] for fn in ranked] == ["used", "unused"]
+    assert ranked[0]["priority"] > ranked[1]["priority"]
+
+
+def test_entry_reachable_outranks_dead_code(tmp_path):
+    (tmp_path / "lib.py").write_text(
+        "def live(x):\n    return x * 2\n\n\n"
+        "def dead(x):\n    return x * 2\n"
+    )
+    (tmp_path / "main.py").write_text("from lib import live\n\nprint(live(2))\n")
+    root = str(tmp_path)
+    functions = CodeAnalyzer(os.path.join(root, "lib.py")).extract_functions()
+
+    fan_in, reachable = graph_metrics(
+        root, functions, build_call_graph(root), [os.path.join(root, "main.py")]
+    )
+    ranked = rank_functions(functions, fan_in=fan_in, reachable=reachable)
+
+    assert [fn["name"] for fn in ranked] == ["live", "dead"]
+
+
+def test_graph_weights_can_be_disabled():
+    functions = [
+        {"name": "a", "complexity": 1, "args": ["x"], "is_async": False, "calls": []},
+        {"name": "b", "complexity": 1, "args": ["x"], "is_async": False, "calls": []},
+    ]
+    ranked = rank_functions(functions, weights={"fan_in": 0, "entry_reachable": 0}, fan_in=[0, 5])
+    assert ranked[0]["priority"] == ranked[1]["priority"] == 1
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+pytest.importorskip("tkinter")
+pytest.importorskip("astpretty")
+
+from project_analyzer import find_python_entry_files, rank_entry_candidates  # noqa: E402
+
+
+def _project(tmp_path):
+    (tmp_path / "lib.py").write_text("def helper():\n    return 1\n")
+    (tmp_path / "tool.py").write_text(
+        "def run():\n    pass\n\n\nif __name__ == \"__main__\":\n    run()\n"
+    )
+    (tmp_path / "main.py").write_text("print('hi')\n")
+    return str(tmp_path)
+
+
+def test_library_modules_are_not_entry_files(tmp_path):
+    folder = _project(tmp_path)
+
+    found = find_python_entry_files(folder)
+
+    assert [os.path.basename(p) for p in found] == ["tool.py", "main.py"]
+
+
+def test_library_modules_stay_selectable_last(tmp_path):
+    folder = _project(tmp_path)
+
+    candidates = rank_entry_candidates(folder)
+
+    assert candidates[-1]["path"].endswith("lib.py")
+    assert candidates[-1]["score"] == 0
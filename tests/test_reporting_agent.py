@@ -0,0 +1,87 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+pytest.importorskip("fpdf")
+pytest.importorskip("dotenv")
+
+from llm_backend import LLMBackend  # noqa: E402
+from reporting_agent import ReportingAgent, _export_record  # noqa: E402
+
+SUMMARY = {
+    "tests_run": 2, "failures": 1, "errors": 0,
+    "failed_tests": ["test_add"], "error_tests": [], "raw_log": "FAIL: test_add",
+}
+
+
+class _Unavailable(LLMBackend):
+    def available(self):
+        return False
+
+    def _complete(self, messages, model, **kwargs):
+        raise AssertionError("must not be called")
+
+
+class _Failing(LLMBackend):
+    def _complete(self, messages, model, **kwargs):
+        raise ConnectionError("provider unreachable")
+
+
+def _agent(backend):
+    agent = ReportingAgent.__new__(ReportingAgent)
+    agent.backend = backend
+    return agent
+
+
+def test_analysis_skipped_without_backend():
+    note = _agent(_Unavailable(model="gpt-4o-mini")).analyze_with_llm(SUMMARY)
+    assert note.startswith("AI analysis skipped")
+
+
+def test_analysis_survives_provider_errors():
+    note = _agent(_Failing(model="gpt-4o-mini")).analyze_with_llm(SUMMARY)
+    assert "ConnectionError" in note
+
+
+def _result(test, outcome="pass", **extra):
+    return {"test": test, "outcome": outcome, "duration_s": 0.01, **extra}
+
+
+def test_export_record_splits_dotted_ids():
+    record = _export_record(_result("tests.test_calc.TestAdd.test_add"))
+    assert (record["classname"], record["name"]) == ("tests.test_calc.TestAdd", "test_add")
+    assert record["status"] == "passed"
+
+
+def test_export_record_parses_fixture_errors():
+    record = _export_record(_result("setUpClass (pkg.mod.TestAdd)", "error", message="boom"))
+    assert (record["classname"], record["name"]) == ("pkg.mod.TestAdd", "setUpClass")
+    assert record["status"] == "error"
+
+    record = _export_record(_result("setUpModule (pkg.mod)", "error"))
+    assert (record["classname"], record["name"]) == ("pkg.mod", "setUpModule")
+
+
+def test_junit_and_json_exports(tmp_path):
+    results = tmp_path / "test_results.jsonl"
+    rows = [
+        _result("m.T.test_ok"),
+        _result("m.T.test_bad", "fail", message="AssertionError: 1 != 2", traceback="Traceback\x00 ..."),
+        _result("setUpClass (m.U)", "error", message="RuntimeError: no db"),
+        _result("m.T.test_skip", "skip"),
+    ]
+    results.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    agent = _agent(None)
+    agent.log_path = tmp_path / "unittest_output.log"
+
+    paths = agent.export_results(str(results))
+
+    suite = ET.parse(paths["junit"]).getroot()
+    assert (suite.get("tests"), suite.get("failures"), suite.get("errors"), suite.get("skipped")) == ("4", "1", "1", "1")
+    cases = {(c.get("classname"), c.get("name")) for c in suite.iter("testcase")}
+    assert ("m.U", "setUpClass") in cases
+    with open(paths["json"], encoding="utf-8") as f:
+        exported = json.load(f)
+    assert exported["summary"]["status"] == "FAILED"
+    assert [t["status"] for t in exported["tests"]] == ["passed", "failed", "error", "skipped"]
@@ -0,0 +1,82 @@
+import pytest
+
+from run_history import RunHistory, project_key
+
+
+@pytest.fixture
+def history(tmp_path):
+    return RunHistory(str(tmp_path / "history.sqlite3"))
+
+
+def _record(history, outcomes, code_hash="c1", project="p"):
+    return history.record_run(
+        project=project, code_hash=code_hash, status="failed", duration_s=1.0,
+        tests=[{"test": t, "outcome": o, "duration_s": 0.1} for t, o in outcomes.items()],
+    )
+
+
+def test_failure_scores_decay_with_age(history):
+    _record(history, {"a": "fail", "b": "pass"})
+    _record(history, {"a": "pass", "b": "fail"})
+
+    scores = history.failure_scores("p", decay=0.5)
+
+    # b failed in the latest run (weight 1), a one run earlier (weight 0.5)
+    assert scores["b"]["score"] == 1.0
+    assert scores["a"]["score"] == 0.5
+    assert scores["b"]["last_failed"] and not scores["a"]["last_failed"]
+    assert scores["a"]["runs"] == 2
+
+
+def test_failure_scores_are_per_project(history):
+    _record(history, {"a": "fail"}, project="p")
+    _record(history, {"a": "pass"}, project="other")
+
+    assert history.failure_scores("p")["a"]["score"] == 1.0
+    assert history.failure_scores("other")["a"]["score"] == 0.0
+
+
+def test_flaky_tests_need_both_outcomes_on_same_code(history):
+    _record(history, {"flaky": "pass", "steady": "fail"})
+    _record(history, {"flaky": "error", "steady": "fail"})
+    _record(history, {"flaky": "pass", "steady": "fail"})
+    # A failure after a code change is not flakiness
+    _record(history, {"fixed": "fail"}, code_hash="c1")
+    _record(history, {"fixed": "pass"}, code_hash="c2")
+
+    flaky = history.flaky_tests("p")
+
+    assert [f["test_id"] for f in flaky] == ["flaky"]
+    assert flaky[0]["flips"] == 2
+    assert flaky[0]["flip_rate"] == 1.0
+
+
+def test_record_run_keeps_given_start_time(history):
+    _record(history, {"a": "pass"})
+    history.record_run("p", "c1", "success", 1.0, [], started_at=123.0)
+
+    assert history.runs("p", limit=1)[0]["started_at"] == 123.0
+
+
+def test_project_key_depends_on_project_contents(tmp_path):
+    one = tmp_path / "a" / "project"
+    two = tmp_path / "b" / "project"
+    (one / "src" / "calc").mkdir(parents=True)
+    (one / "src" / "calc" / "core.py").write_text("X = 1\n")
+    two.mkdir(parents=True)
+    (two / "game.py").write_text("X = 1\n")
+
+    assert project_key(str(one)) != project_key(str(two))
+    assert project_key(str(one)).startswith("project-")
+
+
+def test_project_key_ignores_pipeline_files(tmp_path):
+    (tmp_path / "calc.py").write_text("X = 1\n")
+    before = project_key(str(tmp_path))
+
+    (tmp_path / "__init__.py").write_text("")
+    (tmp_path / "generated_tests").mkdir()
+    (tmp_path / "generated_tests" / "__init__.py").write_text("")
+    (tmp_path / "generated_tests" / "test_calc.py").write_text("")
+
+    assert project_key(str(tmp_path)) == before
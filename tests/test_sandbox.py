@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+import pytest
+
+from sandbox import SandboxLimits, resource, run_sandboxed
+
+pytestmark = pytest.mark.skipif(resource is None, reason="resource limits need a POSIX platform")
+
+
+def _run(code, project, **limits):
+    limits = SandboxLimits(deny_network=False, **limits)
+    return run_sandboxed([sys.executable, "-c", code], str(project), limits, timeout_s=30)
+
+
+@pytest.fixture
+def project(tmp_path):
+    folder = tmp_path / "project"
+    (folder / "report").mkdir(parents=True)
+    (folder / "report" / "old.log").write_text("previous run")
+    (folder / "data.txt").write_text("original")
+    return folder
+
+
+def test_runs_on_a_private_copy(project):
+    result = _run(
+        "import os; print(sorted(os.listdir('.'))); open('data.txt', 'w').write('changed')",
+        project,
+    )
+
+    assert result.returncode == 0
+    assert "'data.txt'" in result.stdout and "report" not in result.stdout
+    assert (project / "data.txt").read_text() == "original"
+
+
+def test_secrets_are_not_passed(project, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("HARMLESS_SETTING", "1")
+
+    result = _run("import os; print(sorted(k for k in os.environ if k in ('OPENAI_API_KEY', 'HARMLESS_SETTING')))", project)
+
+    assert result.stdout.strip() == "['HARMLESS_SETTING']"
+
+
+def test_output_is_capped(project):
+    result = _run("print('x' * 10000)", project, max_output_bytes=100)
+
+    assert result.stdout.startswith("x" * 100)
+    assert "output truncated at 100 bytes" in result.stdout
+
+
+def test_file_size_limit(project):
+    result = _run("open('big.bin', 'wb').write(b'0' * (3 * 1024 * 1024))", project, file_size_mb=1)
+
+    assert result.returncode != 0
+
+
+def test_timeout_kills_the_run(project):
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_sandboxed(
+            [sys.executable, "-c", "import time; time.sleep(30)"], str(project),
+            SandboxLimits(deny_network=False), timeout_s=1,
+        )
@@ -0,0 +1,74 @@
+from context_enricher import StreamingCodeExtractor
+
+MODULE = '''import unittest
+from unittest.mock import patch
+
+from calc import add
+
+
+class TestAdd(unittest.TestCase):
+    def test_add(self):
+        self.assertEqual(add(1, 2), 3)
+
+    @patch("calc.log")
+    def test_logs(self, log):
+        add(1, 2)
+        log.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
+'''
+
+
+def _feed(text, size=7):
+    """Feeds text in small chunks; returns the extractor and how much was consumed."""
+    extractor = StreamingCodeExtractor()
+    for start in range(0, len(text), size):
+        extractor.feed(text[start:start + size])
+        if extractor.is_complete():
+            return extractor, start + size
+    return extractor, len(text)
+
+
+def test_unfenced_module_completes_on_trailing_prose():
+    prose = "This module tests add() with a normal case and a mocked logger.\nMore text that should never be read.\n"
+
+    extractor, consumed = _feed(MODULE + "\n" + prose)
+
+    assert extractor.is_complete()
+    assert extractor.code == MODULE.strip()
+    assert consumed < len(MODULE) + len(prose) - 20
+
+
+def test_unfenced_module_without_prose_is_not_cut():
+    extractor, _ = _feed(MODULE)
+
+    assert not extractor.is_complete()
+    assert extractor.code == MODULE.strip()
+
+
+def test_leading_prose_is_not_a_stop():
+    extractor, _ = _feed("Here is the test module:\n\n" + MODULE)
+
+    assert not extractor.is_complete()
+    assert extractor.code == MODULE.strip()
+
+
+def test_top_level_continuations_are_code():
+    source = (
+        "import unittest\n\n\n"
+        "class TestX(unittest.TestCase):\n    def test_x(self):\n        pass\n\n\n"
+        "try:\n    import numpy\nexcept ImportError:\n    numpy = None\n"
+        "DATA = [\n1,\n2,\n]\n"
+    )
+    extractor, _ = _feed(source)
+
+    assert not extractor.is_complete()
+
+
+def test_fenced_module_completes_on_closing_fence():
+    extractor, _ = _feed("Sure:\n```python\n" + MODULE + "```\n\nExplanation follows at length.\n")
+
+    assert extractor.is_complete()
+    assert extractor.code == MODULE.strip()
@@ -0,0 +1,101 @@
+import ast
+
+from context_enricher import save_generated_tests
+from suite_merge import merge_test_modules, test_fingerprint as fingerprint
+
+EXISTING = '''import unittest
+from calc import add
+
+
+class TestAdd(unittest.TestCase):
+    def test_add(self):
+        self.assertEqual(add(1, 2), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
+'''
+
+
+def _method(source):
+    return ast.parse(source).body[0]
+
+
+def test_fingerprint_ignores_names_docstrings_and_layout():
+    one = _method("def test_a(self):\n    result = add(1, 2)\n    self.assertEqual(result, 3)\n")
+    two = _method('def test_b(self):\n    """Adds."""\n    total = add(1,  2)\n\n    self.assertEqual(total, 3)\n')
+    assert fingerprint(one) == fingerprint(two)
+
+
+def test_fingerprint_keeps_literal_values():
+    one = _method("def test_a(self):\n    self.assertEqual(add(1, 2), 3)\n")
+    two = _method("def test_a(self):\n    self.assertEqual(add(2, 2), 4)\n")
+    assert fingerprint(one) != fingerprint(two)
+
+
+def test_merge_drops_duplicates_and_adds_new_tests():
+    new = '''import unittest
+from calc import add
+
+
+class TestAdd(unittest.TestCase):
+    def test_add_renamed(self):
+        """Same check, other name."""
+        self.assertEqual(add(1,  2), 3)
+
+    def test_zero(self):
+        self.assertEqual(add(0, 0), 0)
+
+
+class TestMore(unittest.TestCase):
+    def test_negative(self):
+        self.assertEqual(add(-1, -1), -2)
+'''
+    merged, added, updated, duplicates = merge_test_modules(EXISTING, new)
+
+    assert (added, updated, duplicates) == (2, 0, 1)
+    tree = ast.parse(merged)
+    classes = {c.name: [m.name for m in c.body] for c in tree.body if isinstance(c, ast.ClassDef)}
+    assert classes == {"TestAdd": ["test_add", "test_zero"], "TestMore": ["test_negative"]}
+    assert merged.rstrip().endswith("unittest.main()")
+    assert "\n\n\n\n" not in merged
+
+
+def test_merge_replaces_changed_test_of_same_name():
+    new = '''import unittest
+from calc import add
+
+
+class TestAdd(unittest.TestCase):
+    def test_add(self):
+        self.assertEqual(add(2, 2), 4)
+'''
+    merged, added, updated, duplicates = merge_test_modules(EXISTING, new)
+
+    assert (added, updated, duplicates) == (0, 1, 0)
+    assert "add(2, 2)" in merged and "add(1, 2)" not in merged
+
+
+def test_merge_of_same_module_changes_nothing():
+    assert merge_test_modules(EXISTING, EXISTING) == (EXISTING, 0, 0, 1)
+
+
+def test_save_overwrites_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("TEST_SUITE_MODE", raising=False)
+    save_dir = str(tmp_path)
+    path = save_generated_tests(save_dir, "calc.py", EXISTING)
+    save_generated_tests(save_dir, "calc.py", EXISTING.replace("add(1, 2), 3", "add(2, 2), 4"))
+
+    with open(path, encoding="utf-8") as f:
+        assert "add(1, 2)" not in f.read()
+
+
+def test_save_merges_when_requested(tmp_path):
+    save_dir = str(tmp_path)
+    path = save_generated_tests(save_dir, "calc.py", EXISTING, mode="merge")
+    extra = EXISTING.replace("def test_add(self):", "def test_sum(self):").replace("add(1, 2), 3", "add(3, 4), 7")
+    save_generated_tests(save_dir, "calc.py", extra, mode="merge")
+
+    with open(path, encoding="utf-8") as f:
+        merged = f.read()
+    assert "def test_add(" in merged and "def test_sum(" in merged
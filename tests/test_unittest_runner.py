@@ -0,0 +1,65 @@
+import unittest
+
+from unittest_runner import NEW_TEST_SCORE, failure_priority, order_suite
+
+
+class TestStable(unittest.TestCase):
+    def test_a(self):
+        pass
+
+    def test_b(self):
+        pass
+
+
+class TestFlaky(unittest.TestCase):
+    def test_c(self):
+        pass
+
+    def test_d(self):
+        pass
+
+
+def _suite():
+    loader = unittest.TestLoader()
+    return unittest.TestSuite([loader.loadTestsFromTestCase(TestStable), loader.loadTestsFromTestCase(TestFlaky)])
+
+
+def _ids(suite):
+    return [test.id().rsplit(".", 2)[-2:] for test in suite]
+
+
+def _score(score, duration_s=0.1):
+    return {"score": score, "duration_s": duration_s}
+
+
+def test_failure_priority_without_history():
+    assert failure_priority("tests.test_x.T.test_y", {}) == (-NEW_TEST_SCORE, 0.0)
+
+
+def test_failure_priority_bonus_for_changed_modules():
+    priorities = {"tests": {"m.T.test_y": _score(0.2)}, "changed_modules": ["m"]}
+
+    assert failure_priority("m.T.test_y", priorities) < failure_priority("other.T.test_y", priorities)
+
+
+def test_order_suite_runs_likely_failures_first_and_keeps_classes_together():
+    prefix = f"{__name__}."
+    priorities = {"tests": {
+        prefix + "TestStable.test_a": _score(0.0),
+        prefix + "TestStable.test_b": _score(0.0),
+        prefix + "TestFlaky.test_c": _score(0.1),
+        prefix + "TestFlaky.test_d": _score(0.9),
+    }}
+
+    ordered = _ids(order_suite(_suite(), priorities))
+
+    assert ordered == [["TestFlaky", "test_d"], ["TestFlaky", "test_c"], ["TestStable", "test_a"], ["TestStable", "test_b"]]
+
+
+def test_order_suite_breaks_ties_by_duration():
+    prefix = f"{__name__}.TestStable."
+    priorities = {"tests": {prefix + "test_a": _score(0.5, 2.0), prefix + "test_b": _score(0.5, 0.1)}}
+
+    ordered = _ids(order_suite(unittest.TestLoader().loadTestsFromTestCase(TestStable), priorities))
+
+    assert ordered == [["TestStable", "test_b"], ["TestStable", "test_a"]]
@@ -0,0 +1,233 @@
+"""
+Unittest Runner — `unittest discover` that also appends one JSON line per
+finished test (id, outcome, duration; message and traceback excerpt for
+failures and errors) to a results file.
+
+Console output is the same as `python -m unittest`, so the log parser in
+ReportingAgent is unchanged. Lines are flushed as tests finish, which
+keeps partial results when the run is killed on timeout.
+
+    python unittest_runner.py --results report/test_results.jsonl -s . -p 'test_*.py'
+
+--stub NAME (repeatable) with --stub-mode missing|all installs
+import_stubs stand-ins for third-party packages before discovery.
+
+--priorities FILE reorders the suite so tests most likely to fail run
+first (see order_suite); --failfast stops at the first failure.
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+import unittest
+
+from import_stubs import DEFAULT_STUB_MODE, STUB_MODES, install_stubs
+
+
+MESSAGE_MAX_CHARS = 1000
+TRACEBACK_EXCERPT_LINES = 20
+
+
+def _failure_details(err, formatted):
+    """Message and the last lines of the formatted traceback of an exc_info triple."""
+    exc_type, exc_value, _ = err
+    message = f"{exc_type.__name__}: {exc_value}"
+    lines = formatted.splitlines()
+    return {
+        "message": message[:MESSAGE_MAX_CHARS],
+        "traceback": "\n".join(lines[-TRACEBACK_EXCERPT_LINES:]),
+    }
+
+
+class RecordingTestResult(unittest.TextTestResult):
+    def __init__(self, stream, descriptions, verbosity, results_file=None):
+        super().__init__(stream, descriptions, verbosity)
+        self.results_file = results_file
+        self._current = None
+        self._started = 0.0
+        self._outcome = None
+        self._details = None
+
+    def _write(self, test, outcome, duration, details=None):
+        if self.results_file is None:
+            return
+        self.results_file.write(json.dumps({
+            "test": test.id(),
+            "outcome": outcome,
+            "duration_s": round(duration, 6),
+            **(details or {}),
+        }) + "\n")
+        self.results_file.flush()
+
+    def _set_outcome(self, test, outcome, err=None):
+        # _exc_info_to_string drops unittest's own frames, as in the console output
+        details = _failure_details(err, self._exc_info_to_string(err, test)) if err is not None else None
+        if test is not self._current:
+            # setUpClass / setUpModule errors are reported without startTest
+            self._write(test, outcome, 0.0, details)
+        elif self._outcome in (None, "pass"):
+            self._outcome = outcome
+            self._details = details
+
+    def startTest(self, test):
+        self._current = test
+        self._outcome = None
+        self._details = None
+        self._started = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        if test is self._current:
+            self._write(test, self._outcome or "pass", time.perf_counter() - self._started, self._details)
+            self._current = None
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._set_outcome(test, "pass")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._set_outcome(test, "fail", err)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._set_outcome(test, "error", err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._set_outcome(test, "skip")
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._set_outcome(test, "expected_failure")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._set_outcome(test, "unexpected_success")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            self._set_outcome(test, "fail" if issubclass(err[0], test.failureException) else "error", err)
+
+
+# ------------------ Ordering ------------------
+NEW_TEST_SCORE = 0.5
+CHANGED_MODULE_BONUS = 1.0
+
+
+def _flatten(suite):
+    for item in suite:
+        if isinstance(item, unittest.TestSuite):
+            yield from _flatten(item)
+        else:
+            yield item
+
+
+def failure_priority(test_id, priorities):
+    """
+    Sort key, most likely failure first. priorities holds "tests"
+    (RunHistory.failure_scores) and "changed_modules" (test modules edited
+    since the last run). Tests without history count as NEW_TEST_SCORE;
+    ties go to the test that failed (or ran) fastest before.
+    """
+    item = priorities.get("tests", {}).get(test_id)
+    score = item["score"] if item else NEW_TEST_SCORE
+    if any(test_id.startswith(module + ".") for module in priorities.get("changed_modules", ())):
+        score += CHANGED_MODULE_BONUS
+    return (-score, item["duration_s"] if item else 0.0)
+
+
+def order_suite(suite, priorities):
+    """
+    Reorders a discovered suite by failure_priority. Tests stay grouped by
+    module and class so setUpModule / setUpClass still run once each;
+    import errors reported by the loader always come first.
+    """
+    modules = {}
+    for test in _flatten(suite):
+        test_id = test.id()
+        if test_id.startswith("unittest.loader._FailedTest"):
+            key = (float("-inf"), 0.0)
+        else:
+            key = failure_priority(test_id, priorities)
+        classes = modules.setdefault(type(test).__module__, {})
+        classes.setdefault(type(test), []).append((key, test))
+
+    def best(entries):
+        return min(key for key, _ in entries)
+
+    ordered = []
+    module_order = sorted(modules.values(), key=lambda classes: min(best(e) for e in classes.values()))
+    for classes in module_order:
+        for entries in sorted(classes.values(), key=best):
+            ordered.extend(test for _, test in sorted(entries, key=lambda e: e[0]))
+    return unittest.TestSuite(ordered)
+
+
+def iter_results(results_path):
+    """Yields the per-test records written by the runner; stops at a truncated last line."""
+    if not results_path or not os.path.exists(results_path):
+        return
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                return
+
+
+def read_results(results_path):
+    return list(iter_results(results_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--results", help="JSON lines file receiving per-test results")
+    parser.add_argument("-s", "--start-directory", default=".")
+    parser.add_argument("-p", "--pattern", default="test*.py")
+    parser.add_argument("-t", "--top-level-directory", default=None)
+    parser.add_argument("-v", "--verbose", action="store_const", const=2, default=1, dest="verbosity")
+    parser.add_argument("--stub", action="append", default=[], help="third-party package to stub")
+    parser.add_argument("--stub-mode", choices=STUB_MODES, default=DEFAULT_STUB_MODE)
+    parser.add_argument("--priorities", help="JSON file of failure priorities to order tests by")
+    parser.add_argument("-f", "--failfast", action="store_true", help="stop on the first failure or error")
+    args = parser.parse_args(argv)
+
+    # Behave like `python -m unittest`: the project, not this file's folder, is importable
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path[0] = os.getcwd()
+
+    stubbed = install_stubs(args.stub, args.stub_mode)
+    if stubbed:
+        print(f"Stubbed third-party modules: {', '.join(stubbed)}", file=sys.stderr)
+
+    results_file = None
+    if args.results:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        results_file = open(args.results, "w", encoding="utf-8")
+    try:
+        suite = unittest.defaultTestLoader.discover(
+            args.start_directory, args.pattern, args.top_level_directory
+        )
+        if args.priorities:
+            with open(args.priorities, "r", encoding="utf-8") as f:
+                suite = order_suite(suite, json.load(f))
+        runner = unittest.TextTestRunner(
+            verbosity=args.verbosity,
+            failfast=args.failfast,
+            resultclass=functools.partial(RecordingTestResult, results_file=results_file),
+        )
+        result = runner.run(suite)
+    finally:
+        if results_file is not None:
+            results_file.close()
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Workspace — a private directory per pipeline run.
+
+Every upload (Streamlit session) or CLI run gets its own directory under
+WORKSPACE_ROOT (default: uploaded_projects):
+
+    <root>/<session>-<run>/
+        upload.zip                 uploaded archive, removed after extraction
+        <project>/                 extracted project (the pipeline "folder")
+            generated_tests/ ...
+            report/                unittest log, per-test results, traces
+            test_report.md
+            ai_test_report.pdf
+
+The project keeps its upload name, so run history still groups runs of
+the same project across workspaces. Nothing outside the workspace is
+written, so concurrent sessions never share a path.
+
+touch() marks a workspace as recently used and lease() marks it as in
+use by a running pipeline; workspace_gc never evicts leased workspaces.
+"""
+
+import glob
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_WORKSPACE_ROOT = "uploaded_projects"
+METADATA_FILE = "workspace.json"
+LEASE_PREFIX = ".lease-"
+
+
+def _safe_name(name):
+    name = re.sub(r"[^\w.-]+", "_", os.path.basename(name)).strip("._")
+    return name or "project"
+
+
+class Workspace:
+    def __init__(self, root, project_name):
+        self.root = os.path.abspath(root)
+        self.project_name = _safe_name(project_name)
+
+    @property
+    def upload_path(self):
+        return os.path.join(self.root, "upload.zip")
+
+    @property
+    def project_dir(self):
+        return os.path.join(self.root, self.project_name)
+
+    @property
+    def report_dir(self):
+        return os.path.join(self.project_dir, "report")
+
+    @property
+    def trace_path(self):
+        return os.path.join(self.report_dir, "pipeline_trace.jsonl")
+
+    @property
+    def markdown_report_path(self):
+        return os.path.join(self.project_dir, "test_report.md")
+
+    @property
+    def pdf_report_path(self):
+        return os.path.join(self.project_dir, "ai_test_report.pdf")
+
+    def save_upload(self, data):
+        """Write the uploaded archive's bytes; returns its path."""
+        with open(self.upload_path, "wb") as f:
+            f.write(data)
+        return self.upload_path
+
+    def remove_upload(self):
+        if os.path.exists(self.upload_path):
+            os.remove(self.upload_path)
+
+    def touch(self):
+        """Record a use; the garbage collector evicts least recently used first."""
+        os.utime(self.root)
+
+    @contextmanager
+    def lease(self):
+        """Hold the workspace for a running pipeline (visible to other processes too)."""
+        path = os.path.join(self.root, f"{LEASE_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        open(path, "w").close()
+        self.touch()
+        try:
+            yield self
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+            if os.path.isdir(self.root):
+                self.touch()
+
+    def remove(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_leased(root):
+    """True if a live process holds a lease on the workspace at root."""
+    for path in glob.glob(os.path.join(glob.escape(root), LEASE_PREFIX + "*")):
+        try:
+            pid = int(os.path.basename(path)[len(LEASE_PREFIX):].split("-")[0])
+        except ValueError:
+            continue
+        if _pid_alive(pid):
+            return True
+    return False
+
+
+def create_workspace(project_name, session_id=None, base_dir=None):
+    """Create a fresh, uniquely named workspace for one run."""
+    base_dir = base_dir or os.getenv("WORKSPACE_ROOT", DEFAULT_WORKSPACE_ROOT)
+    os.makedirs(base_dir, exist_ok=True)
+    session_id = _safe_name(session_id or uuid.uuid4().hex[:8])
+    root = os.path.join(base_dir, f"{session_id}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(root)
+
+    workspace = Workspace(root, project_name)
+    with open(os.path.join(root, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump({"session": session_id, "project": workspace.project_name, "created_at": time.time()}, f)
+    return workspace
@@ -0,0 +1,153 @@
+"""
+Workspace GC — keeps WORKSPACE_ROOT within a disk budget.
+
+A background thread periodically:
+ 1. evicts workspaces unused for longer than the TTL
+ 2. evicts least recently used workspaces until the total size fits the
+    budget
+Leased workspaces (a pipeline is running in them) and workspaces used in
+the last min_idle_s are never evicted.
+
+    WORKSPACE_BUDGET_MB=2048   WORKSPACE_TTL_S=604800
+    WORKSPACE_MIN_IDLE_S=1800  WORKSPACE_GC_INTERVAL_S=300
+"""
+
+import os
+import shutil
+import threading
+import time
+
+from project_manifest import invalidate_manifest
+from workspace import DEFAULT_WORKSPACE_ROOT, is_leased
+
+DEFAULT_BUDGET_MB = 2048
+DEFAULT_TTL_S = 7 * 24 * 3600
+DEFAULT_MIN_IDLE_S = 30 * 60
+DEFAULT_INTERVAL_S = 300
+
+_gc = None
+_gc_lock = threading.Lock()
+
+
+def directory_size(path):
+    """Total size in bytes of the files under path (symlinks not followed)."""
+    total = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+    return total
+
+
+class WorkspaceGC:
+    def __init__(self, base_dir=None, budget_mb=None, ttl_s=None, min_idle_s=None, interval_s=None):
+        self.base_dir = os.path.abspath(base_dir or os.getenv("WORKSPACE_ROOT", DEFAULT_WORKSPACE_ROOT))
+        self.budget_bytes = int(float(budget_mb or os.getenv("WORKSPACE_BUDGET_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024)
+        self.ttl_s = float(ttl_s or os.getenv("WORKSPACE_TTL_S", DEFAULT_TTL_S))
+        self.min_idle_s = float(min_idle_s if min_idle_s is not None else os.getenv("WORKSPACE_MIN_IDLE_S", DEFAULT_MIN_IDLE_S))
+        self.interval_s = float(interval_s or os.getenv("WORKSPACE_GC_INTERVAL_S", DEFAULT_INTERVAL_S))
+
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.last_usage_bytes = 0
+        self.last_workspaces = 0
+        self.last_run = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _scan(self):
+        workspaces = []
+        try:
+            with os.scandir(self.base_dir) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        workspaces.append({
+                            "path": entry.path,
+                            "size": directory_size(entry.path),
+                            "last_used": entry.stat(follow_symlinks=False).st_mtime,
+                        })
+        except FileNotFoundError:
+            pass
+        return workspaces
+
+    def _evictable(self, workspace, now):
+        return now - workspace["last_used"] >= self.min_idle_s and not is_leased(workspace["path"])
+
+    def _evict(self, workspace):
+        shutil.rmtree(workspace["path"], ignore_errors=True)
+        invalidate_manifest(workspace["path"])
+        self.evictions += 1
+        self.evicted_bytes += workspace["size"]
+        print(f" [GC] evicted workspace {workspace['path']} ({workspace['size'] / 1024 / 1024:.1f} MB)")
+
+    def collect(self):
+        """One eviction pass; returns the paths removed."""
+        with self._lock:
+            now = time.time()
+            workspaces = sorted(self._scan(), key=lambda w: w["last_used"])
+            total = sum(w["size"] for w in workspaces)
+            removed = []
+
+            for workspace in workspaces:
+                expired = now - workspace["last_used"] > self.ttl_s
+                if (expired or total > self.budget_bytes) and self._evictable(workspace, now):
+                    self._evict(workspace)
+                    total -= workspace["size"]
+                    removed.append(workspace["path"])
+
+            if total > self.budget_bytes:
+                print(f" [GC] {total / 1024 / 1024:.1f} MB in use exceeds the budget; remaining workspaces are active")
+            self.last_usage_bytes = total
+            self.last_workspaces = len(workspaces) - len(removed)
+            self.last_run = now
+            return removed
+
+    def usage(self):
+        return {
+            "base_dir": self.base_dir,
+            "usage_bytes": self.last_usage_bytes,
+            "budget_bytes": self.budget_bytes,
+            "workspaces": self.last_workspaces,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "last_run": self.last_run,
+        }
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.collect()
+            except Exception as e:
+                print(f" [GC] workspace collection failed: {e}")
+            self._stop.wait(self.interval_s)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="workspace-gc", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def get_workspace_gc():
+    """Process-wide collector, started on first use."""
+    global _gc
+    with _gc_lock:
+        if _gc is None:
+            _gc = WorkspaceGC().start()
+        return _gc